@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+"""Update the query planner's statistics of dpd.db.
+Run at the end of the build, so they describe the finished tables."""
+
+from sqlalchemy import text
+
+from db.db_helpers import get_db_session
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def main():
+    pr.tic()
+    pr.title("analyzing db")
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+
+    pr.green("analyzing")
+    db_session.execute(text("ANALYZE"))
+    db_session.commit()
+    pr.yes("ok")
+
+    db_session.close()
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
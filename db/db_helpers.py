@@ -1,21 +1,32 @@
 """DB related functions:
+0. Register the "pali" collation on every connection,
 1. Create db if doesn't already exist,
 2. Create db Session
-3. Get column names,
-4. Print column names.
+3. Create a shared read-only engine and Session for servers,
+4. Get column names,
+5. Print column names.
 """
 
 import os
 import sys
+import threading
 from pathlib import Path
 
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import Engine, create_engine, event, inspect
 from sqlalchemy.orm import Session, sessionmaker
 
 from db.models import Base
+from tools.pali_sort_key import pali_collation
 from tools.printer import printer as pr
 
 
+@event.listens_for(Engine, "connect")
+def _register_collations(dbapi_connection, connection_record) -> None:
+    """ORDER BY lemma_1 COLLATE pali, on every engine's connections."""
+    if hasattr(dbapi_connection, "create_collation"):
+        dbapi_connection.create_collation("pali", pali_collation)
+
+
 def create_db_if_not_exists(db_path: Path):
     """Create the db if it does not exist already."""
     engine = create_engine(f"sqlite+pysqlite:///{db_path}", echo=False)
@@ -30,7 +41,12 @@ def get_db_session(db_path: Path) -> Session:
         sys.exit(1)
 
     try:
-        db_eng = create_engine(f"sqlite+pysqlite:///{db_path}", echo=False)
+        # wait for other build stages writing to the db, rather than failing
+        db_eng = create_engine(
+            f"sqlite+pysqlite:///{db_path}",
+            echo=False,
+            connect_args={"timeout": 600},
+        )
         # db_conn = db_eng.connect()
 
         Session = sessionmaker(db_eng)
@@ -44,6 +60,79 @@ def get_db_session(db_path: Path) -> Session:
     return db_sess
 
 
+# one read-only engine and sessionmaker per db file, shared by the whole process
+_readonly_engines: dict[Path, Engine] = {}
+_readonly_sessionmakers: dict[Path, sessionmaker] = {}
+_readonly_lock = threading.Lock()
+
+READONLY_PRAGMAS: dict[str, str | int] = {
+    "query_only": "ON",
+    "mmap_size": 268_435_456,  # 256 MB
+    "cache_size": -65_536,  # 64 MB, negative values are in KiB
+    "temp_store": "MEMORY",
+}
+
+
+def _set_readonly_pragmas(dbapi_connection, connection_record) -> None:
+    """Run once for each new pooled connection, not once per request."""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in READONLY_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+
+def get_db_engine_readonly(
+    db_path: Path, pool_size: int = 8, max_overflow: int = 8
+) -> Engine:
+    """Get a process-wide, read-only, pooled engine.
+    The engine is created on first use and reused by every later call,
+    so connections and their pragmas are set up once and then recycled.
+    Used by the webapp, GoldenDict /gd and MCP servers."""
+
+    db_path = Path(db_path).resolve()
+    engine = _readonly_engines.get(db_path)
+    if engine is not None:
+        return engine
+
+    with _readonly_lock:
+        engine = _readonly_engines.get(db_path)
+        if engine is None:
+            if not os.path.isfile(db_path):
+                pr.red(f"Database file doesn't exist: {db_path}")
+                sys.exit(1)
+
+            engine = create_engine(
+                f"sqlite+pysqlite:///{db_path}",
+                echo=False,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_pre_ping=False,
+                connect_args={"check_same_thread": False},
+            )
+            event.listen(engine, "connect", _set_readonly_pragmas)
+            _readonly_engines[db_path] = engine
+
+    return engine
+
+
+def get_db_session_readonly(db_path: Path) -> Session:
+    """Get a read-only session from the shared engine's connection pool.
+    Close the session (or use it as a context manager) to return
+    its connection to the pool."""
+
+    db_path = Path(db_path).resolve()
+    Session = _readonly_sessionmakers.get(db_path)
+    if Session is None:
+        engine = get_db_engine_readonly(db_path)
+        with _readonly_lock:
+            Session = _readonly_sessionmakers.setdefault(
+                db_path,
+                sessionmaker(bind=engine, autoflush=False, expire_on_commit=False),
+            )
+
+    return Session()
+
+
 def print_column_names(tables_name):
     """Print a numbered list of all the column names in a given table."""
 
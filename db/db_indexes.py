@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+"""Create the indexes declared in db/models.py which an existing dpd.db
+doesn't have yet. New dbs get them from Base.metadata.create_all.
+The query planner's statistics are updated at the end of the build
+by db/db_analyze.py."""
+
+from db.db_helpers import get_db_session
+from db.models import Base
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def create_indexes(db_session) -> int:
+    """Create every declared index which doesn't exist.
+    Return the number of indexes checked."""
+
+    bind = db_session.get_bind()
+    count = 0
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+            count += 1
+    return count
+
+
+def main():
+    pr.tic()
+    pr.title("adding db indexes")
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+
+    pr.green("adding indexes")
+    pr.yes(create_indexes(db_session))
+
+    db_session.close()
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
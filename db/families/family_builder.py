@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+
+"""Build all the families in one pass: root, word, compound, set and idiom
+families, root info and root matrix.
+
+The headwords are read once into a light snapshot, sorted once,
+and shared by the family functions of family_root.py, family_word.py,
+family_compound.py, family_set.py and family_idiom.py.
+Every family table is written in one transaction.
+
+Usage:
+uv run python db/families/family_builder.py
+"""
+
+import json
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+import family_compound
+import family_idiom
+import family_root
+import family_set
+import family_word
+from root_info import generate_root_info_html
+from root_matrix import generate_root_matrix
+
+from db.db_helpers import get_db_session
+from db.models import (
+    DbInfo,
+    DpdHeadword,
+    DpdRoot,
+    FamilyCompound,
+    FamilyIdiom,
+    FamilyRoot,
+    FamilySet,
+    FamilyWord,
+)
+from scripts.build.anki_updater import family_updater
+from tools.configger import config_test
+from tools.pali_sort_key import pali_sort_key
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+SNAPSHOT_COLUMNS = [
+    "id",
+    "lemma_1",
+    "pos",
+    "grammar",
+    "meaning_1",
+    "meaning_lit",
+    "meaning_2",
+    "source_1",
+    "construction",
+    "root_key",
+    "root_base",
+    "family_root",
+    "family_word",
+    "family_compound",
+    "family_idioms",
+    "family_set",
+]
+
+
+class HeadwordSnapshot:
+    """The DpdHeadword columns the families are made from,
+    with the same properties, but without the ORM."""
+
+    __slots__ = SNAPSHOT_COLUMNS + ["rt"]
+
+    lemma_clean = DpdHeadword.__dict__["lemma_clean"]
+    family_compound_list = DpdHeadword.__dict__["family_compound_list"]
+    family_idioms_list = DpdHeadword.__dict__["family_idioms_list"]
+    family_set_list = DpdHeadword.__dict__["family_set_list"]
+    root_family_key = DpdHeadword.__dict__["root_family_key"]
+
+    def __init__(self, row, rt: DpdRoot | None) -> None:
+        for column, value in zip(SNAPSHOT_COLUMNS, row):
+            setattr(self, column, value)
+        self.rt = rt
+
+
+def main():
+    pr.tic()
+    pr.title("family builder")
+
+    if not (
+        config_test("exporter", "make_dpd", "yes")
+        or config_test("regenerate", "db_rebuild", "yes")
+        or config_test("exporter", "make_tpr", "yes")
+        or config_test("exporter", "make_ebook", "yes")
+    ):
+        pr.green("disabled in config.ini")
+        pr.toc()
+        return
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+
+    roots_db = db_session.query(DpdRoot).all()
+    roots_db = sorted(roots_db, key=lambda x: pali_sort_key(x.root))
+
+    headwords = load_headword_snapshot(db_session, roots_db)
+    sync_idiom_numbers(db_session, headwords)
+    snapshot = sorted(headwords, key=lambda x: pali_sort_key(x.lemma_1))
+
+    rf_db, wf_db, cf_db, sets_db, idioms_db = split_families(snapshot)
+
+    rf_dict, bases_dict = family_root.make_roots_family_dict_and_bases_dict(rf_db)
+    rf_dict = family_root.compile_rf_html(rf_db, rf_dict)
+
+    wf_dict = family_word.make_word_fam_dict(wf_db)
+    wf_dict = family_word.compile_wf_html(wf_db, wf_dict)
+
+    cf_dict = family_compound.create_comp_fam_dict(cf_db)
+    cf_dict = family_compound.compile_cf_html(cf_db, cf_dict)
+
+    sets_dict = family_set.make_sets_dict(sets_db)
+    sets_dict = family_set.compile_sf_html(sets_db, sets_dict)
+
+    idioms_dict = family_idiom.create_idioms_dict(idioms_db)
+    idioms_dict = family_idiom.compile_idioms_html(idioms_db, idioms_dict)
+
+    generate_root_info_html(db_session, roots_db, bases_dict)
+    html_dict = generate_root_matrix(db_session, headwords, roots_db)
+
+    write_families(db_session, rf_dict, wf_dict, cf_dict, sets_dict, idioms_dict)
+    write_db_info(db_session, cf_dict, idioms_dict)
+
+    pr.green("committing")
+    db_session.commit()
+    pr.yes("ok")
+
+    family_root.update_lookup_table(db_session)
+
+    family_word.print_errors_list(
+        [wf for wf in wf_dict if len(wf_dict[wf]["headwords"]) < 2]
+    )
+    family_set.print_errors_list(
+        [sf for sf in sets_dict if len(sets_dict[sf]["headwords"]) < 3]
+    )
+
+    if config_test("anki", "update", "yes"):
+        family_updater(family_root.make_anki_data(pth, rf_dict), ["Family Root"])
+        family_updater(
+            family_root.make_anki_matrix_data(pth, html_dict, db_session),
+            ["Root Matrix"],
+        )
+        family_updater(family_word.make_anki_data(wf_dict), ["Family Word"])
+        family_updater(family_compound.make_anki_data(cf_dict), ["Family Compound"])
+
+    db_session.close()
+    pr.toc()
+
+
+def load_headword_snapshot(
+    db_session: Session, roots_db: list[DpdRoot]
+) -> list[HeadwordSnapshot]:
+    """Every headword in db order, with its root."""
+
+    pr.green("loading headwords")
+
+    roots = {root.root: root for root in roots_db}
+    columns = [getattr(DpdHeadword, column) for column in SNAPSHOT_COLUMNS]
+    snapshot = [
+        HeadwordSnapshot(row, roots.get(row.root_key))
+        for row in db_session.query(*columns).order_by(DpdHeadword.id)
+    ]
+
+    pr.yes(len(snapshot))
+    return snapshot
+
+
+def sync_idiom_numbers(db_session: Session, snapshot: list[HeadwordSnapshot]):
+    """family_idiom.sync_idiom_numbers_with_family_compound on the snapshot,
+    updating just the changed headwords."""
+
+    pr.green("syncing idioms with family compound")
+
+    updates = []
+    for i in snapshot:
+        if family_idiom.needs_idiom_number(i):  # type:ignore
+            i.family_idioms = i.family_compound
+            updates.append({"id": i.id, "family_idioms": i.family_idioms})
+
+    if updates:
+        db_session.execute(update(DpdHeadword), updates)
+    pr.yes(len(updates))
+
+
+def split_families(snapshot: list[HeadwordSnapshot]):
+    """The headwords of each kind of family, in one scan."""
+
+    pr.green("splitting families")
+
+    rf_db, wf_db, cf_db, sets_db, idioms_db = [], [], [], [], []
+    for i in snapshot:
+        if i.family_root:
+            rf_db.append(i)
+        if i.family_word:
+            wf_db.append(i)
+        if i.family_compound:
+            cf_db.append(i)
+        if i.family_set:
+            sets_db.append(i)
+        if i.family_idioms:
+            idioms_db.append(i)
+
+    pr.yes(len(rf_db) + len(wf_db) + len(cf_db) + len(sets_db) + len(idioms_db))
+    return rf_db, wf_db, cf_db, sets_db, idioms_db
+
+
+def pack(data: list) -> str:
+    """The same json as the family tables' data_pack."""
+    return json.dumps(data, ensure_ascii=False, indent=1)
+
+
+def write_families(db_session, rf_dict, wf_dict, cf_dict, sets_dict, idioms_dict):
+    """Replace all the family tables with bulk inserts."""
+
+    pr.green("adding families to db")
+
+    tables = [
+        (
+            FamilyRoot,
+            [
+                {
+                    "root_family_key": rf,
+                    "root_key": data["root_key"],
+                    "root_family": data["root_family"],
+                    "root_meaning": data["root_meaning"],
+                    "html": data["html"],
+                    "data": pack(data["data"]),
+                    "count": len(data["headwords"]),
+                }
+                for rf, data in rf_dict.items()
+            ],
+        ),
+        (
+            FamilyWord,
+            [
+                {
+                    "word_family": wf,
+                    "html": data["html"],
+                    "data": pack(data["data"]),
+                    "count": len(data["headwords"]),
+                }
+                for wf, data in wf_dict.items()
+            ],
+        ),
+        (
+            FamilyCompound,
+            [
+                {
+                    "compound_family": cf,
+                    "html": data["html"],
+                    "data": pack(data["data"]),
+                    "count": len(data["headwords"]),
+                }
+                for cf, data in cf_dict.items()
+            ],
+        ),
+        (
+            FamilySet,
+            [
+                {
+                    "set": sf,
+                    "html": data["html"],
+                    "data": pack(data["data"]),
+                    "count": len(data["headwords"]),
+                }
+                for sf, data in sets_dict.items()
+            ],
+        ),
+        (
+            FamilyIdiom,
+            [
+                {
+                    "idiom": idiom,
+                    "html": data["html"],
+                    "data": pack(data["data"]),
+                    "count": data["count"],
+                }
+                for idiom, data in idioms_dict.items()
+                if data["data"]
+            ],
+        ),
+    ]
+
+    count = 0
+    for table, rows in tables:
+        db_session.execute(table.__table__.delete())  # type: ignore
+        if rows:
+            db_session.execute(insert(table), rows)
+        count += len(rows)
+
+    pr.yes(count)
+
+
+def write_db_info(db_session, cf_dict, idioms_dict):
+    """cf_set and idioms_set for the exporters."""
+
+    pr.green("adding DbInfo cache items")
+
+    values = {
+        "cf_set": json.dumps(list(cf_dict), ensure_ascii=False, indent=1),
+        "idioms_set": json.dumps(
+            [word for word in idioms_dict if idioms_dict[word]["count"] > 0],
+            ensure_ascii=False,
+            indent=1,
+        ),
+    }
+
+    for key, value in values.items():
+        db_info = db_session.query(DbInfo).filter_by(key=key).first()
+        if not db_info:
+            db_info = DbInfo(key=key)
+            db_session.add(db_info)
+        db_info.value = value
+
+    pr.yes(len(values))
+
+
+if __name__ == "__main__":
+    main()
@@ -93,25 +93,21 @@ def create_comp_fam_dict(dpd_db: list[DpdHeadword]):
 def compile_cf_html(dpd_db, cf_dict):
     pr.green("compiling html")
 
+    members = {cf: set(cf_dict[cf]["headwords"]) for cf in cf_dict}
+    rows: dict[str, list[str]] = {cf: [] for cf in cf_dict}
+
     for __counter__, i in enumerate(dpd_db):
         for cf in i.family_compound_list:
             if cf in cf_dict:
-                if i.lemma_1 in cf_dict[cf]["headwords"]:
-                    if not cf_dict[cf]["html"]:
-                        html_string = "<table class='family'>"
-                    else:
-                        html_string = cf_dict[cf]["html"]
-
+                if i.lemma_1 in members[cf]:
                     meaning = make_meaning_combo(i)
 
-                    html_string += "<tr>"
-                    html_string += f"<th>{superscripter_uni(i.lemma_1)}</th>"
-                    html_string += f"<td><b>{i.pos}</b></td>"
-                    html_string += f"<td>{meaning}</td>"
-                    html_string += f"<td>{degree_of_completion(i)}</td>"
-                    html_string += "</tr>"
-
-                    cf_dict[cf]["html"] = html_string
+                    rows[cf].append(
+                        f"<tr><th>{superscripter_uni(i.lemma_1)}</th>"
+                        f"<td><b>{i.pos}</b></td>"
+                        f"<td>{meaning}</td>"
+                        f"<td>{degree_of_completion(i)}</td></tr>"
+                    )
 
                     # data
                     if i.meaning_1:
@@ -133,8 +129,8 @@ def compile_cf_html(dpd_db, cf_dict):
                             (i.lemma_1, i.pos, meaning, construction)
                         ]
 
-    for i in cf_dict:
-        cf_dict[i]["html"] += "</table>"
+    for cf in cf_dict:
+        cf_dict[cf]["html"] = f"<table class='family'>{''.join(rows[cf])}</table>"
 
     pr.yes(len(cf_dict))
     return cf_dict
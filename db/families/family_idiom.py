@@ -61,15 +61,7 @@ def sync_idiom_numbers_with_family_compound(db_session):
 
     count = 0
     for i in dpd_db:
-        if (
-            i.family_compound
-            and re.findall("\\d", i.family_compound)
-            and " " not in i.family_compound
-            and "idioms" not in i.pos
-            and "sandhi" not in i.pos
-            and not re.findall("\\bcomp\\b", i.grammar)
-            and not i.family_idioms
-        ):
+        if needs_idiom_number(i):
             i.family_idioms = i.family_compound
             count += 1
 
@@ -77,6 +69,20 @@ def sync_idiom_numbers_with_family_compound(db_session):
     pr.yes(count)
 
 
+def needs_idiom_number(i: DpdHeadword) -> bool:
+    """A numbered family compound which should be copied to idioms."""
+
+    return bool(
+        i.family_compound
+        and re.findall("\\d", i.family_compound)
+        and " " not in i.family_compound
+        and "idioms" not in i.pos
+        and "sandhi" not in i.pos
+        and not re.findall("\\bcomp\\b", i.grammar)
+        and not i.family_idioms
+    )
+
+
 def create_idioms_dict(dpd_db):
     pr.green("extracting idioms and headwords")
 
@@ -104,29 +110,21 @@ def create_idioms_dict(dpd_db):
 def compile_idioms_html(dpd_db, idioms_dict):
     pr.green("compiling html")
 
+    members = {word: set(idioms_dict[word]["headwords"]) for word in idioms_dict}
+    rows: dict[str, list[str]] = {word: [] for word in idioms_dict}
+
     for i in dpd_db:
         if i.pos in ["idiom", "sandhi"]:
             for word in i.family_idioms_list:
-                if (
-                    i.meaning_1
-                    and word in idioms_dict
-                    and i.lemma_1 in idioms_dict[word]["headwords"]
-                ):
-                    if not idioms_dict[word]["html"]:
-                        html_string = "<table class='family'>"
-                    else:
-                        html_string = idioms_dict[word]["html"]
-
+                if i.meaning_1 and word in idioms_dict and i.lemma_1 in members[word]:
                     meaning = make_meaning_combo(i)
 
-                    html_string += "<tr>"
-                    html_string += f"<th>{superscripter_uni(i.lemma_1)}</th>"
-                    html_string += f"<td><b>{i.pos}</b></td>"
-                    html_string += f"<td>{meaning}</td>"
-                    html_string += f"<td>{degree_of_completion(i)}</td>"
-                    html_string += "</tr>"
-
-                    idioms_dict[word]["html"] = html_string
+                    rows[word].append(
+                        f"<tr><th>{superscripter_uni(i.lemma_1)}</th>"
+                        f"<td><b>{i.pos}</b></td>"
+                        f"<td>{meaning}</td>"
+                        f"<td>{degree_of_completion(i)}</td></tr>"
+                    )
 
                     # data
                     idioms_dict[word]["data"].append(
@@ -136,8 +134,10 @@ def compile_idioms_html(dpd_db, idioms_dict):
                     # count
                     idioms_dict[word]["count"] += 1
 
-    for i in idioms_dict:
-        idioms_dict[i]["html"] += "</table>"
+    for word in idioms_dict:
+        idioms_dict[word]["html"] = (
+            f"<table class='family'>{''.join(rows[word])}</table>"
+        )
 
     pr.yes(len(idioms_dict))
     return idioms_dict
@@ -11,20 +11,19 @@ from root_matrix import generate_root_matrix
 from root_info import generate_root_info_html
 
 from db.db_helpers import get_db_session
-from db.models import DpdRoot, DpdHeadword, FamilyRoot, Lookup
+from db.models import DpdRoot, DpdHeadword, FamilyRoot
 
 from scripts.build.anki_updater import family_updater
 
 from tools.configger import config_test
-from tools.lookup_is_another_value import is_another_value
 from tools.degree_of_completion import degree_of_completion
+from tools.lookup_column_writer import LookupColumnWriter
 from tools.meaning_construction import clean_construction
 from tools.meaning_construction import make_meaning_combo
 from tools.pali_sort_key import pali_list_sorter, pali_sort_key
 from tools.paths import ProjectPaths
 from tools.superscripter import superscripter_uni
 from tools.printer import printer as pr
-from tools.update_test_add import update_test_add
 
 
 def main():
@@ -57,6 +56,7 @@ def main():
     update_lookup_table(db_session)
     generate_root_info_html(db_session, roots_db, bases_dict)
     html_dict = generate_root_matrix(db_session)
+    db_session.commit()
     db_session.close()
 
     if config_test("anki", "update", "yes"):
@@ -113,25 +113,21 @@ def make_roots_family_dict_and_bases_dict(dpd_db):
 def compile_rf_html(dpd_db, rf_dict):
     pr.green("compiling html")
 
+    members = {family: set(rf_dict[family]["headwords"]) for family in rf_dict}
+    rows: dict[str, list[str]] = {family: [] for family in rf_dict}
+
     for __counter__, i in enumerate(dpd_db):
         family = i.root_family_key
 
-        if i.lemma_1 in rf_dict[family]["headwords"]:
-            if not rf_dict[family]["html"]:
-                html_string = "<table class='family'>"
-            else:
-                html_string = rf_dict[family]["html"]
-
+        if i.lemma_1 in members[family]:
             meaning = make_meaning_combo(i)
 
-            html_string += "<tr>"
-            html_string += f"<th>{superscripter_uni(i.lemma_1)}</th>"
-            html_string += f"<td><b>{i.pos}</b></td>"
-            html_string += f"<td>{meaning}</td>"
-            html_string += f"<td>{degree_of_completion(i)}</td>"
-            html_string += "</tr>"
-
-            rf_dict[family]["html"] = html_string
+            rows[family].append(
+                f"<tr><th>{superscripter_uni(i.lemma_1)}</th>"
+                f"<td><b>{i.pos}</b></td>"
+                f"<td>{meaning}</td>"
+                f"<td>{degree_of_completion(i)}</td></tr>"
+            )
 
             # data
             rf_dict[family]["data"].append(
@@ -150,7 +146,9 @@ def compile_rf_html(dpd_db, rf_dict):
 
     for rf in rf_dict:
         header = make_root_header(rf_dict, rf)
-        rf_dict[rf]["html"] = header + rf_dict[rf]["html"] + "</table>"
+        rf_dict[rf]["html"] = (
+            f"{header}<table class='family'>{''.join(rows[rf])}</table>"
+        )
 
     pr.yes(len(rf_dict))
 
@@ -210,32 +208,10 @@ def update_lookup_table(db_session):
         r2h_dict[r.root_family_clean].add(r.root_key)
         r2h_dict[r.root_family_clean_no_space].add(r.root_key)
 
-    lookup_table = db_session.query(Lookup).all()
-    results = update_test_add(lookup_table, r2h_dict)
-    update_set, test_set, add_set = results
-
-    # update test add
-    for i in lookup_table:
-        if i.lookup_key in update_set:
-            i.roots_pack(pali_list_sorter(r2h_dict[i.lookup_key]))
-        elif i.lookup_key in test_set:
-            if is_another_value(i, "roots"):
-                i.root = ""
-            else:
-                db_session.delete(i)
-
-    db_session.commit()
-
-    # add
-    add_to_db = []
-    for inflection, root_keys in r2h_dict.items():
-        if inflection in add_set:
-            add_me = Lookup()
-            add_me.lookup_key = inflection
-            add_me.roots_pack(pali_list_sorter(root_keys))
-            add_to_db.append(add_me)
-
-    db_session.add_all(add_to_db)
+    writer = LookupColumnWriter(db_session, "roots")
+    writer.write(
+        {key: pali_list_sorter(root_keys) for key, root_keys in r2h_dict.items()}
+    )
     db_session.commit()
 
     pr.yes(len(r2h_dict))
@@ -75,33 +75,29 @@ def make_sets_dict(sets_db):
 def compile_sf_html(sets_db, sets_dict):
     pr.green("compiling html")
 
+    members = {sf: set(sets_dict[sf]["headwords"]) for sf in sets_dict}
+    rows: dict[str, list[str]] = {sf: [] for sf in sets_dict}
+
     for __counter__, i in enumerate(sets_db):
         for sf in i.family_set_list:
             if sf in sets_dict:
-                if i.lemma_1 in sets_dict[sf]["headwords"]:
-                    if not sets_dict[sf]["html"]:
-                        html_string = "<table class='family'>"
-                    else:
-                        html_string = sets_dict[sf]["html"]
-
+                if i.lemma_1 in members[sf]:
                     meaning = make_meaning_combo(i)
 
-                    html_string += "<tr>"
-                    html_string += f"<th>{superscripter_uni(i.lemma_1)}</th>"
-                    html_string += f"<td><b>{i.pos}</b></td>"
-                    html_string += f"<td>{meaning}</td>"
-                    html_string += f"<td>{degree_of_completion(i)}</td>"
-                    html_string += "</tr>"
-
-                    sets_dict[sf]["html"] = html_string
+                    rows[sf].append(
+                        f"<tr><th>{superscripter_uni(i.lemma_1)}</th>"
+                        f"<td><b>{i.pos}</b></td>"
+                        f"<td>{meaning}</td>"
+                        f"<td>{degree_of_completion(i)}</td></tr>"
+                    )
 
                     # data
                     sets_dict[sf]["data"].append(
                         (i.lemma_1, i.pos, meaning, degree_of_completion(i, html=False))
                     )
 
-    for i in sets_dict:
-        sets_dict[i]["html"] += "</table>"
+    for sf in sets_dict:
+        sets_dict[sf]["html"] = f"<table class='family'>{''.join(rows[sf])}</table>"
 
     pr.yes(len(sets_dict))
     return sets_dict
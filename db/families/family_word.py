@@ -83,24 +83,20 @@ def make_word_fam_dict(wf_db: list[DpdHeadword]):
 def compile_wf_html(wf_db, wf_dict):
     pr.green("compiling html")
 
+    members = {wf: set(wf_dict[wf]["headwords"]) for wf in wf_dict}
+    rows: dict[str, list[str]] = {wf: [] for wf in wf_dict}
+
     for __counter__, i in enumerate(wf_db):
         wf = i.family_word
-        if i.lemma_1 in wf_dict[wf]["headwords"]:
-            if not wf_dict[wf]["html"]:
-                html_string = "<table class='family'>"
-            else:
-                html_string = wf_dict[wf]["html"]
-
+        if i.lemma_1 in members[wf]:
             meaning = make_meaning_combo(i)
 
-            html_string += "<tr>"
-            html_string += f"<th>{superscripter_uni(i.lemma_1)}</th>"
-            html_string += f"<td><b>{i.pos}</b></td>"
-            html_string += f"<td>{meaning}</td>"
-            html_string += f"<td>{degree_of_completion(i)}</td>"
-            html_string += "</tr>"
-
-            wf_dict[wf]["html"] = html_string
+            rows[wf].append(
+                f"<tr><th>{superscripter_uni(i.lemma_1)}</th>"
+                f"<td><b>{i.pos}</b></td>"
+                f"<td>{meaning}</td>"
+                f"<td>{degree_of_completion(i)}</td></tr>"
+            )
 
             # anki data
             construction = clean_construction(i.construction) if i.meaning_1 else ""
@@ -111,8 +107,8 @@ def compile_wf_html(wf_db, wf_dict):
                 (i.lemma_1, i.pos, meaning, degree_of_completion(i, html=False))
             )
 
-    for i in wf_dict:
-        wf_dict[i]["html"] += "</table>"
+    for wf in wf_dict:
+        wf_dict[wf]["html"] = f"<table class='family'>{''.join(rows[wf])}</table>"
 
     pr.yes(len(wf_dict))
     return wf_dict
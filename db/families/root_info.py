@@ -83,7 +83,6 @@ def generate_root_info_html(db_session, roots_db, bases_dict):
 
         if counter % 100 == 0:
             pr.counter(counter, len(roots_db), i.root)
-    db_session.commit()
 
 
 def root_grouper(root_group: int):
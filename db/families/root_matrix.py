@@ -6,13 +6,17 @@ from db.models import DpdHeadword, DpdRoot
 from tools.superscripter import superscripter_uni
 
 
-def generate_root_matrix(db_session):
+def generate_root_matrix(db_session, dpd_db=None, roots_db=None):
+    """Sort the words of each root by part of speech into an html table.
+    dpd_db and roots_db can be passed in if they're already loaded."""
+
     pr.green("generating root matrix")
     root_matrix = {}
     total_counter = 0
     word_counter = 0
 
-    dpd_db = db_session.query(DpdHeadword).all()
+    if dpd_db is None:
+        dpd_db = db_session.query(DpdHeadword).all()
 
     for counter, i in enumerate(dpd_db):
         headword = i.lemma_1
@@ -1485,37 +1489,30 @@ def generate_root_matrix(db_session):
     html_dict = {}
 
     for counter, (root_key, data1) in enumerate(root_matrix.items()):
-        html = "<table class='root_matrix'>"
-        total_count = 0
+        html = ["<table class='root_matrix'>"]
 
         for category, data2 in data1.items():
             cflag = True
             for pos, words in data2.items():
-                total_count += len(words)
                 if words != []:
                     if cflag:
-                        html += f"<tr><th colspan='2'>{category}</th></tr>"
-                        html += f"<tr><td><b>{pos}</b></td><td>"
+                        html.append(f"<tr><th colspan='2'>{category}</th></tr>")
                         cflag = False
 
-                    else:
-                        html += f"<tr><td><b>{pos}</b></td><td>"
-
-                    for word in words:
-                        if word != words[-1]:
-                            html += f"{superscripter_uni(word)}, "
-                        else:
-                            html += f"{superscripter_uni(word)}</td></tr>"
+                    html.append(f"<tr><td><b>{pos}</b></td><td>")
+                    html.append(", ".join(superscripter_uni(word) for word in words))
+                    html.append("</td></tr>")
 
-        html += "</table>"
+        html.append("</table>")
 
-        html_dict[root_key] = html
+        html_dict[root_key] = "".join(html)
 
     pr.yes(len(html_dict))
 
     # add back into db
     pr.green("adding to db")
-    roots_db = db_session.query(DpdRoot).all()
+    if roots_db is None:
+        roots_db = db_session.query(DpdRoot).all()
     for counter, i in enumerate(roots_db):
         try:
             i.root_matrix = html_dict[i.root]
@@ -1525,6 +1522,4 @@ def generate_root_matrix(db_session):
             pr.red(f"!!! ERROR: {i.root} does not exist, consider deleting it.")
             i.root_matrix = ""
 
-    db_session.commit()
-
     return html_dict
@@ -11,16 +11,15 @@ import csv
 
 
 from db.db_helpers import get_db_session
-from db.models import DpdHeadword, Lookup
+from db.models import DpdHeadword
 
 from tools.all_tipitaka_words import make_all_tipitaka_word_set
 from tools.deconstructed_words import make_words_in_deconstructions
 from tools.headwords_clean_set import make_clean_headwords_set
-from tools.lookup_is_another_value import is_another_value
+from tools.lookup_column_writer import LookupColumnWriter
 from tools.pali_sort_key import pali_list_sorter
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
-from tools.update_test_add import update_test_add
 
 
 class GlobalVars:
@@ -77,36 +76,12 @@ def save_i2h_for_tpr(g: GlobalVars):
 def add_i2h_to_db(g: GlobalVars):
     """Add inflections2headwords to the lookup table."""
 
-    lookup_table = g.db_session.query(Lookup).all()
-    update_set, test_set, add_set = update_test_add(lookup_table, g.i2h_dict)
-
     pr.green("updating db")
-    # update test add
-    for i in lookup_table:
-        if i.lookup_key in update_set:
-            i.headwords_pack(sorted(g.i2h_dict[i.lookup_key]))
-        elif i.lookup_key in test_set:
-            if is_another_value(i, "headwords"):
-                i.headwords = ""
-            else:
-                g.db_session.delete(i)
-
-    g.db_session.commit()
-    pr.yes(len(update_set) + len(test_set))
-
-    pr.green("adding to db")
-    add_to_db = []
-    for inflection, ids in g.i2h_dict.items():
-        if inflection in add_set:
-            add_me = Lookup()
-            add_me.lookup_key = inflection
-            add_me.headwords_pack(sorted(set(ids)))
-            add_to_db.append(add_me)
-
-    g.db_session.add_all(add_to_db)
+    writer = LookupColumnWriter(g.db_session, "headwords")
+    result = writer.write({key: sorted(set(ids)) for key, ids in g.i2h_dict.items()})
     g.db_session.commit()
     g.db_session.close()
-    pr.yes(len(add_set))
+    pr.yes(result.upserted + result.cleared)
 
 
 def main():
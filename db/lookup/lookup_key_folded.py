@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""Add and fill the indexed lookup_key_folded column in the Lookup table.
+New rows get their folded key automatically on insert,
+this migrates an existing dpd.db and backfills any missing keys.
+It runs again at the end of the build, after the lookup writers
+which insert rows outside the ORM."""
+
+from sqlalchemy import inspect, text
+
+from db.db_helpers import get_db_session
+from db.models import Lookup
+from tools.lookup_key_fold import fold_lookup_key
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def add_folded_column(db_session) -> bool:
+    """Add the column and its index if they don't exist yet.
+    Return True if the column was added."""
+
+    columns = [
+        i["name"] for i in inspect(db_session.get_bind()).get_columns("lookup")
+    ]
+    if "lookup_key_folded" in columns:
+        return False
+
+    db_session.execute(
+        text("ALTER TABLE lookup ADD COLUMN lookup_key_folded VARCHAR DEFAULT ''")
+    )
+    return True
+
+
+def fill_folded_column(db_session) -> int:
+    """Fold every lookup_key which is missing or out of date,
+    in one set-based UPDATE using a Python SQL function."""
+
+    dbapi_connection = db_session.connection().connection.driver_connection
+    dbapi_connection.create_function(
+        "fold_lookup_key", 1, fold_lookup_key, deterministic=True
+    )
+
+    result = db_session.execute(
+        text(
+            """
+            UPDATE lookup
+            SET lookup_key_folded = fold_lookup_key(lookup_key)
+            WHERE lookup_key_folded IS NULL
+            OR lookup_key_folded != fold_lookup_key(lookup_key)
+            """
+        )
+    )
+    return result.rowcount  # type: ignore
+
+
+def add_folded_index(db_session) -> None:
+    for index in Lookup.__table__.indexes:
+        index.create(db_session.get_bind(), checkfirst=True)
+
+
+def main():
+    pr.tic()
+    pr.title("adding lookup_key_folded to lookup")
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+
+    pr.green("adding column")
+    if add_folded_column(db_session):
+        pr.yes("added")
+    else:
+        pr.yes("exists")
+
+    pr.green("filling column")
+    pr.yes(fill_folded_column(db_session))
+
+    db_session.commit()
+
+    pr.green("adding index")
+    add_folded_index(db_session)
+    pr.yes("ok")
+
+    db_session.close()
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
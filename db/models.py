@@ -10,6 +10,7 @@ from sqlalchemy import and_
 from sqlalchemy import case
 from sqlalchemy import DateTime
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy import null
 from sqlalchemy.ext.hybrid import hybrid_property
 
@@ -22,8 +23,8 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from tools.link_generator import generate_link
+from tools.lookup_key_fold import fold_lookup_key
 
-from tools.pali_sort_key import pali_sort_key
 from tools.pos import CONJUGATIONS
 from tools.pos import DECLENSIONS
 from tools.pos import EXCLUDE_FROM_FREQ
@@ -142,31 +143,23 @@ class DpdRoot(Base):
 
     @property
     def root_count(self) -> int:
+        from tools.root_stats import load_root_stats
+
         db_session = object_session(self)
         if db_session is None:
             raise Exception("No db_session")
 
-        return (
-            db_session.query(DpdHeadword)
-            .filter(DpdHeadword.root_key == self.root)
-            .count()
-        )
+        return load_root_stats(db_session).root_count.get(self.root, 0)
 
     @property
     def root_family_list(self) -> list:
+        from tools.root_stats import load_root_stats
+
         db_session = object_session(self)
         if db_session is None:
             raise Exception("No db_session")
 
-        results = (
-            db_session.query(DpdHeadword)
-            .filter(DpdHeadword.root_key == self.root)
-            .group_by(DpdHeadword.family_root)
-            .all()
-        )
-        family_list = [i.family_root for i in results if i.family_root is not None]
-        family_list = sorted(family_list, key=lambda x: pali_sort_key(x))
-        return family_list
+        return list(load_root_stats(db_session).root_families.get(self.root, []))
 
     def __repr__(self) -> str:
         return f"""DpdRoot: {self.root} {self.root_group} {self.root_sign} ({self.root_meaning})"""
@@ -174,6 +167,11 @@ class DpdRoot(Base):
 
 class FamilyRoot(Base):
     __tablename__ = "family_root"
+    __table_args__ = (
+        # DpdHeadword.fr joins on root_key and root_family
+        Index("ix_family_root_root_key_root_family", "root_key", "root_family"),
+    )
+
     root_family_key: Mapped[str] = mapped_column(primary_key=True)
     root_key: Mapped[str] = mapped_column(primary_key=True)
     root_family: Mapped[str] = mapped_column(default="")
@@ -216,6 +214,11 @@ class FamilyRoot(Base):
         return f"FamilyRoot: {self.root_family_key} {self.count}"
 
 
+def _lookup_key_folded_default(context) -> str:
+    """Fill lookup_key_folded from lookup_key on every insert."""
+    return fold_lookup_key(context.get_current_parameters()["lookup_key"])
+
+
 class Lookup(Base):
     __tablename__ = "lookup"
 
@@ -235,6 +238,11 @@ class Lookup(Base):
     devanagari: Mapped[str] = mapped_column(default="")
     thai: Mapped[str] = mapped_column(default="")
 
+    # derived search key, see tools/lookup_key_fold.py
+    lookup_key_folded: Mapped[str] = mapped_column(
+        default=_lookup_key_folded_default, index=True
+    )
+
     # headwords pack unpack
 
     def headwords_pack(self, list: list[int]) -> None:
@@ -515,6 +523,13 @@ thai:          {self.thai}
 
 class DpdHeadword(Base):
     __tablename__ = "dpd_headwords"
+    __table_args__ = (
+        # root counts, root families and related headwords,
+        # see tools/query_plan_advisor.py
+        Index("ix_dpd_headwords_root_key_family_root", "root_key", "family_root"),
+        Index("ix_dpd_headwords_family_word", "family_word"),
+        Index("ix_dpd_headwords_pattern", "pattern"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     lemma_1: Mapped[str] = mapped_column(unique=True)
@@ -760,24 +775,23 @@ class DpdHeadword(Base):
 
     @property
     def root_count(self) -> int:
+        from tools.root_stats import load_root_stats
+
         db_session = object_session(self)
         if db_session is None:
             raise Exception("No db_session")
 
-        return (
-            db_session.query(DpdHeadword.id)
-            .filter(DpdHeadword.root_key == self.root_key)
-            .count()
-        )
+        return load_root_stats(db_session).root_count.get(self.root_key, 0)
 
     @property
     def pos_list(self) -> list:
+        from tools.root_stats import load_root_stats
+
         db_session = object_session(self)
         if db_session is None:
             raise Exception("No db_session")
 
-        pos_db = db_session.query(DpdHeadword.pos).group_by(DpdHeadword.pos).all()
-        return sorted([i.pos for i in pos_db])
+        return list(load_root_stats(db_session).pos_list)
 
     @property
     def antonym_list(self) -> list:
@@ -5,6 +5,7 @@ from pathlib import Path
 from icecream import ic
 
 from bs4 import BeautifulSoup
+from lxml import etree
 
 from db.variants.files_to_books import cst_files_to_books
 from db.variants.variants_modules import VariantsDict, context_cleaner, key_cleaner
@@ -46,6 +47,82 @@ def make_soup(file: Path) -> BeautifulSoup:
         return soup
 
 
+def add_note_variants(
+    preceding_text: str, variants: str, variants_dict: VariantsDict, book_name: str
+) -> None:
+    """Add the variants in a note to the last word of the text before it."""
+
+    text_str: str = preceding_text.strip()
+    if text_str:
+        # Split text into words and get last word before note
+        words: list[str] = text_str.split()
+
+        if words:
+            word = words[-1]
+            word_clean: str = key_cleaner(word)
+
+            # get context for the word
+            if len(words) > 1:
+                # use the last two words for context
+                context: str = " ".join(words[-2:]).lower()
+            else:
+                # just use the last word for context
+                context: str = word.lower()
+            context_clean = context_cleaner(context)
+
+            if debug:
+                ic(context, word_clean, variants)
+                input()
+
+            # separate on closing parenthesis followed by whitespace
+            # e.g. a (a) b (b) c (c)
+            # but not if there are no brackets at the end
+            # e.g. a (a) b
+            variants_split = re.split(
+                r"""
+                (?<=\))      # Lookbehind for closing bracket
+                ,*           # Optional comma
+                \s+          # One or more whitespace characters
+                (?=          # Lookahead for...
+                    \S+      # One or more non-whitespace characters
+                    \s*      # Optional whitespace
+                    \(       # Opening bracket
+                )
+                """,
+                variants,
+                flags=re.VERBOSE,
+            )
+
+            if debug:
+                if len(variants_split) > 1:
+                    ic(word_clean)
+                    ic(variants)
+                    ic(variants_split)
+                    print()
+
+            for variant in variants_split:
+                variant = variant.strip()
+
+                if variant == "( )":
+                    continue
+
+                # ensure outer dictionary entry exists
+                if word_clean not in variants_dict:
+                    variants_dict[word_clean] = {}
+
+                # ensure CST entry exists
+                if "CST" not in variants_dict[word_clean]:
+                    variants_dict[word_clean]["CST"] = {}
+
+                # ensure inner dictionary entry exists
+                if book_name not in variants_dict[word_clean]["CST"]:
+                    variants_dict[word_clean]["CST"][book_name] = []
+
+                variants_dict[word_clean]["CST"][book_name].append(
+                    (context_clean, variant)
+                )
+
+
 def extract_variants(
     soup: BeautifulSoup, variants_dict: VariantsDict, book_name: str
 ) -> VariantsDict:
@@ -60,77 +137,102 @@ def extract_variants(
             preceding_text = note.previous_sibling.previous_sibling  # type: ignore
 
         if preceding_text:
-            text_str: str = preceding_text.text.strip()
-            if text_str:
-                # Split text into words and get last word before note
-                words: list[str] = text_str.split()
-
-                if words:
-                    word = words[-1]
-                    word_clean: str = key_cleaner(word)
-
-                    # get context for the word
-                    if len(words) > 1:
-                        # use the last two words for context
-                        context: str = " ".join(words[-2:]).lower()
-                    else:
-                        # just use the last word for context
-                        context: str = word.lower()
-                    context_clean = context_cleaner(context)
-
-                    variants: str = note.get_text(strip=True)
-
-                    if debug:
-                        ic(context, word_clean, variants)
-                        input()
-
-                    # separate on closing parenthesis followed by whitespace
-                    # e.g. a (a) b (b) c (c)
-                    # but not if there are no brackets at the end
-                    # e.g. a (a) b
-                    variants_split = re.split(
-                        r"""
-                        (?<=\))      # Lookbehind for closing bracket
-                        ,*           # Optional comma
-                        \s+          # One or more whitespace characters
-                        (?=          # Lookahead for...
-                            \S+      # One or more non-whitespace characters
-                            \s*      # Optional whitespace
-                            \(       # Opening bracket
-                        )
-                        """,
-                        variants,
-                        flags=re.VERBOSE,
-                    )
-
-                    if debug:
-                        if len(variants_split) > 1:
-                            ic(word_clean)
-                            ic(variants)
-                            ic(variants_split)
-                            print()
-
-                    for variant in variants_split:
-                        variant = variant.strip()
-
-                        if variant == "( )":
-                            continue
-
-                        # ensure outer dictionary entry exists
-                        if word_clean not in variants_dict:
-                            variants_dict[word_clean] = {}
-
-                        # ensure CST entry exists
-                        if "CST" not in variants_dict[word_clean]:
-                            variants_dict[word_clean]["CST"] = {}
-
-                        # ensure inner dictionary entry exists
-                        if book_name not in variants_dict[word_clean]["CST"]:
-                            variants_dict[word_clean]["CST"][book_name] = []
-
-                        variants_dict[word_clean]["CST"][book_name].append(
-                            (context_clean, variant)
-                        )
+            add_note_variants(
+                preceding_text.text,
+                note.get_text(strip=True),
+                variants_dict,
+                book_name,
+            )
+
+    return variants_dict
+
+
+def soup_siblings(parent: etree._Element) -> list[etree._Element | str]:
+    """The children of an lxml element as they are in make_soup's soup:
+    pb tags removed, hi paranum and dot tags unwrapped,
+    and every text a separate string."""
+
+    siblings: list[etree._Element | str] = []
+    if parent.text:
+        siblings.append(parent.text)
+    for child in parent:
+        if child.tag == "pb":
+            pass
+        elif child.tag == "hi" and child.get("rend") in ["paranum", "dot"]:
+            siblings.extend(soup_siblings(child))
+        else:
+            siblings.append(child)
+        if child.tail:
+            siblings.append(child.tail)
+    return siblings
+
+
+def soup_text(node: etree._Element | str) -> str:
+    if isinstance(node, str):
+        return node
+    return "".join(node.itertext())
+
+
+def extract_variants_streaming(
+    file: Path, variants_dict: VariantsDict, book_name: str
+) -> VariantsDict:
+    """Extract variants from a CST file with lxml iterparse,
+    with the same results as make_soup and extract_variants.
+
+    The notes of each paragraph are found when it ends, with one list of
+    its siblings. Then the paragraphs before the last two are deleted,
+    as only the last two can be the text before a later note,
+    so the tree never holds the whole file."""
+
+    notes: list[tuple[int, str, str]] = []
+    note_starts: dict[etree._Element, int] = {}
+    note_counter = 0
+    # the notes of each parent in the soup, waiting for it to end
+    pending: dict[etree._Element, list[tuple[int, etree._Element, str]]] = {}
+
+    for event, element in etree.iterparse(str(file), events=("start", "end")):
+        if event == "start":
+            if element.tag == "note":
+                # notes are added in document order, even when nested
+                note_starts[element] = note_counter
+                note_counter += 1
+            continue
+
+        if element.tag == "note":
+            parent = element.getparent()
+            while parent.tag == "hi" and parent.get("rend") in ["paranum", "dot"]:
+                parent = parent.getparent()
+            variants = "".join(
+                text.strip() for text in element.itertext() if text.strip()
+            )
+            pending.setdefault(parent, []).append(
+                (note_starts.pop(element), element, variants)
+            )
+
+        if element in pending:
+            siblings = soup_siblings(element)
+            positions = {
+                id(node): n
+                for n, node in enumerate(siblings)
+                if not isinstance(node, str)
+            }
+            for start, note, variants in pending.pop(element):
+                index = positions[id(note)]
+                preceding_text = siblings[index - 1] if index > 0 else None
+                if preceding_text is not None and not soup_text(preceding_text).strip():
+                    preceding_text = siblings[index - 2] if index > 1 else None
+                if preceding_text is not None:
+                    notes.append((start, soup_text(preceding_text), variants))
+
+        parent = element.getparent()
+        if parent is not None and parent.tag in ["body", "div"]:
+            while (
+                previous := element.getprevious()
+            ) is not None and previous.getprevious() is not None:
+                del parent[0]
+
+    for __start__, preceding_text, variants in sorted(notes):
+        add_note_variants(preceding_text, variants, variants_dict, book_name)
 
     return variants_dict
 
@@ -0,0 +1,218 @@
+"""Extract variant readings from all Pāḷi texts in a process pool.
+
+Every file is extracted on its own into a partial VariantsDict,
+with the same functions as process_cst, process_bjt, process_sya and process_sc,
+and the partials are merged in the same file order, so the result is identical.
+CST files are streamed with lxml iterparse instead of a BeautifulSoup tree.
+
+Each file's partial is cached in temp/variants_cache by the hash of
+its contents and of the extraction code, so unchanged files are not extracted again.
+"""
+
+import hashlib
+import pickle
+from multiprocessing import Pool
+from pathlib import Path
+from typing import NamedTuple
+
+from db.variants import (
+    extract_variants_from_bjt,
+    extract_variants_from_cst,
+    extract_variants_from_sc,
+    extract_variants_from_sya,
+    variants_modules,
+)
+from db.variants.extract_variants_from_bjt import (
+    extract_bjt_variants,
+    get_bjt_file_list,
+)
+from db.variants.extract_variants_from_cst import (
+    extract_variants_streaming,
+    get_cst_file_list,
+)
+from db.variants.extract_variants_from_sc import (
+    extract_sc_variants,
+    get_book_name,
+    get_json_data,
+    get_sc_file_list,
+)
+from db.variants.extract_variants_from_sya import (
+    extract_sya_variants,
+    get_sya_file_list,
+    get_sya_text,
+)
+from db.variants.files_to_books import (
+    bjt_files_to_books,
+    cst_files_to_books,
+    sya_files_to_books,
+)
+from db.variants.variants_modules import VariantsDict
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+EXTRACTORS = {
+    "cst": extract_variants_from_cst,
+    "bjt": extract_variants_from_bjt,
+    "sya": extract_variants_from_sya,
+    "sc": extract_variants_from_sc,
+}
+
+
+class VariantsJob(NamedTuple):
+    corpus: str
+    file_path: Path
+    book: str
+    code_hash: str
+    cache_dir: Path
+
+
+class FileVariants(NamedTuple):
+    variants_dict: VariantsDict
+    sya_errors: int
+    sya_successes: int
+    cached: bool
+
+
+def hash_code(corpus: str) -> str:
+    """Hash of the code which extracts the corpus."""
+
+    hasher = hashlib.blake2b(digest_size=16)
+    for module in [EXTRACTORS[corpus], variants_modules]:
+        hasher.update(Path(module.__file__).read_bytes())  # type:ignore
+    hasher.update(Path(__file__).read_bytes())
+    return hasher.hexdigest()
+
+
+def list_jobs(pth: ProjectPaths, cache_dir: Path) -> list[VariantsJob]:
+    """All the files of all the corpora, in the sequential order."""
+
+    jobs: list[VariantsJob] = []
+
+    code_hash = hash_code("cst")
+    for file_path in get_cst_file_list(pth):
+        book = cst_files_to_books[file_path.name]
+        jobs.append(VariantsJob("cst", file_path, book, code_hash, cache_dir))
+
+    code_hash = hash_code("bjt")
+    for file_path in get_bjt_file_list(pth):
+        book = bjt_files_to_books[file_path.name]
+        jobs.append(VariantsJob("bjt", file_path, book, code_hash, cache_dir))
+
+    code_hash = hash_code("sya")
+    for file_path in get_sya_file_list(pth):
+        book = sya_files_to_books[file_path.name]
+        jobs.append(VariantsJob("sya", file_path, book, code_hash, cache_dir))
+
+    code_hash = hash_code("sc")
+    for file_path in get_sc_file_list(pth):
+        book = get_book_name(file_path)
+        jobs.append(VariantsJob("sc", file_path, book, code_hash, cache_dir))  # type:ignore
+
+    return jobs
+
+
+def extract_file(job: VariantsJob) -> FileVariants:
+    """Extract the variants of one file into a partial VariantsDict."""
+
+    match job.corpus:
+        case "cst":
+            variants_dict = extract_variants_streaming(job.file_path, {}, job.book)
+            return FileVariants(variants_dict, 0, 0, False)
+
+        case "bjt":
+            variants_dict, __errors__ = extract_bjt_variants(job.file_path, {}, [])
+            return FileVariants(variants_dict, 0, 0, False)
+
+        case "sya":
+            # the counters are module globals, so count just this file
+            extract_variants_from_sya.errors = 0
+            extract_variants_from_sya.successes = 0
+            text = get_sya_text(job.file_path)
+            variants_dict = extract_sya_variants(job.book, text, {})
+            return FileVariants(
+                variants_dict,
+                extract_variants_from_sya.errors,
+                extract_variants_from_sya.successes,
+                False,
+            )
+
+        case "sc":
+            json_data = get_json_data(job.file_path)
+            variants_dict = extract_sc_variants(json_data, {}, job.book)
+            return FileVariants(variants_dict, 0, 0, False)
+
+        case _:
+            raise ValueError(f"unknown corpus {job.corpus}")
+
+
+def extract_file_cached(job: VariantsJob) -> FileVariants:
+    """extract_file, unless the file and the code haven't changed since last time."""
+
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(job.code_hash.encode())
+    hasher.update(str(job.book).encode())
+    with open(job.file_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    content_hash = hasher.hexdigest()
+
+    path_hash = hashlib.blake2b(str(job.file_path).encode(), digest_size=16)
+    cache_path = job.cache_dir / job.corpus / f"{path_hash.hexdigest()}.pickle"
+
+    if cache_path.exists():
+        with open(cache_path, "rb") as f:
+            cached_hash, file_variants = pickle.load(f)
+        if cached_hash == content_hash:
+            return file_variants._replace(cached=True)
+
+    file_variants = extract_file(job)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, "wb") as f:
+        pickle.dump((content_hash, file_variants), f)
+    return file_variants
+
+
+def merge_variants(variants_dict: VariantsDict, partial: VariantsDict) -> None:
+    """Add a partial VariantsDict in the order the sequential extraction would."""
+
+    for word_clean, corpora in partial.items():
+        word_dict = variants_dict.setdefault(word_clean, {})
+        for corpus, books in corpora.items():
+            corpus_dict = word_dict.setdefault(corpus, {})
+            for book, variants in books.items():
+                corpus_dict.setdefault(book, []).extend(variants)
+
+
+def process_all_parallel(
+    pth: ProjectPaths, processes: int | None = None, use_cache: bool = True
+) -> VariantsDict:
+    pr.green_title("extracting variants from all texts in parallel")
+
+    cache_dir = pth.temp_dir / "variants_cache"
+    jobs = list_jobs(pth, cache_dir)
+    extractor = extract_file_cached if use_cache else extract_file
+
+    variants_dict: VariantsDict = {}
+    sya_errors = 0
+    sya_successes = 0
+    cached = 0
+
+    with Pool(processes) as pool:
+        # imap keeps the file order, so the merge is deterministic
+        for counter, (job, file_variants) in enumerate(
+            zip(jobs, pool.imap(extractor, jobs, chunksize=4))
+        ):
+            if counter % 100 == 0:
+                pr.counter(counter, len(jobs), job.file_path.name)
+            merge_variants(variants_dict, file_variants.variants_dict)
+            sya_errors += file_variants.sya_errors
+            sya_successes += file_variants.sya_successes
+            cached += file_variants.cached
+
+    if sya_successes:
+        error_rate = (sya_errors / sya_successes) * 100
+        pr.red(f"extracted:  {sya_successes - sya_errors} / {sya_successes}")
+        pr.red(f"error rate: {error_rate:.2}%")
+    pr.green_title(f"{len(jobs) - cached} files extracted, {cached} unchanged")
+
+    return variants_dict
@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
 
-"""Extract variants readings from all Pāḷi texts."""
+"""Extract variants readings from all Pāḷi texts.
+
+Usage:
+uv run python db/variants/main.py [--parallel]
+
+--parallel extracts the files in a process pool and
+only re-extracts files which have changed since the last run.
+"""
+
+import sys
 
 from db.variants.extract_variants_from_bjt import process_bjt
 from db.variants.extract_variants_from_cst import process_cst
+from db.variants.extract_variants_parallel import process_all_parallel
 from db.variants.extract_variants_from_sc import process_sc
 from db.variants.extract_variants_from_sya import process_sya
 from db.variants.add_to_db import AddVariantsToDb
@@ -25,10 +35,13 @@ def main():
     variants_dict: VariantsDict = {}
     pth: ProjectPaths = ProjectPaths()
 
-    variants_dict = process_cst(variants_dict, pth)
-    variants_dict = process_bjt(variants_dict, pth)
-    variants_dict = process_sya(variants_dict, pth)
-    variants_dict = process_sc(variants_dict, pth)
+    if "--parallel" in sys.argv:
+        variants_dict = process_all_parallel(pth)
+    else:
+        variants_dict = process_cst(variants_dict, pth)
+        variants_dict = process_bjt(variants_dict, pth)
+        variants_dict = process_sya(variants_dict, pth)
+        variants_dict = process_sc(variants_dict, pth)
 
     save_json(variants_dict)
 
@@ -0,0 +1,134 @@
+"""Run db_tests against the whole db at once, rather than row by row.
+
+Each InternalTestRow is compiled once:
+- equals, does not equal, is empty and is not empty criteria
+  become an SQL WHERE clause,
+- contains and does not contain criteria become compiled regexes,
+  which are run column-wise over the rows the WHERE clause returns.
+
+The results are the same as DbTestManager.error_test_each_single_row.
+"""
+
+import re
+import warnings
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import ColumnElement, Select, select
+from sqlalchemy.orm import Session
+
+from db.models import DpdHeadword
+from db_tests.db_tests_manager import InternalTestRow, TestFailure
+
+
+class RegexCriterion:
+    def __init__(self, column: str, pattern: re.Pattern, negate: bool) -> None:
+        self.column = column
+        self.pattern = pattern
+        self.negate = negate
+
+
+class CompiledTest:
+    def __init__(self, test: InternalTestRow, test_row: int) -> None:
+        self.test = test
+        self.test_row = test_row
+        self.sql_criteria: list[ColumnElement[bool]] = []
+        self.regex_criteria: list[RegexCriterion] = []
+
+        for column_name, logic, string in [
+            (test.search_column_1, test.search_sign_1, test.search_string_1),
+            (test.search_column_2, test.search_sign_2, test.search_string_2),
+            (test.search_column_3, test.search_sign_3, test.search_string_3),
+            (test.search_column_4, test.search_sign_4, test.search_string_4),
+            (test.search_column_5, test.search_sign_5, test.search_string_5),
+            (test.search_column_6, test.search_sign_6, test.search_string_6),
+        ]:
+            if not logic:
+                continue
+            column = getattr(DpdHeadword, column_name)
+
+            # IS NOT, because in Python None != "x" is True
+            if logic == "equals":
+                self.sql_criteria.append(column == string)
+            elif logic == "does not equal":
+                self.sql_criteria.append(column.is_not(string))
+            elif logic == "is empty":
+                self.sql_criteria.append(column == "")
+            elif logic == "is not empty":
+                self.sql_criteria.append(column.is_not(""))
+
+            elif logic == "contains":
+                self.add_regex(column_name, string, False)
+            elif logic == "does not contain":
+                self.add_regex(column_name, string, True)
+            elif logic == "contains word":
+                self.add_regex(column_name, rf"\b{string}\b", False)
+            elif logic == "does not contain word":
+                self.add_regex(column_name, rf"\b{string}\b", True)
+
+        if test.exceptions:
+            self.sql_criteria.append(DpdHeadword.id.not_in(test.exceptions))
+
+        self.regex_columns = sorted({i.column for i in self.regex_criteria})
+        self.statement: Select = select(
+            DpdHeadword.id,
+            *[getattr(DpdHeadword, i) for i in self.regex_columns],
+        ).where(*self.sql_criteria)
+
+    def add_regex(self, column: str, pattern: str, negate: bool) -> None:
+        self.regex_criteria.append(RegexCriterion(column, re.compile(pattern), negate))
+
+    def failing_ids(self, db_session: Session) -> list[int]:
+        """Return the ids of all the headwords which fail this test."""
+
+        df = pd.read_sql_query(self.statement, db_session.connection())
+        if df.empty:
+            return []
+
+        failing = pd.Series(True, index=df.index)
+        for criterion in self.regex_criteria:
+            column = df[criterion.column].fillna("").astype(str)
+            with warnings.catch_warnings():
+                # patterns with groups are only used to test for a match
+                warnings.simplefilter("ignore", UserWarning)
+                found = column.str.contains(criterion.pattern.pattern, regex=True)
+            failing &= ~found if criterion.negate else found
+
+        return df.loc[failing, "id"].tolist()
+
+    def test_failure(self) -> TestFailure:
+        return TestFailure(
+            test_row=self.test_row,
+            test_name=self.test.test_name,
+            error_column=self.test.error_column,
+        )
+
+
+def compile_tests(
+    tests: list[InternalTestRow], skip_rows: Optional[set[int]] = None
+) -> list[CompiledTest]:
+    """Compile the tests, except those in skip_rows."""
+
+    return [
+        CompiledTest(test, test_row)
+        for test_row, test in enumerate(
+            tests,
+            start=2,  # 1 for zero offset and 1 for title
+        )
+        if not skip_rows or test_row not in skip_rows
+    ]
+
+
+def run_compiled_tests(
+    db_session: Session, compiled_tests: list[CompiledTest]
+) -> dict[int, list[TestFailure]]:
+    """Run all the tests on all the headwords.
+    Returns a dict of headword id and its list of failures,
+    the same as DbTestManager.run_all_tests_on_headword for each headword."""
+
+    failures: dict[int, list[TestFailure]] = {}
+    for compiled_test in compiled_tests:
+        test_failure = compiled_test.test_failure()
+        for headword_id in compiled_test.failing_ids(db_session):
+            failures.setdefault(headword_id, []).append(test_failure)
+    return failures
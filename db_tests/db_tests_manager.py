@@ -8,6 +8,7 @@ from typing import NamedTuple
 from pathlib import Path
 
 from rich import print
+from sqlalchemy.orm import Session, object_session
 
 from db.db_helpers import get_db_session
 from db.models import DpdHeadword
@@ -303,11 +304,36 @@ class DbTestManager:
         Runs a single test definition against all DpdHeadword entries in the database.
         Returns a list of DpdHeadword objects that failed the test.
         """
-        failing_headwords: list[DpdHeadword] = []
-        for headword in db:
-            if self.error_test_each_single_row(test_definition, headword):
-                failing_headwords.append(headword)
-        return failing_headwords
+        # imported here, db_tests_compiled imports this module
+        from db_tests.db_tests_compiled import CompiledTest
+
+        db_session = object_session(db[0]) if db else None
+        if db_session is None:
+            return [
+                headword
+                for headword in db
+                if self.error_test_each_single_row(test_definition, headword)
+            ]
+
+        failing_ids = set(CompiledTest(test_definition, 0).failing_ids(db_session))
+        return [headword for headword in db if headword.id in failing_ids]
+
+    def run_all_tests_on_all_db_entries(
+        self, db_session: Session
+    ) -> dict[int, list[TestFailure]]:
+        """
+        Run all the tests on all the headwords in the database.
+
+        Returns a dict of headword id and its list of failures.
+
+        Tests which fail the integrity check are left out,
+        they are in self.integrity_failures.
+        """
+        from db_tests.db_tests_compiled import compile_tests, run_compiled_tests
+
+        invalid_rows = {failure.test_row for failure in self.integrity_failures}
+        compiled_tests = compile_tests(self.internal_tests_list, invalid_rows)
+        return run_compiled_tests(db_session, compiled_tests)
 
     def save_tests(self) -> None:
         """Saves the current state of internal_tests_list back to the TSV file."""
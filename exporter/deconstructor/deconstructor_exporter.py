@@ -2,7 +2,6 @@
 
 """Export Deconstructor To GoldenDict and MDict formats."""
 
-from mako.template import Template
 from minify_html import minify
 
 from db.db_helpers import get_db_session
@@ -21,6 +20,7 @@ from tools.niggahitas import add_niggahitas
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
 from tools.sandhi_contraction import SandhiContractionDict, SandhiContractionFinder
+from tools.template_registry import mako_template
 from tools.utils import squash_whitespaces
 
 
@@ -57,7 +57,7 @@ def make_deconstructor_dict_data(g: ProgData) -> None:
 
     dict_data: list = []
 
-    header_templ = Template(filename=str(g.pth.deconstructor_header_templ_path))
+    header_templ = mako_template(g.pth.deconstructor_header_templ_path)
     deconstructor_header = str(header_templ.render(css="", js=""))
 
     # add css variables and roots
@@ -66,7 +66,7 @@ def make_deconstructor_dict_data(g: ProgData) -> None:
         deconstructor_header, "deconstructor"
     )
 
-    deconstructor_templ = Template(filename=str(g.pth.deconstructor_templ_path))
+    deconstructor_templ = mako_template(g.pth.deconstructor_templ_path)
 
     pr.yes(len(deconstructor_db))
 
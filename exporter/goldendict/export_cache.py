@@ -0,0 +1,125 @@
+"""On-disk cache of rendered DictEntry, so an incremental export only
+re-renders the entries whose data has changed since the last run.
+
+Each entry is stored with a hash of the plain db rows it was rendered from.
+The whole cache is thrown away when its fingerprint changes,
+i.e. the templates, the css, the render code or the shared render data.
+
+Usage:
+export_cache = ExportCache(pth.dpd_export_cache_path, fingerprint)
+hit = export_cache.get(key, row_hash)
+export_cache.put(key, row_hash, entry, sizes)
+export_cache.save()
+"""
+
+import hashlib
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from tools.date_and_time import year_month_day_dash
+from tools.goldendict_exporter import DictEntry
+from tools.printer import printer as pr
+from tools.utils import RenderedSizes, default_rendered_sizes
+
+# (row_hash, date, word, definition_html, synonyms, sizes)
+CacheItem = Tuple[str, str, str, str, list[str], Tuple[int, ...]]
+
+
+def make_hash(value: Any) -> str:
+    """Hash of any value with a stable repr, e.g. tuples made by to_row."""
+
+    return hashlib.blake2b(repr(value).encode(), digest_size=16).hexdigest()
+
+
+def make_fingerprint(file_paths: Iterable[Path], *values: Any) -> str:
+    """Hash of the modification times of file_paths, and of values."""
+
+    mtimes = [(str(path), path.stat().st_mtime_ns) for path in sorted(file_paths)]
+    return make_hash((mtimes, values))
+
+
+def restamp_date(html: str, old_date: str, new_date: str) -> str:
+    """The date is rendered into the feedback links and the header,
+    update it in html which was rendered on an earlier day."""
+
+    if old_date == new_date:
+        return html
+    html = html.replace(f"GoldenDict+{old_date}", f"GoldenDict+{new_date}")
+    html = html.replace(f'"date": "{old_date}"', f'"date": "{new_date}"')
+    return html
+
+
+class ExportCache:
+    def __init__(self, cache_path: Path, fingerprint: str) -> None:
+        self.cache_path = cache_path
+        self.fingerprint = fingerprint
+        self.date = year_month_day_dash()
+        self.hits = 0
+        self.misses = 0
+        self._old_items: Dict[Any, CacheItem] = {}
+        self._new_items: Dict[Any, CacheItem] = {}
+        self._load()
+
+    def _load(self) -> None:
+        pr.green("loading export cache")
+
+        if not self.cache_path.exists():
+            pr.yes("none")
+            return
+
+        with open(self.cache_path, "rb") as f:
+            fingerprint, items = pickle.load(f)
+
+        if fingerprint != self.fingerprint:
+            pr.yes("changed")
+            return
+
+        self._old_items = items
+        pr.yes(len(self._old_items))
+
+    def get(
+        self, key: Any, row_hash: str
+    ) -> Optional[Tuple[DictEntry, RenderedSizes]]:
+        """Return the cached entry and sizes if its rows are unchanged."""
+
+        item = self._old_items.get(key)
+        if item is None or item[0] != row_hash:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._new_items[key] = item
+        __row_hash__, date, word, definition_html, synonyms, sizes = item
+
+        entry = DictEntry(
+            word=word,
+            definition_html=restamp_date(definition_html, date, self.date),
+            definition_plain="",
+            synonyms=list(synonyms),
+        )
+        size_dict = default_rendered_sizes()
+        for size_key, size in zip(size_dict.keys(), sizes):
+            size_dict[size_key] = size  # type:ignore
+        return entry, size_dict
+
+    def put(
+        self, key: Any, row_hash: str, entry: DictEntry, sizes: RenderedSizes
+    ) -> None:
+        self._new_items[key] = (
+            row_hash,
+            self.date,
+            entry.word,
+            entry.definition_html,
+            entry.synonyms,
+            tuple(sizes.values()),
+        )
+
+    def save(self) -> None:
+        """Write the entries used in this run, dropping deleted ones."""
+
+        pr.green("saving export cache")
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_path, "wb") as f:
+            pickle.dump((self.fingerprint, self._new_items), f)
+        pr.yes(len(self._new_items))
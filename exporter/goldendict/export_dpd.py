@@ -1,5 +1,6 @@
 """Compile HTML data for DpdHeadword."""
 
+import importlib
 import psutil
 
 from sqlalchemy.sql import func
@@ -8,13 +9,17 @@ from sqlalchemy.sql import func
 # from css_html_js_minify import css_minify, js_minify
 from mako.template import Template
 from minify_html import minify
-from multiprocessing.managers import ListProxy
-from multiprocessing import Process, Manager
-from typing import List, Set, TypedDict, Tuple
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, TypedDict, Tuple
 
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.session import Session
 
+from exporter.goldendict.export_cache import ExportCache
+from exporter.goldendict.export_cache import make_fingerprint, make_hash
 from exporter.goldendict.helpers import TODAY
+from exporter.goldendict.render_pool import RenderContext, RenderPool
+from exporter.goldendict.render_pool import from_row, get_render_context, to_row
 
 from db.models import DpdHeadword
 from db.models import DpdRoot
@@ -25,16 +30,15 @@ from db.models import FamilySet
 from db.models import FamilyWord
 
 
-from tools.configger import config_test
-from tools.css_manager import CSSManager
 from tools.date_and_time import year_month_day_dash
 from tools.degree_of_completion import degree_of_completion
 from tools.exporter_functions import (
-    get_family_compounds,
-    get_family_idioms,
-    get_family_set,
+    get_family_compounds_bulk,
+    get_family_idioms_bulk,
+    get_family_set_bulk,
 )
-from tools.goldendict_exporter import DictEntry
+from tools.goldendict_exporter import DictEntry, DictEntrySpool
+from tools.headword_iterator import keyset_chunks
 from tools.meaning_construction import make_meaning_combo_html, make_grammar_line
 from tools.meaning_construction import summarize_construction
 from tools.niggahitas import add_niggahitas
@@ -43,36 +47,60 @@ from tools.pos import CONJUGATIONS, DECLENSIONS, INDECLINABLES
 from tools.printer import printer as pr
 from tools.sandhi_contraction import SandhiContractionDict
 from tools.superscripter import superscripter_uni
-from tools.utils import RenderedSizes, default_rendered_sizes, list_into_batches
+from tools.template_registry import mako_template
+from tools.utils import RenderedSizes, default_rendered_sizes
 from tools.utils import sum_rendered_sizes, squash_whitespaces
 
 
+# modules whose code changes the rendered html, apart from this one
+RENDER_MODULES = [
+    "db.models",
+    "exporter.goldendict.render_pool",
+    "tools.css_manager",
+    "tools.degree_of_completion",
+    "tools.exporter_functions",
+    "tools.meaning_construction",
+    "tools.niggahitas",
+    "tools.pali_sort_key",
+    "tools.pos",
+    "tools.root_stats",
+    "tools.superscripter",
+    "tools.utils",
+]
+
+
 class DpdHeadwordTemplates:
     def __init__(self, paths: ProjectPaths):
         self.paths = paths
-        self.header_templ = Template(filename=str(paths.dpd_header_templ_path))
-        self.dpd_definition_templ = Template(
-            filename=str(paths.dpd_definition_templ_path)
-        )
-        self.button_box_templ = Template(filename=str(paths.button_box_templ_path))
-        self.grammar_templ = Template(filename=str(paths.grammar_templ_path))
-        self.example_templ = Template(filename=str(paths.example_templ_path))
-        self.inflection_templ = Template(filename=str(paths.inflection_templ_path))
-        self.family_root_templ = Template(filename=str(paths.family_root_templ_path))
-        self.family_word_templ = Template(filename=str(paths.family_word_templ_path))
-        self.family_compound_templ = Template(
-            filename=str(paths.family_compound_templ_path)
-        )
-        self.family_idiom_templ = Template(filename=str(paths.family_idiom_templ_path))
-        self.family_set_templ = Template(filename=str(paths.family_set_templ_path))
-        self.frequency_templ = Template(filename=str(paths.frequency_templ_path))
-        self.feedback_templ = Template(filename=str(paths.feedback_templ_path))
+        self.header_templ = mako_template(paths.dpd_header_templ_path)
+        self.dpd_definition_templ = mako_template(paths.dpd_definition_templ_path)
+        self.button_box_templ = mako_template(paths.button_box_templ_path)
+        self.grammar_templ = mako_template(paths.grammar_templ_path)
+        self.example_templ = mako_template(paths.example_templ_path)
+        self.inflection_templ = mako_template(paths.inflection_templ_path)
+        self.family_root_templ = mako_template(paths.family_root_templ_path)
+        self.family_word_templ = mako_template(paths.family_word_templ_path)
+        self.family_compound_templ = mako_template(paths.family_compound_templ_path)
+        self.family_idiom_templ = mako_template(paths.family_idiom_templ_path)
+        self.family_set_templ = mako_template(paths.family_set_templ_path)
+        self.frequency_templ = mako_template(paths.frequency_templ_path)
+        self.feedback_templ = mako_template(paths.feedback_templ_path)
 
         self.dpd_css = ""
         self.button_js = ""
 
 
-DpdHeadwordDbRowItems = Tuple[DpdHeadword, FamilyRoot, FamilyWord]
+# plain column values of DpdHeadword, DpdRoot, FamilyRoot, FamilyWord,
+# and lists of FamilyCompound, FamilyIdiom and FamilySet, made with to_row
+DpdHeadwordDbRow = Tuple[
+    Tuple,
+    Optional[Tuple],
+    Optional[Tuple],
+    Optional[Tuple],
+    List[Tuple],
+    List[Tuple],
+    List[Tuple],
+]
 
 
 class DpdHeadwordDbParts(TypedDict):
@@ -85,21 +113,10 @@ class DpdHeadwordDbParts(TypedDict):
     family_set: List[FamilySet]
 
 
-class DpdHeadwordRenderData(TypedDict):
-    pth: ProjectPaths
-    word_templates: DpdHeadwordTemplates
-    sandhi_contractions: SandhiContractionDict
-    cf_set: Set[str]
-    idioms_set: Set[str]
-    make_link: bool
-    show_id: bool
-
-
 def render_pali_word_dpd_html(
     db_parts: DpdHeadwordDbParts,
-    render_data: DpdHeadwordRenderData,
+    rd: RenderContext,
 ) -> Tuple[DictEntry, RenderedSizes]:
-    rd = render_data
     size_dict = default_rendered_sizes()
 
     i: DpdHeadword = db_parts["pali_word"]
@@ -111,9 +128,9 @@ def render_pali_word_dpd_html(
     fs: List[FamilySet] = db_parts["family_set"]
     date: str = year_month_day_dash()
 
-    tt = rd["word_templates"]
-    pth = rd["pth"]
-    sandhi_contractions = rd["sandhi_contractions"]
+    tt = rd.word_templates
+    pth = rd.pth
+    sandhi_contractions = rd.sandhi_contractions
 
     # replace \n with html line break
     if i.meaning_1:
@@ -146,8 +163,8 @@ def render_pali_word_dpd_html(
         pth,
         i,
         tt.dpd_definition_templ,
-        rd["make_link"],
-        rd["show_id"],
+        rd.make_link,
+        rd.show_id,
     )
     html += summary
     size_dict["dpd_summary"] += len(summary)
@@ -155,8 +172,8 @@ def render_pali_word_dpd_html(
     button_box = render_button_box_templ(
         pth,
         i,
-        rd["cf_set"],
-        rd["idioms_set"],
+        rd.cf_set,
+        rd.idioms_set,
         tt.button_box_templ,
     )
     html += button_box
@@ -173,7 +190,7 @@ def render_pali_word_dpd_html(
         size_dict["dpd_grammar"] += len(grammar)
 
     if i.needs_example_button or i.needs_examples_button:
-        example = render_example_templ(pth, i, tt.example_templ, rd["make_link"])
+        example = render_example_templ(pth, i, tt.example_templ, rd.make_link)
         html += example
         size_dict["dpd_example"] += len(example)
 
@@ -194,14 +211,14 @@ def render_pali_word_dpd_html(
 
     if i.needs_compound_family_button or i.needs_compound_families_button:
         family_compound = render_family_compound_templ(
-            pth, i, fc, rd["cf_set"], tt.family_compound_templ
+            pth, i, fc, rd.cf_set, tt.family_compound_templ
         )
         html += family_compound
         size_dict["dpd_family_compound"] += len(family_compound)
 
     if i.needs_idioms_button:
         family_idiom = render_family_idioms_templ(
-            pth, i, fi, rd["idioms_set"], tt.family_idiom_templ
+            pth, i, fi, rd.idioms_set, tt.family_idiom_templ
         )
         html += family_idiom
         size_dict["dpd_family_idiom"] += len(family_idiom)
@@ -224,8 +241,7 @@ def render_pali_word_dpd_html(
 
     # Add CSS Variables and fonts to header
     header = str(tt.header_templ.render(i=i, date=date))
-    css_manager = CSSManager()
-    header = css_manager.update_style(header, "dpd")
+    header = rd.update_style(header, "dpd")
 
     size_dict["dpd_header"] += len(header)
     html = squash_whitespaces(header) + minify(html)
@@ -256,27 +272,147 @@ def render_pali_word_dpd_html(
     return (res, size_dict)
 
 
-def generate_dpd_html(
-    db_session: Session,
+def render_dpd_batch(
+    batch: List[DpdHeadwordDbRow],
+) -> Tuple[List[DictEntry], List[RenderedSizes]]:
+    """Render a batch of plain headword rows inside a RenderPool worker.
+    Sizes are returned per entry, so they can be cached with it."""
+
+    rd = get_render_context()
+    dpd_data_list: List[DictEntry] = []
+    rendered_sizes: List[RenderedSizes] = []
+
+    for pw, rt, fr, fw, fc, fi, fs in batch:
+        db_parts = DpdHeadwordDbParts(
+            pali_word=from_row(DpdHeadword, pw),
+            pali_root=from_row(DpdRoot, rt),
+            family_root=from_row(FamilyRoot, fr),
+            family_word=from_row(FamilyWord, fw),
+            family_compounds=[from_row(FamilyCompound, i) for i in fc],
+            family_idioms=[from_row(FamilyIdiom, i) for i in fi],
+            family_set=[from_row(FamilySet, i) for i in fs],
+        )
+        res, sizes = render_pali_word_dpd_html(db_parts, rd)
+        dpd_data_list.append(res)
+        rendered_sizes.append(sizes)
+
+    return dpd_data_list, rendered_sizes
+
+
+def dpd_export_fingerprint(
     pth: ProjectPaths,
     sandhi_contractions: SandhiContractionDict,
     cf_set: Set[str],
-    idioms_set: set[str],
-    make_link=False,
-    data_limit: int = 0,
-) -> Tuple[List[DictEntry], RenderedSizes]:
-    pr.green_title("generating dpd html")
+    idioms_set: Set[str],
+    make_link: bool,
+    show_id: bool,
+) -> str:
+    """Everything apart from the db rows which changes the rendered html."""
+
+    file_paths = [
+        Path(__file__),
+        pth.dpd_css_path,
+        pth.dpd_variables_css_path,
+        pth.dpd_header_templ_path,
+        pth.dpd_definition_templ_path,
+        pth.button_box_templ_path,
+        pth.grammar_templ_path,
+        pth.example_templ_path,
+        pth.inflection_templ_path,
+        pth.family_root_templ_path,
+        pth.family_word_templ_path,
+        pth.family_compound_templ_path,
+        pth.family_idiom_templ_path,
+        pth.family_set_templ_path,
+        pth.frequency_templ_path,
+        pth.feedback_templ_path,
+    ]
+    file_paths.extend(
+        Path(importlib.import_module(module).__file__ or "")
+        for module in RENDER_MODULES
+    )
+    return make_fingerprint(
+        file_paths,
+        sorted(sandhi_contractions.items()),
+        sorted(cf_set),
+        sorted(idioms_set),
+        make_link,
+        show_id,
+    )
 
-    paths = pth
 
-    word_templates = DpdHeadwordTemplates(paths)
+class DpdPage:
+    """One page of headwords, split into entries reused from the export cache
+    and rows which still need to be rendered."""
+
+    def __init__(
+        self,
+        dpd_db_rows: List[DpdHeadwordDbRow],
+        ids: List[int],
+        export_cache: Optional[ExportCache],
+    ) -> None:
+        self.ids = ids
+        self.export_cache = export_cache
+        self.entries: List[Optional[DictEntry]] = [None] * len(dpd_db_rows)
+        self.sizes: List[RenderedSizes] = []
+        self.dirty_indexes: List[int] = []
+        self.dirty_hashes: List[str] = []
+        self.dirty_rows: List[DpdHeadwordDbRow] = []
+
+        for index, row in enumerate(dpd_db_rows):
+            if export_cache is None:
+                self.dirty_indexes.append(index)
+                self.dirty_rows.append(row)
+                continue
+
+            row_hash = make_hash(row)
+            cached = export_cache.get(ids[index], row_hash)
+            if cached:
+                self.entries[index], sizes = cached
+                self.sizes.append(sizes)
+            else:
+                self.dirty_indexes.append(index)
+                self.dirty_hashes.append(row_hash)
+                self.dirty_rows.append(row)
+
+        self.results: Iterable = []
+
+    def submit(self, render_pool: RenderPool) -> None:
+        if self.dirty_rows:
+            self.results = render_pool.submit(render_dpd_batch, self.dirty_rows)
+
+    def collect(self) -> Tuple[List[DictEntry], RenderedSizes]:
+        """Wait for the rendered rows, and return all entries in page order."""
+
+        dirty = 0
+        for batch_data, batch_sizes in self.results:
+            for entry, sizes in zip(batch_data, batch_sizes):
+                index = self.dirty_indexes[dirty]
+                self.entries[index] = entry
+                self.sizes.append(sizes)
+                if self.export_cache is not None:
+                    self.export_cache.put(
+                        self.ids[index], self.dirty_hashes[dirty], entry, sizes
+                    )
+                dirty += 1
+
+        entries = [i for i in self.entries if i is not None]
+        return entries, sum_rendered_sizes(self.sizes)
 
-    if config_test("dictionary", "show_id", "yes"):
-        show_id: bool = True
-    else:
-        show_id: bool = False
 
-    dpd_data_list: List[DictEntry] = []
+def generate_dpd_html(
+    db_session: Session,
+    render_pool: RenderPool,
+    data_limit: int = 0,
+    export_cache: Optional[ExportCache] = None,
+    dict_data: Optional[DictEntrySpool] = None,
+) -> Tuple[List[DictEntry] | DictEntrySpool, RenderedSizes]:
+    """Render all headwords, or with an export_cache,
+    only the headwords which have changed since the last export.
+    With dict_data, each page is added to it as soon as it is rendered,
+    instead of to a list of all the headwords."""
+
+    pr.green_title("generating dpd html")
 
     pali_words_count = db_session.query(func.count(DpdHeadword.id)).scalar()
 
@@ -295,93 +431,72 @@ def generate_dpd_html(
     else:
         limit = 5000
 
-    offset = 0
-
-    manager = Manager()
-    dpd_data_results_list: ListProxy = manager.list()
-    rendered_sizes_results_list: ListProxy = manager.list()
-    num_logical_cores = psutil.cpu_count()
-    pr.green_title(f"running with {num_logical_cores} cores")
-
-    while offset <= pali_words_count:
-        dpd_db_query = (
-            db_session.query(DpdHeadword, FamilyRoot, FamilyWord)
-            .outerjoin(
-                FamilyRoot, DpdHeadword.root_family_key == FamilyRoot.root_family_key
-            )
-            .outerjoin(FamilyWord, DpdHeadword.family_word == FamilyWord.word_family)
-            .order_by(DpdHeadword.lemma_1)
-        )
-
-        dpd_db = dpd_db_query.limit(limit).offset(offset).all()
-
-        def _add_parts(i: DpdHeadwordDbRowItems) -> DpdHeadwordDbParts:
-            pw: DpdHeadword
-            fr: FamilyRoot
-            fw: FamilyWord
-            (
-                pw,
-                fr,
-                fw,
-            ) = i
-
-            return DpdHeadwordDbParts(
-                pali_word=pw,
-                pali_root=pw.rt,
-                family_root=fr,
-                family_word=fw,
-                family_compounds=get_family_compounds(pw),
-                family_idioms=get_family_idioms(pw),
-                family_set=get_family_set(pw),
-            )
-
-        dpd_db_data = [_add_parts(i.tuple()) for i in dpd_db]
-
-        rendered_sizes: List[RenderedSizes] = []
+    pr.green_title(f"running with {render_pool.processes} cores")
 
-        batches: List[List[DpdHeadwordDbParts]] = list_into_batches(
-            dpd_db_data, num_logical_cores
-        )
+    dpd_db_query = (
+        db_session.query(DpdHeadword, FamilyRoot, FamilyWord)
+        .outerjoin(FamilyRoot, DpdHeadword.root_family_key == FamilyRoot.root_family_key)
+        .outerjoin(FamilyWord, DpdHeadword.family_word == FamilyWord.word_family)
+        .options(joinedload(DpdHeadword.rt))
+    )
 
-        processes: List[Process] = []
+    dpd_data_list: List[DictEntry] | DictEntrySpool = (
+        [] if dict_data is None else dict_data
+    )
+    rendered_sizes: List[RenderedSizes] = []
 
-        render_data = DpdHeadwordRenderData(
-            pth=pth,
-            word_templates=word_templates,
-            sandhi_contractions=sandhi_contractions,
-            cf_set=cf_set,
-            idioms_set=idioms_set,
-            make_link=make_link,
-            show_id=show_id,
-        )
+    # the workers render one page while the next page is read from the db
+    pending: Optional[DpdPage] = None
+    offset = 0
+    for dpd_db_chunk in keyset_chunks(
+        dpd_db_query, DpdHeadword.lemma_1, limit, data_limit
+    ):
+        dpd_db = [i.tuple() for i in dpd_db_chunk]
 
-        def _parse_batch(batch: List[DpdHeadwordDbParts]):
-            res: List[Tuple[DictEntry, RenderedSizes]] = [
-                render_pali_word_dpd_html(i, render_data) for i in batch
-            ]
+        # one query per family table for the whole page
+        headwords = [i[0] for i in dpd_db]
+        fc_dict = get_family_compounds_bulk(headwords)
+        fi_dict = get_family_idioms_bulk(headwords)
+        fs_dict = get_family_set_bulk(headwords)
 
-            for i, j in res:
-                dpd_data_results_list.append(i)
-                rendered_sizes_results_list.append(j)
+        dpd_db_rows: List[DpdHeadwordDbRow] = [
+            (
+                to_row(pw),
+                to_row(pw.rt),
+                to_row(fr),
+                to_row(fw),
+                [to_row(i) for i in fc_dict[pw.id]],
+                [to_row(i) for i in fi_dict[pw.id]],
+                [to_row(i) for i in fs_dict[pw.id]],
+            )
+            for pw, fr, fw in dpd_db
+        ]
 
-        for batch in batches:
-            p = Process(target=_parse_batch, args=(batch,))
+        page = DpdPage(dpd_db_rows, [i.id for i in headwords], export_cache)
+        page.submit(render_pool)
 
-            p.start()
-            processes.append(p)
+        if pending is not None:
+            data, sizes = pending.collect()
+            dpd_data_list.extend(data)
+            rendered_sizes.append(sizes)
+        pending = page
 
-        for p in processes:
-            p.join()
+        pr.counter(offset, pali_words_count, dpd_db[0][0].lemma_1)
 
-        if offset % limit == 0:
-            pr.counter(offset, pali_words_count, batch[0]["pali_word"].lemma_1)
+        offset += len(dpd_db)
 
-        offset += limit
+    if pending is not None:
+        data, sizes = pending.collect()
+        dpd_data_list.extend(data)
+        rendered_sizes.append(sizes)
 
-    dpd_data_list = list(dpd_data_results_list)
-    rendered_sizes = list(rendered_sizes_results_list)
     total_sizes = sum_rendered_sizes(rendered_sizes)
 
+    if export_cache is not None:
+        pr.green_title(
+            f"reused {export_cache.hits:,} cached, rendered {export_cache.misses:,}"
+        )
+
     return dpd_data_list, total_sizes
 
 
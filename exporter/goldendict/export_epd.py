@@ -2,7 +2,6 @@
 
 import re
 
-from mako.template import Template
 from minify_html import minify
 from sqlalchemy.orm import Session
 from typing import List, Tuple
@@ -10,7 +9,7 @@ from typing import List, Tuple
 from db.db_helpers import get_db_session
 
 from db.models import DpdHeadword, DpdRoot
-from tools.css_manager import CSSManager
+from exporter.goldendict.render_pool import RenderPool, get_render_context
 from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
@@ -20,13 +19,11 @@ from tools.goldendict_exporter import DictEntry
 
 def generate_epd_html(
     db_session: Session,
-    pth: ProjectPaths,
+    render_pool: RenderPool,
     make_link=False,
 ) -> Tuple[List[DictEntry], RenderedSizes]:
     """generate html for english to pali dictionary"""
 
-    size_dict = default_rendered_sizes()
-
     pr.green("generating epd html")
 
     dpd_db: list[DpdHeadword] = db_session.query(DpdHeadword).all()
@@ -37,14 +34,6 @@ def generate_epd_html(
     epd: dict = {}
     pos_exclude_list = ["abbrev", "cs", "letter", "root", "suffix", "ve"]
 
-    header_templ = Template(filename=str(pth.dpd_header_plain_templ_path))
-
-    header = str(header_templ.render())
-
-    # Add Variables and fonts
-    css_manager = CSSManager()
-    header = css_manager.update_style(header, "primary")
-
     for counter, i in enumerate(dpd_db):
         # generate eng-pali
         meanings_list = []
@@ -109,9 +98,32 @@ def generate_epd_html(
                 epd_string = f"<b class='epd'>{i.root}</b> root. {i.root_meaning}"
                 epd.update({root_meaning: epd_string})
 
+    epd_data_list, size_dict = render_pool.render(
+        render_epd_batch, list(epd.items())
+    )
+
+    pr.yes(len(epd_data_list))
+
+    return epd_data_list, size_dict
+
+
+def render_epd_batch(
+    batch: List[Tuple[str, str]],
+) -> Tuple[List[DictEntry], RenderedSizes]:
+    """Render a batch of (word, html_string) inside a RenderPool worker."""
+
+    ctx = get_render_context()
+    size_dict = default_rendered_sizes()
+
+    header_templ = ctx.template(ctx.pth.dpd_header_plain_templ_path)
+    header = str(header_templ.render())
+
+    # Add Variables and fonts
+    header = ctx.update_style(header, "primary")
+
     epd_data_list: List[DictEntry] = []
 
-    for counter, (word, html_string) in enumerate(epd.items()):
+    for word, html_string in batch:
         html = ""
         html += "<body>"
         html += f"<div class ='dpd'><p>{html_string}</p></div>"
@@ -131,8 +143,6 @@ def generate_epd_html(
 
         epd_data_list.append(res)
 
-    pr.yes(len(epd_data_list))
-
     return epd_data_list, size_dict
 
 
@@ -195,4 +205,5 @@ def update_epd(epd, combined_numbers, i, make_link=True):
 if __name__ == "__main__":
     pth = ProjectPaths()
     db_session = get_db_session(pth.dpd_db_path)
-    generate_epd_html(db_session, pth)
+    with RenderPool(pth) as render_pool:
+        generate_epd_html(db_session, render_pool)
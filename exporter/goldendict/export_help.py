@@ -7,10 +7,13 @@ from mako.template import Template
 from minify_html import minify
 from sqlalchemy.orm import Session
 
+from exporter.goldendict.render_pool import RenderContext, RenderPool
+from exporter.goldendict.render_pool import get_render_context
 from tools.css_manager import CSSManager
 from tools.goldendict_exporter import DictEntry
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
+from tools.template_registry import mako_template
 from tools.tsv_read_write import read_tsv_dict, read_tsv_dot_dict
 from tools.utils import RenderedSizes, default_rendered_sizes, squash_whitespaces
 
@@ -54,6 +57,7 @@ class Help:
 def generate_help_html(
     __db_session__: Session,
     pth: ProjectPaths,
+    render_pool: RenderPool,
 ) -> Tuple[List[DictEntry], RenderedSizes]:
     """generating html of all help files used in the dictionary"""
     pr.green("generating help html")
@@ -65,7 +69,7 @@ def generate_help_html(
     # 3. thank yous
     # 4. bibliography
 
-    header_templ = Template(filename=str(pth.dpd_header_plain_templ_path))
+    header_templ = mako_template(pth.dpd_header_plain_templ_path)
     header = str(header_templ.render())
 
     # Add Variables and fonts
@@ -74,11 +78,11 @@ def generate_help_html(
 
     help_data_list: List[DictEntry] = []
 
-    abbrev = add_abbrev_html(pth, header)
+    abbrev = add_abbrev_html(pth, render_pool)
     help_data_list.extend(abbrev)
     size_dict["help"] += len(str(abbrev))
 
-    help_html = add_help_html(pth, header)
+    help_html = add_help_html(pth, render_pool)
     help_data_list.extend(help_html)
     size_dict["help"] += len(str(help_html))
 
@@ -96,10 +100,8 @@ def generate_help_html(
 
 def add_abbrev_html(
     pth: ProjectPaths,
-    header: str,
+    render_pool: RenderPool,
 ) -> List[DictEntry]:
-    help_data_list = []
-
     file_path = pth.abbreviations_tsv_path
     rows = read_tsv_dict(file_path)
 
@@ -122,10 +124,25 @@ def add_abbrev_html(
 
     items = list(map(_csv_row_to_abbreviations, rows))
 
-    for i in items:
+    help_data_list, __sizes__ = render_pool.render(render_abbrev_batch, items)
+
+    return help_data_list
+
+
+def render_abbrev_batch(
+    batch: List[Abbreviation],
+) -> Tuple[List[DictEntry], RenderedSizes]:
+    """Render a batch of abbreviations inside a RenderPool worker."""
+
+    ctx = get_render_context()
+    header = render_help_header(ctx)
+    abbrev_templ = ctx.template(ctx.pth.abbrev_templ_path)
+    help_data_list = []
+
+    for i in batch:
         html = ""
         html += "<body>"
-        html += render_abbrev_templ(pth, i)
+        html += render_abbrev_templ(i, abbrev_templ)
         html += "</body></html>"
 
         html = squash_whitespaces(header) + minify(html)
@@ -141,15 +158,13 @@ def add_abbrev_html(
 
         help_data_list.append(res)
 
-    return help_data_list
+    return help_data_list, default_rendered_sizes()
 
 
 def add_help_html(
     pth: ProjectPaths,
-    header: str,
+    render_pool: RenderPool,
 ) -> List[DictEntry]:
-    help_data_list = []
-
     file_path = pth.help_tsv_path
     rows = read_tsv_dict(file_path)
 
@@ -169,10 +184,25 @@ def add_help_html(
 
     items = list(map(_csv_row_to_help, rows))
 
-    for i in items:
+    help_data_list, __sizes__ = render_pool.render(render_help_batch, items)
+
+    return help_data_list
+
+
+def render_help_batch(
+    batch: List[Help],
+) -> Tuple[List[DictEntry], RenderedSizes]:
+    """Render a batch of help items inside a RenderPool worker."""
+
+    ctx = get_render_context()
+    header = render_help_header(ctx)
+    help_templ = ctx.template(ctx.pth.help_templ_path)
+    help_data_list = []
+
+    for i in batch:
         html = ""
         html += "<body>"
-        html += render_help_templ(pth, i)
+        html += render_help_templ(i, help_templ)
         html += "</body></html>"
 
         html = squash_whitespaces(header) + minify(html)
@@ -188,7 +218,7 @@ def add_help_html(
 
         help_data_list.append(res)
 
-    return help_data_list
+    return help_data_list, default_rendered_sizes()
 
 
 def add_bibliography(pth: ProjectPaths, header: str) -> List[DictEntry]:
@@ -305,23 +335,29 @@ def add_thanks(pth: ProjectPaths, header: str) -> List[DictEntry]:
     return help_data_list
 
 
+def render_help_header(ctx: RenderContext) -> str:
+    """render the plain header with the secondary style"""
+
+    header_templ = ctx.template(ctx.pth.dpd_header_plain_templ_path)
+    header = str(header_templ.render())
+
+    # Add Variables and fonts
+    return ctx.update_style(header, "secondary")
+
+
 def render_abbrev_templ(
-    pth: ProjectPaths,
     i: Abbreviation,
+    abbrev_templ: Template,
 ) -> str:
     """render html of abbreviations"""
 
-    abbrev_templ = Template(filename=str(pth.abbrev_templ_path))
-
     return str(abbrev_templ.render(i=i))
 
 
 def render_help_templ(
-    pth: ProjectPaths,
     i: Help,
+    help_templ: Template,
 ) -> str:
     """render html of help"""
 
-    help_templ = Template(filename=str(pth.help_templ_path))
-
     return str(help_templ.render(i=i))
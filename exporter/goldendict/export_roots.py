@@ -9,7 +9,8 @@ from sqlalchemy.orm import Session
 
 from db.models import DpdRoot, FamilyRoot
 from exporter.goldendict.helpers import TODAY
-from tools.css_manager import CSSManager
+from exporter.goldendict.render_pool import RenderPool
+from exporter.goldendict.render_pool import from_row, get_render_context, to_row
 from tools.goldendict_exporter import DictEntry
 from tools.niggahitas import add_niggahitas
 from tools.pali_sort_key import pali_sort_key
@@ -17,23 +18,56 @@ from tools.paths import ProjectPaths
 from tools.printer import printer as pr
 from tools.utils import RenderedSizes, default_rendered_sizes, squash_whitespaces
 
+# plain column values of DpdRoot, its FamilyRoots, and its headword count
+RootDbRow = Tuple[Tuple, List[Tuple], int]
+
 
 def generate_root_html(
     db_session: Session,
-    pth: ProjectPaths,
+    render_pool: RenderPool,
     roots_count_dict: Dict[str, int],
 ) -> Tuple[List[DictEntry], RenderedSizes]:
     """compile html components for each pali root"""
 
     pr.green("generating roots html")
+
+    roots_db = db_session.query(DpdRoot).all()
+
+    # all root families in one query, instead of three queries per root
+    frs_dict: Dict[str, List[FamilyRoot]] = {}
+    for fr in db_session.query(FamilyRoot):
+        frs_dict.setdefault(fr.root_key, []).append(fr)
+
+    roots_db_rows: List[RootDbRow] = [
+        (
+            to_row(r),
+            [to_row(fr) for fr in frs_dict.get(r.root, [])],
+            roots_count_dict.get(r.root, 0),
+        )
+        for r in roots_db
+    ]
+
+    root_data_list, size_dict = render_pool.render(render_root_batch, roots_db_rows)
+
+    pr.yes(len(root_data_list))
+    return root_data_list, size_dict
+
+
+def render_root_batch(
+    batch: List[RootDbRow],
+) -> Tuple[List[DictEntry], RenderedSizes]:
+    """Render a batch of plain root rows inside a RenderPool worker."""
+
+    ctx = get_render_context()
+    pth = ctx.pth
     size_dict = default_rendered_sizes()
     root_data_list: List[DictEntry] = []
 
-    header_templ = Template(filename=str(pth.root_header_templ_path))
+    for root_row, fr_rows, count in batch:
+        r: DpdRoot = from_row(DpdRoot, root_row)
+        frs: List[FamilyRoot] = [from_row(FamilyRoot, i) for i in fr_rows]
+        frs_sorted = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
 
-    roots_db = db_session.query(DpdRoot).all()
-
-    for counter, r in enumerate(roots_db):
         # replace \n with html line break
         if r.panini_root:
             r.panini_root = r.panini_root.replace("\n", "<br>")
@@ -46,48 +80,50 @@ def generate_root_html(
         html += "<body>"
 
         root_header = render_root_header_templ(
-            pth, r=r, date=str(TODAY), header_templ=header_templ
+            pth,
+            r=r,
+            date=str(TODAY),
+            header_templ=ctx.template(pth.root_header_templ_path),
         )
 
         # Add variables and fonts
-        css_manager = CSSManager()
-        root_header = css_manager.update_style(root_header, "root")
+        root_header = ctx.update_style(root_header, "root")
 
         definition = render_root_definition_templ(
-            pth,
             r,
-            roots_count_dict,
+            count,
+            ctx.template(pth.root_definition_templ_path),
         )
         html += definition
         size_dict["root_definition"] += len(definition)
 
         root_buttons = render_root_buttons_templ(
-            pth,
             r,
-            db_session,
+            frs_sorted,
+            ctx.template(pth.root_button_templ_path),
         )
         html += root_buttons
         size_dict["root_buttons"] += len(root_buttons)
 
         root_info = render_root_info_templ(
-            pth,
             r,
+            ctx.template(pth.root_info_templ_path),
         )
         html += root_info
         size_dict["root_info"] += len(root_info)
 
         root_matrix = render_root_matrix_templ(
-            pth,
             r,
-            roots_count_dict,
+            count,
+            ctx.template(pth.root_matrix_templ_path),
         )
         html += root_matrix
         size_dict["root_matrix"] += len(root_matrix)
 
         root_families = render_root_families_templ(
-            pth,
             r,
-            db_session,
+            frs_sorted,
+            ctx.template(pth.root_families_templ_path),
         )
         html += root_families
         size_dict["root_families"] += len(root_families)
@@ -101,8 +137,6 @@ def generate_root_html(
         synonyms.add(re.sub("√", "", r.root))
         synonyms.add(re.sub("√", "", r.root_clean))
 
-        frs = db_session.query(FamilyRoot).filter(FamilyRoot.root_key == r.root).all()
-
         for fr in frs:
             synonyms.add(fr.root_family)
             synonyms.add(re.sub("√", "", fr.root_family))
@@ -119,7 +153,6 @@ def generate_root_html(
 
         root_data_list.append(res)
 
-    pr.yes(len(root_data_list))
     return root_data_list, size_dict
 
 
@@ -132,19 +165,12 @@ def render_root_header_templ(
 
 
 def render_root_definition_templ(
-    pth: ProjectPaths,
     r: DpdRoot,
-    roots_count_dict,
+    count: int,
+    root_definition_templ: Template,
 ):
     """render html of main root info"""
 
-    root_definition_templ = Template(filename=str(pth.root_definition_templ_path))
-
-    try:
-        count = roots_count_dict[r.root]
-    except KeyError:
-        count = 0
-
     return str(
         root_definition_templ.render(
             r=r,
@@ -155,67 +181,42 @@ def render_root_definition_templ(
 
 
 def render_root_buttons_templ(
-    pth: ProjectPaths,
     r: DpdRoot,
-    db_session: Session,
+    frs: List[FamilyRoot],
+    root_buttons_templ: Template,
 ):
     """render html of root buttons"""
 
-    root_buttons_templ = Template(filename=str(pth.root_button_templ_path))
-
-    frs = db_session.query(FamilyRoot).filter(FamilyRoot.root_key == r.root)
-
-    frs = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
-
     return str(root_buttons_templ.render(r=r, frs=frs))
 
 
-def render_root_info_templ(pth: ProjectPaths, r: DpdRoot):
+def render_root_info_templ(r: DpdRoot, root_info_templ: Template):
     """render html of root grammatical info"""
 
-    root_info_templ = Template(filename=str(pth.root_info_templ_path))
     root_info = ""
 
     return str(root_info_templ.render(r=r, root_info=root_info, today=TODAY))
 
 
 def render_root_matrix_templ(
-    pth: ProjectPaths,
     r: DpdRoot,
-    roots_count_dict,
+    count: int,
+    root_matrix_templ: Template,
 ):
     """render html of root matrix"""
 
-    root_matrix_templ = Template(filename=str(pth.root_matrix_templ_path))
     root_matrix = ""
 
-    try:
-        count = roots_count_dict[r.root]
-    except KeyError:
-        count = 0
-
     return str(
         root_matrix_templ.render(r=r, count=count, root_matrix=root_matrix, today=TODAY)
     )
 
 
 def render_root_families_templ(
-    pth: ProjectPaths,
     r: DpdRoot,
-    db_session: Session,
+    frs: List[FamilyRoot],
+    root_families_templ: Template,
 ):
     """render html of root families"""
 
-    root_families_templ = Template(filename=str(pth.root_families_templ_path))
-
-    frs = (
-        db_session.query(FamilyRoot)
-        .filter(
-            FamilyRoot.root_key == r.root,
-        )
-        .all()
-    )
-
-    frs = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
-
     return str(root_families_templ.render(r=r, frs=frs, today=TODAY))
@@ -3,10 +3,9 @@
 import csv
 from typing import List, Tuple
 
-from mako.template import Template
 from minify_html import minify
 
-from tools.css_manager import CSSManager
+from exporter.goldendict.render_pool import RenderPool, get_render_context
 from tools.goldendict_exporter import DictEntry
 from tools.niggahitas import add_niggahitas
 from tools.paths import ProjectPaths
@@ -21,6 +20,7 @@ from tools.utils import (
 
 def generate_variant_spelling_html(
     pth: ProjectPaths,
+    render_pool: RenderPool,
 ) -> Tuple[List[DictEntry], RenderedSizes]:
     """Generate html for variant readings and spelling corrections."""
 
@@ -28,22 +28,16 @@ def generate_variant_spelling_html(
 
     rendered_sizes = []
 
-    header_templ = Template(filename=str(pth.dpd_header_plain_templ_path))
-
     variant_dict = test_and_make_variant_dict(pth)
     spelling_dict = test_and_make_spelling_dict(pth)
 
-    variant_data_list, sizes = generate_variant_data_list(
-        pth,
-        variant_dict,
-        header_templ,
+    variant_data_list, sizes = render_pool.render(
+        generate_variant_data_list, list(variant_dict.items())
     )
     rendered_sizes.append(sizes)
 
-    spelling_data_list, sizes = generate_spelling_data_list(
-        pth,
-        spelling_dict,
-        header_templ,
+    spelling_data_list, sizes = render_pool.render(
+        generate_spelling_data_list, list(spelling_dict.items())
     )
     rendered_sizes.append(sizes)
 
@@ -80,23 +74,24 @@ def test_and_make_variant_dict(pth: ProjectPaths) -> dict:
 
 
 def generate_variant_data_list(
-    pth: ProjectPaths,
-    variant_dict: dict,
-    header_templ: Template,
+    batch: List[Tuple[str, str]],
 ) -> Tuple[List[DictEntry], RenderedSizes]:
+    """Render a batch of (variant, main) inside a RenderPool worker."""
+
+    ctx = get_render_context()
     size_dict = default_rendered_sizes()
 
-    variant_templ = Template(filename=str(pth.variant_templ_path))
+    variant_templ = ctx.template(ctx.pth.variant_templ_path)
 
+    header_templ = ctx.template(ctx.pth.dpd_header_plain_templ_path)
     header = str(header_templ.render())
 
     # Add Variables and fonts
-    css_manager = CSSManager()
-    header = css_manager.update_style(header, "primary")
+    header = ctx.update_style(header, "primary")
 
     variant_data_list: List[DictEntry] = []
 
-    for __counter__, (variant, main) in enumerate(variant_dict.items()):
+    for variant, main in batch:
         html = ""
         html += "<body>"
         html += str(variant_templ.render(main=main))
@@ -149,23 +144,24 @@ def test_and_make_spelling_dict(pth: ProjectPaths) -> dict:
 
 
 def generate_spelling_data_list(
-    pth: ProjectPaths,
-    spelling_dict: dict,
-    header_templ: Template,
+    batch: List[Tuple[str, str]],
 ) -> Tuple[List[DictEntry], RenderedSizes]:
+    """Render a batch of (mistake, correction) inside a RenderPool worker."""
+
+    ctx = get_render_context()
     size_dict = default_rendered_sizes()
 
-    spelling_templ = Template(filename=str(pth.spelling_templ_path))
+    spelling_templ = ctx.template(ctx.pth.spelling_templ_path)
 
+    header_templ = ctx.template(ctx.pth.dpd_header_plain_templ_path)
     header = str(header_templ.render())
 
     # Add Variables and fonts
-    css_manager = CSSManager()
-    header = css_manager.update_style(header, "primary")
+    header = ctx.update_style(header, "primary")
 
     spelling_data_list: List[DictEntry] = []
 
-    for __counter__, (mistake, correction) in enumerate(spelling_dict.items()):
+    for mistake, correction in batch:
         html = ""
         html += "<body>"
         html += str(spelling_templ.render(correction=correction))
@@ -192,4 +188,5 @@ def generate_spelling_data_list(
 
 if __name__ == "__main__":
     pth = ProjectPaths()
-    generate_variant_spelling_html(pth)
+    with RenderPool(pth) as render_pool:
+        generate_variant_spelling_html(pth, render_pool)
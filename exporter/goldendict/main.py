@@ -4,22 +4,24 @@
 
 import csv
 import pickle
-from typing import List
+from typing import List, Optional
 
 from sqlalchemy.orm import Session
 
 from db.db_helpers import get_db_session
 
-from exporter.goldendict.export_dpd import generate_dpd_html
+from exporter.goldendict.export_cache import ExportCache
+from exporter.goldendict.export_dpd import dpd_export_fingerprint, generate_dpd_html
 from exporter.goldendict.export_epd import generate_epd_html
 from exporter.goldendict.export_help import generate_help_html
 from exporter.goldendict.export_roots import generate_root_html
 from exporter.goldendict.export_variant_spelling import generate_variant_spelling_html
 from exporter.goldendict.helpers import make_roots_count_dict
+from exporter.goldendict.render_pool import RenderPool
 from tools.cache_load import load_cf_set, load_idioms_set
 from tools.configger import config_read, config_test
 from tools.goldendict_exporter import (
-    DictEntry,
+    DictEntrySpool,
     DictInfo,
     DictVariables,
     export_to_goldendict_with_pyglossary,
@@ -42,7 +44,7 @@ class ProgData:
         self.roots_count_dict = make_roots_count_dict(self.db_session)
         self.rendered_sizes: List[RenderedSizes] = []
         self.data_limit = int(config_read("dictionary", "data_limit") or "0")
-        self.dict_data: list[DictEntry]
+        self.dict_data: DictEntrySpool
 
         # config tests
         self.make_mdict: bool = False
@@ -51,6 +53,24 @@ class ProgData:
         self.make_link: bool = False
         if config_test("dictionary", "make_link", "yes"):
             self.make_link: bool = True
+        self.show_id: bool = False
+        if config_test("dictionary", "show_id", "yes"):
+            self.show_id: bool = True
+
+        # only re-render headwords which changed since the last export
+        self.export_cache: Optional[ExportCache] = None
+        if config_test("dictionary", "incremental", "yes") and self.data_limit == 0:
+            self.export_cache = ExportCache(
+                self.pth.dpd_export_cache_path,
+                dpd_export_fingerprint(
+                    self.pth,
+                    self.sandhi_contractions,
+                    self.cf_set,
+                    self.idioms_set,
+                    self.make_link,
+                    self.show_id,
+                ),
+            )
 
         self.paths = self.pth
 
@@ -66,51 +86,59 @@ def main():
 
     g = ProgData()
 
-    dpd_data_list, sizes = generate_dpd_html(
-        g.db_session,
-        g.pth,
-        g.sandhi_contractions,
-        g.cf_set,
-        g.idioms_set,
-        g.make_link,
-        g.data_limit,
-    )
-    g.rendered_sizes.append(sizes)
-
-    if g.data_limit == 0:
-        root_data_list, sizes = generate_root_html(
-            g.db_session, g.pth, g.roots_count_dict
-        )
-        g.rendered_sizes.append(sizes)
-
-        variant_spelling_data_list, sizes = generate_variant_spelling_html(g.pth)
-        g.rendered_sizes.append(sizes)
-
-        epd_data_list, sizes = generate_epd_html(g.db_session, g.pth)
-        g.rendered_sizes.append(sizes)
-
-        help_data_list, sizes = generate_help_html(g.db_session, g.pth)
-        g.rendered_sizes.append(sizes)
-
-        g.db_session.close()
-
-    else:
-        root_data_list = []
-        variant_spelling_data_list = []
-        epd_data_list = []
-        help_data_list = []
-
-    g.dict_data = (
-        dpd_data_list
-        + root_data_list
-        + variant_spelling_data_list
-        + epd_data_list
-        + help_data_list
-    )
-
-    write_limited_datalist(g)
-    write_size_dict(g.pth, sum_rendered_sizes(g.rendered_sizes))
-    prepare_export_to_goldendict_mdict(g)
+    # the entries are spooled to disk as they are rendered,
+    # and both writers read them back one batch at a time
+    with DictEntrySpool(g.pth.temp_dir) as dict_data:
+        # one pool of workers for all the html, started once
+        with RenderPool(
+            g.pth,
+            g.sandhi_contractions,
+            g.cf_set,
+            g.idioms_set,
+            g.make_link,
+            g.show_id,
+        ) as render_pool:
+            __dpd_data__, sizes = generate_dpd_html(
+                g.db_session,
+                render_pool,
+                g.data_limit,
+                g.export_cache,
+                dict_data,
+            )
+            g.rendered_sizes.append(sizes)
+            if g.export_cache is not None:
+                g.export_cache.save()
+
+            if g.data_limit == 0:
+                data_list, sizes = generate_root_html(
+                    g.db_session, render_pool, g.roots_count_dict
+                )
+                dict_data.extend(data_list)
+                g.rendered_sizes.append(sizes)
+
+                data_list, sizes = generate_variant_spelling_html(
+                    g.pth, render_pool
+                )
+                dict_data.extend(data_list)
+                g.rendered_sizes.append(sizes)
+
+                data_list, sizes = generate_epd_html(g.db_session, render_pool)
+                dict_data.extend(data_list)
+                g.rendered_sizes.append(sizes)
+
+                data_list, sizes = generate_help_html(
+                    g.db_session, g.pth, render_pool
+                )
+                dict_data.extend(data_list)
+                g.rendered_sizes.append(sizes)
+
+                g.db_session.close()
+
+        g.dict_data = dict_data
+
+        write_limited_datalist(g)
+        write_size_dict(g.pth, sum_rendered_sizes(g.rendered_sizes))
+        prepare_export_to_goldendict_mdict(g)
 
     pr.toc()
 
@@ -0,0 +1,187 @@
+"""A long-lived pool of worker processes for rendering GoldenDict html.
+
+Each worker builds one read-only RenderContext when it starts,
+with the compiled templates, sandhi contractions, cf_set and idioms_set,
+and reuses it for every task it is given.
+
+Tasks are sent in batches of plain tuples rather than ORM objects,
+and each batch returns its DictEntry list and rendered sizes in one transfer.
+
+Usage:
+with RenderPool(pth, sandhi_contractions, cf_set, idioms_set) as pool:
+    data_list, sizes = pool.render(render_batch_function, items)
+
+render_batch_function must be a module level function which takes a list
+of items and returns Tuple[List[DictEntry], RenderedSizes].
+Inside it, get_render_context() returns the worker's RenderContext.
+"""
+
+import math
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+import psutil
+from mako.template import Template
+from sqlalchemy import inspect
+
+from db.models import Base
+from tools.css_manager import CSSManager
+from tools.goldendict_exporter import DictEntry
+from tools.paths import ProjectPaths
+from tools.sandhi_contraction import SandhiContractionDict
+from tools.template_registry import mako_template
+from tools.utils import RenderedSizes, sum_rendered_sizes
+
+# each worker gets a few batches, so a slow batch doesn't hold up the rest
+BATCHES_PER_WORKER = 4
+
+BatchResult = Tuple[List[DictEntry], RenderedSizes]
+RenderBatch = Callable[[List[Any]], BatchResult]
+
+
+class RenderContext:
+    """Read-only data shared by all the render tasks in one worker."""
+
+    def __init__(
+        self,
+        pth: ProjectPaths,
+        sandhi_contractions: SandhiContractionDict,
+        cf_set: Set[str],
+        idioms_set: Set[str],
+        make_link: bool,
+        show_id: bool,
+    ) -> None:
+        # imported here, export_dpd imports this module
+        from exporter.goldendict.export_dpd import DpdHeadwordTemplates
+
+        self.pth = pth
+        self.sandhi_contractions = sandhi_contractions
+        self.cf_set = cf_set
+        self.idioms_set = idioms_set
+        self.make_link = make_link
+        self.show_id = show_id
+        self.word_templates = DpdHeadwordTemplates(pth)
+        self._styles: Dict[str, str] = {}
+
+    def template(self, path: Path) -> Template:
+        """The worker's compiled template, from the template registry."""
+
+        return mako_template(path)
+
+    def update_style(self, header: str, used_for: str) -> str:
+        """Same as CSSManager.update_style,
+        but the css files are only read and reduced once per used_for."""
+
+        if used_for not in self._styles:
+            self._styles[used_for] = CSSManager().update_style("<style>", used_for)
+        return header.replace("<style>", self._styles[used_for])
+
+
+_context: Optional[RenderContext] = None
+
+
+def _init_worker(*args) -> None:
+    global _context
+    _context = RenderContext(*args)
+
+
+def get_render_context() -> RenderContext:
+    if _context is None:
+        raise Exception("RenderContext is only available inside a RenderPool worker")
+    return _context
+
+
+def to_row(obj: Optional[Base]) -> Optional[Tuple]:
+    """Convert an ORM object into a plain tuple of its column values."""
+
+    if obj is None:
+        return None
+    mapper = inspect(type(obj))
+    return tuple(getattr(obj, attr.key) for attr in mapper.column_attrs)
+
+
+def from_row(model: Type[Base], row: Optional[Tuple]) -> Any:
+    """Rebuild a transient ORM object from a tuple made by to_row."""
+
+    if row is None:
+        return None
+    mapper = inspect(model)
+    return model(**{attr.key: value for attr, value in zip(mapper.column_attrs, row)})
+
+
+class RenderPool:
+    def __init__(
+        self,
+        pth: ProjectPaths,
+        sandhi_contractions: Optional[SandhiContractionDict] = None,
+        cf_set: Optional[Set[str]] = None,
+        idioms_set: Optional[Set[str]] = None,
+        make_link: bool = False,
+        show_id: bool = False,
+        processes: Optional[int] = None,
+    ) -> None:
+        self.processes: int = processes or psutil.cpu_count() or 1
+        self._pool = Pool(
+            processes=self.processes,
+            initializer=_init_worker,
+            initargs=(
+                pth,
+                sandhi_contractions or {},
+                cf_set or set(),
+                idioms_set or set(),
+                make_link,
+                show_id,
+            ),
+        )
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+
+    def submit(
+        self,
+        render_batch: Callable[[List[Any]], Any],
+        items: List[Any],
+        batch_size: int = 0,
+    ) -> Iterable[Any]:
+        """Start rendering items in batches and return immediately.
+        Iterate over the result, or pass it to collect(), to wait for
+        each batch's return value in order.
+        batch_size 0 spreads the items evenly over the workers."""
+
+        if not batch_size:
+            batch_size = math.ceil(len(items) / (self.processes * BATCHES_PER_WORKER))
+            batch_size = max(batch_size, 1)
+        batches = [
+            items[start : start + batch_size]
+            for start in range(0, len(items), batch_size)
+        ]
+        return self._pool.imap(render_batch, batches)
+
+    @staticmethod
+    def collect(results: Iterable[BatchResult]) -> BatchResult:
+        """Wait for submitted batches, and join them in their original order."""
+
+        data_list: List[DictEntry] = []
+        sizes: List[RenderedSizes] = []
+        for batch_data, batch_sizes in results:
+            data_list.extend(batch_data)
+            sizes.append(batch_sizes)
+        return data_list, sum_rendered_sizes(sizes)
+
+    def render(
+        self,
+        render_batch: RenderBatch,
+        items: List[Any],
+        batch_size: int = 0,
+    ) -> BatchResult:
+        """Render items in batches across the workers and wait for the results."""
+
+        return self.collect(self.submit(render_batch, items, batch_size))
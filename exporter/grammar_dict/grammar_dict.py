@@ -15,6 +15,7 @@ from tools.mdict_exporter import export_to_mdict
 from tools.niggahitas import add_niggahitas
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
+from tools.template_registry import mako_template
 
 
 class ProgData:
@@ -87,7 +88,7 @@ def generate_html_from_lookup(g: ProgData):
     html_dict = {}
 
     # create the header from a template
-    header_templ = Template(filename=str(g.pth.grammar_dict_header_templ_path))
+    header_templ = mako_template(g.pth.grammar_dict_header_templ_path)
     html_header = render_header_templ(g.pth, css="", js="", header_templ=header_templ)
 
     # Add variables and fonts to header
@@ -9,10 +9,14 @@ import os
 import subprocess
 
 from datetime import datetime
-from mako.template import Template
+from multiprocessing import Pool
+from pathlib import Path
 from rich import print
-from typing import Dict
-from zipfile import ZipFile, ZIP_DEFLATED
+from typing import Dict, NamedTuple, Optional
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+
+import psutil
+from sqlalchemy.orm import Session
 
 from db.db_helpers import get_db_session
 from db.models import DpdHeadword, Lookup
@@ -32,18 +36,27 @@ from tools.pali_sort_key import pali_list_sorter, pali_sort_key
 from tools.paths import ProjectPaths
 from tools.deconstructed_words import make_words_in_deconstructions
 from tools.printer import printer as pr
+from tools.template_registry import get_template_registry, mako_template
 from tools.tsv_read_write import read_tsv_dict
 
 
-def render_xhtml(
-    pth: ProjectPaths,
-):
-    pr.green("querying dpd db")
-    db_session = get_db_session(pth.dpd_db_path)
-    dpd_db = db_session.query(DpdHeadword).all()
-    dpd_db = sorted(dpd_db, key=lambda x: pali_sort_key(x.lemma_1))
-    pr.yes(len(dpd_db))
+class EbookWords(NamedTuple):
+    """The words the ebook is limited to."""
+
+    combined_text_set: set[str]
+    all_words_set: set[str]
 
+
+class EbookLetter(NamedTuple):
+    """The entries of one letter file, with their ids already numbered."""
+
+    counter: int
+    letter: str
+    headwords: list[tuple[int, int]]  # (entry id, DpdHeadword.id)
+    deconstructions: list[tuple[int, str]]  # (entry id, Lookup.lookup_key)
+
+
+def make_ebook_words(pth: ProjectPaths, db_session: Session) -> EbookWords:
     # limit the extent of the dictionary to an ebt text set
     ebt_books = [
         "vin1",
@@ -91,13 +104,7 @@ def render_xhtml(
     pr.yes(len(sc_text_set))
     combined_text_set = cst_text_set | sc_text_set
 
-    # words in deconstructor in cst_text_set & sc_text_set
-    pr.green("querying lookup for deconstructor")
-    deconstructor_db = (
-        db_session.query(Lookup)
-        .filter(Lookup.deconstructor != "", Lookup.lookup_key.in_(combined_text_set))
-        .all()
-    )
+    pr.green("making deconstructor words set")
     words_in_deconstructor_set = make_words_in_deconstructions(db_session)
     pr.yes(len(words_in_deconstructor_set))
 
@@ -106,27 +113,68 @@ def render_xhtml(
     all_words_set = combined_text_set | words_in_deconstructor_set
     pr.yes(len(all_words_set))
 
+    return EbookWords(combined_text_set, all_words_set)
+
+
+def make_inflection_list(i: DpdHeadword, all_words_set: set[str]) -> list[str]:
+    """The inflections of a headword which are in all_words_set."""
+
+    # only add inflections in all words set
+    inflections_set: set[str] = (
+        set(i.inflections_list_all) & all_words_set
+    )  # include api ca eva iti
+
+    # # add one clean inflection without diacritics
+    # inflections_set.add(diacritics_cleaner(i.lemma_clean))
+
+    # add niggahitas
+    inflections_set = set(add_niggahitas(list(inflections_set), all=False))
+
+    # sort into pali alphabetical order
+    return pali_list_sorter(list(inflections_set))
+
+
+def is_in_all_words(lookup_key: str, all_words_set: set[str]) -> bool:
+    """Deconstructor words which are in all_words_set."""
+
+    return bool(set(lookup_key) & all_words_set)
+
+
+def query_deconstructor(db_session: Session, combined_text_set: set[str]):
+    """words in deconstructor in cst_text_set & sc_text_set"""
+
+    return (
+        db_session.query(Lookup)
+        .filter(Lookup.deconstructor != "", Lookup.lookup_key.in_(combined_text_set))
+        .order_by(Lookup.lookup_key)
+    )
+
+
+def letter_file_path(pth: ProjectPaths, counter: int, letter: str) -> Path:
+    ascii_letter = diacritics_cleaner(letter)
+    return pth.epub_text_dir.joinpath(f"{counter}_{ascii_letter}.xhtml")
+
+
+def render_xhtml(pth: ProjectPaths, db_session: Session, words: EbookWords):
+    """Render every letter in this process, holding the whole dictionary
+    in memory. render_xhtml_parallel makes the same files."""
+
+    pr.green("querying dpd db")
+    dpd_db = db_session.query(DpdHeadword).order_by(DpdHeadword.id).all()
+    dpd_db = sorted(dpd_db, key=lambda x: pali_sort_key(x.lemma_1))
+    pr.yes(len(dpd_db))
+
+    pr.green("querying lookup for deconstructor")
+    deconstructor_db = query_deconstructor(db_session, words.combined_text_set).all()
+    pr.yes(len(deconstructor_db))
+
     # only include inflections which exist in all_words_set
     pr.green("creating inflections dict")
 
     inflections_dict: Dict[int, list[str]] = {}
     inflections_counter = 0
     for i in dpd_db:
-        # only add inflections in all words set
-        inflections_set: set[str] = (
-            set(i.inflections_list_all) & all_words_set
-        )  # include api ca eva iti
-
-        # # add one clean inflection without diacritics
-        # inflections_set.add(diacritics_cleaner(i.lemma_clean))
-
-        # add niggahitas
-        inflections_set = set(add_niggahitas(list(inflections_set), all=False))
-
-        # sort into pali alphabetical order
-        inflections_sorted: list[str] = pali_list_sorter(list(inflections_set))
-
-        # update dict
+        inflections_sorted = make_inflection_list(i, words.all_words_set)
         inflections_dict[i.id] = inflections_sorted
         inflections_counter += len(inflections_sorted)
 
@@ -154,7 +202,7 @@ def render_xhtml(
     # add deconstructor words which are in all_words_set
     pr.green_title("add deconstructor words")
     for counter, i in enumerate(deconstructor_db):
-        if bool(set(i.lookup_key) & all_words_set):
+        if is_in_all_words(i.lookup_key, words.all_words_set):
             first_letter = find_first_letter(i.lookup_key)
             entry = render_deconstructor_entry(pth, id_counter, i)
             letter_dict[first_letter] += [entry]
@@ -168,22 +216,178 @@ def render_xhtml(
     total = 0
 
     for counter, (letter, entries) in enumerate(letter_dict.items()):
-        ascii_letter = diacritics_cleaner(letter)
         total += len(entries)
         entries = "".join(entries)
 
         xhtml = render_ebook_letter_templ(pth, letter, entries)
-        output_path = pth.epub_text_dir.joinpath(f"{counter}_{ascii_letter}.xhtml")
+        output_path = letter_file_path(pth, counter, letter)
 
         with open(output_path, "w") as f:
             f.write(xhtml)
 
     pr.yes(total)
 
-    db_session.close()
     return id_counter + 1
 
 
+# --------------------------------------------------------------------------------------
+# parallel rendering, one letter file per task
+
+# headwords and deconstructions are read from the db this many at a time,
+# so a worker only ever holds part of one letter
+LETTER_CHUNK_SIZE = 1000
+
+
+def make_letter_plan(
+    db_session: Session, words: EbookWords
+) -> tuple[list[EbookLetter], int]:
+    """Number the entries and sort them into letters, in the same order
+    as render_xhtml, from just the lemmas and lookup keys."""
+
+    pr.green("planning letters")
+
+    letter_dict: dict[str, EbookLetter] = {
+        letter: EbookLetter(counter, letter, [], [])
+        for counter, letter in enumerate(pali_alphabet)
+    }
+
+    headwords = (
+        db_session.query(DpdHeadword.id, DpdHeadword.lemma_1)
+        .order_by(DpdHeadword.id)
+        .all()
+    )
+    headwords = sorted(headwords, key=lambda x: pali_sort_key(x.lemma_1))
+
+    id_counter = 1
+    for headword_id, lemma_1 in headwords:
+        letter_dict[find_first_letter(lemma_1)].headwords.append(
+            (id_counter, headword_id)
+        )
+        id_counter += 1
+
+    deconstructor_keys = query_deconstructor(
+        db_session, words.combined_text_set
+    ).with_entities(Lookup.lookup_key)
+    for (lookup_key,) in deconstructor_keys:
+        if is_in_all_words(lookup_key, words.all_words_set):
+            letter_dict[find_first_letter(lookup_key)].deconstructions.append(
+                (id_counter, lookup_key)
+            )
+            id_counter += 1
+
+    pr.yes(id_counter - 1)
+    return list(letter_dict.values()), id_counter + 1
+
+
+class LetterContext:
+    """What each worker needs to render its letters."""
+
+    def __init__(self, pth: ProjectPaths, all_words_set: set[str]) -> None:
+        self.pth = pth
+        self.all_words_set = all_words_set
+        self.db_session = get_db_session(pth.dpd_db_path)
+
+
+_context: Optional[LetterContext] = None
+
+
+def _init_worker(pth: ProjectPaths, all_words_set: set[str]) -> None:
+    global _context
+    _context = LetterContext(pth, all_words_set)
+
+
+def chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def render_letter(letter: EbookLetter) -> tuple[EbookLetter, Path]:
+    """Render one letter in a worker, writing its entries to the letter file
+    a chunk at a time."""
+
+    if _context is None:
+        raise Exception("render_letter only runs in a render_xhtml_parallel worker")
+    pth = _context.pth
+    db_session = _context.db_session
+
+    marker = "\x00entries\x00"
+    head, tail = render_ebook_letter_templ(pth, letter.letter, marker).split(marker)
+
+    output_path = letter_file_path(pth, letter.counter, letter.letter)
+    with open(output_path, "w") as f:
+        f.write(head)
+
+        for chunk in chunks(letter.headwords, LETTER_CHUNK_SIZE):
+            headwords = {
+                i.id: i
+                for i in db_session.query(DpdHeadword).filter(
+                    DpdHeadword.id.in_([headword_id for __, headword_id in chunk])
+                )
+            }
+            for id_counter, headword_id in chunk:
+                i = headwords[headword_id]
+                inflection_list = make_inflection_list(i, _context.all_words_set)
+                f.write(render_ebook_entry(pth, id_counter, i, inflection_list))
+            db_session.expunge_all()
+
+        for chunk in chunks(letter.deconstructions, LETTER_CHUNK_SIZE):
+            deconstructions = {
+                i.lookup_key: i
+                for i in db_session.query(Lookup).filter(
+                    Lookup.lookup_key.in_([lookup_key for __, lookup_key in chunk])
+                )
+            }
+            for id_counter, lookup_key in chunk:
+                i = deconstructions[lookup_key]
+                f.write(render_deconstructor_entry(pth, id_counter, i))
+            db_session.expunge_all()
+
+        f.write(tail)
+
+    return letter, output_path
+
+
+def render_xhtml_parallel(
+    pth: ProjectPaths,
+    db_session: Session,
+    words: EbookWords,
+    epub_zip: Optional["EpubZip"] = None,
+    processes: Optional[int] = None,
+):
+    """Render the letters across a pool of workers. Each worker reads and
+    renders its letter's entries in chunks and writes the letter file itself,
+    which is added to epub_zip as soon as it's done."""
+
+    letters, id_counter = make_letter_plan(db_session, words)
+
+    # the biggest letters first, so they don't finish last
+    letters_by_size = sorted(
+        letters, key=lambda x: len(x.headwords) + len(x.deconstructions), reverse=True
+    )
+
+    pr.green_title("rendering letters")
+    processes = processes or psutil.cpu_count() or 1
+    total = 0
+    with Pool(
+        processes=processes,
+        initializer=_init_worker,
+        initargs=(pth, words.all_words_set),
+    ) as pool:
+        for counter, (letter, output_path) in enumerate(
+            pool.imap_unordered(render_letter, letters_by_size)
+        ):
+            if epub_zip is not None:
+                epub_zip.add(output_path)
+            letter_total = len(letter.headwords) + len(letter.deconstructions)
+            total += letter_total
+            pr.counter(counter, len(letters), f"{letter.letter} {letter_total}")
+
+    pr.green("saving entries xhtml")
+    pr.yes(total)
+
+    return id_counter
+
+
 # --------------------------------------------------------------------------------------
 # functions to create the various templates
 
@@ -235,7 +439,7 @@ def render_ebook_entry(
 
     examples = render_example_templ(pth, i)
 
-    ebook_entry_templ = Template(filename=str(pth.ebook_entry_templ_path))
+    ebook_entry_templ = mako_template(pth.ebook_entry_templ_path)
 
     return str(
         ebook_entry_templ.render(
@@ -261,7 +465,7 @@ def render_grammar_templ(
 
         meaning = f"{make_meaning_combo_html(i)}"
 
-        ebook_grammar_templ = Template(filename=str(pth.ebook_grammar_templ_path))
+        ebook_grammar_templ = mako_template(pth.ebook_grammar_templ_path)
 
         return str(
             ebook_grammar_templ.render(
@@ -281,7 +485,7 @@ def render_example_templ(
 ) -> str:
     """render sutta examples html"""
 
-    ebook_example_templ = Template(filename=str(pth.ebook_example_templ_path))
+    ebook_example_templ = mako_template(pth.ebook_example_templ_path)
 
     if i.meaning_1 and i.example_1:
         return str(ebook_example_templ.render(i=i))
@@ -295,9 +499,7 @@ def render_deconstructor_entry(pth: ProjectPaths, counter: int, i: Lookup) -> st
     construction = i.lookup_key
     deconstruction = "<br/>".join(i.deconstructor_unpack)
 
-    ebook_deconstructor_templ = Template(
-        filename=str(pth.ebook_deconstructor_templ_path)
-    )
+    ebook_deconstructor_templ = mako_template(pth.ebook_deconstructor_templ_path)
 
     return str(
         ebook_deconstructor_templ.render(
@@ -308,7 +510,7 @@ def render_deconstructor_entry(pth: ProjectPaths, counter: int, i: Lookup) -> st
 
 def render_ebook_letter_templ(pth: ProjectPaths, letter: str, entries: str) -> str:
     """Render all entries for a single letter."""
-    ebook_letter_templ = Template(filename=str(pth.ebook_letter_templ_path))
+    ebook_letter_templ = mako_template(pth.ebook_letter_templ_path)
     return str(ebook_letter_templ.render(letter=letter, entries=entries))
 
 
@@ -346,9 +548,7 @@ def render_abbreviation_entry(
 ) -> str:
     """Render a single abbreviations entry."""
 
-    ebook_abbreviation_entry_templ = Template(
-        filename=str(pth.ebook_abbrev_entry_templ_path)
-    )
+    ebook_abbreviation_entry_templ = mako_template(pth.ebook_abbrev_entry_templ_path)
 
     return str(ebook_abbreviation_entry_templ.render(counter=counter, i=i))
 
@@ -361,7 +561,7 @@ def save_title_page_xhtml(pth: ProjectPaths):
     date = current_datetime.strftime("%Y-%m-%d")
     time = current_datetime.strftime("%H:%M")
 
-    ebook_title_page_templ = Template(filename=str(pth.ebook_title_page_templ_path))
+    ebook_title_page_templ = mako_template(pth.ebook_title_page_templ_path)
 
     xhtml = str(ebook_title_page_templ.render(date=date, time=time))
 
@@ -382,7 +582,7 @@ def save_content_opf_xhtml(
 
     date_time_zulu = current_datetime.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-    ebook_content_opf_templ = Template(filename=str(pth.ebook_content_opf_templ_path))
+    ebook_content_opf_templ = mako_template(pth.ebook_content_opf_templ_path)
 
     content = str(ebook_content_opf_templ.render(date_time_zulu=date_time_zulu))
 
@@ -392,14 +592,43 @@ def save_content_opf_xhtml(
     pr.yes("OK")
 
 
+class EpubZip:
+    """The epub zip, written while its files are still being made.
+    The mimetype comes first and is stored uncompressed, as EPUB requires."""
+
+    def __init__(self, pth: ProjectPaths) -> None:
+        self.epub_dir = pth.epub_dir
+        self._zipf = ZipFile(pth.dpd_epub_path, "w", ZIP_DEFLATED)
+        self._added: set[str] = set()
+        self.add(self.epub_dir / "mimetype", ZIP_STORED)
+
+    def __enter__(self) -> "EpubZip":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def add(self, file_path: Path | str, compress_type: int = ZIP_DEFLATED) -> None:
+        arcname = os.path.relpath(file_path, self.epub_dir)
+        if arcname not in self._added:
+            self._zipf.write(file_path, arcname, compress_type)
+            self._added.add(arcname)
+
+    def add_rest(self) -> None:
+        """Add every file in the epub dir which isn't in the zip yet."""
+        for root, _, files in os.walk(self.epub_dir):
+            for file in files:
+                self.add(os.path.join(root, file))
+
+    def close(self) -> None:
+        self._zipf.close()
+
+
 def zip_epub(pth: ProjectPaths):
     """Zip up the epub dir and name it dpd-kindle.epub."""
     pr.green("zipping up epub")
-    with ZipFile(pth.dpd_epub_path, "w", ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(pth.epub_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                zipf.write(file_path, os.path.relpath(file_path, pth.epub_dir))
+    with EpubZip(pth) as epub_zip:
+        epub_zip.add_rest()
     pr.yes("OK")
 
 
@@ -434,11 +663,18 @@ def main():
     pr.title("rendering dpd for ebook")
     if config_test("exporter", "make_ebook", "yes"):
         pth = ProjectPaths()
-        id_counter = render_xhtml(pth)
-        save_abbreviations_xhtml_page(pth, id_counter)
-        save_title_page_xhtml(pth)
-        zip_epub(pth)
+        db_session = get_db_session(pth.dpd_db_path)
+        words = make_ebook_words(pth, db_session)
+        with EpubZip(pth) as epub_zip:
+            id_counter = render_xhtml_parallel(pth, db_session, words, epub_zip)
+            save_abbreviations_xhtml_page(pth, id_counter)
+            save_title_page_xhtml(pth)
+            pr.green("zipping up epub")
+            epub_zip.add_rest()
+            pr.yes("OK")
+        db_session.close()
         make_mobi(pth)
+        get_template_registry().print_stats()
     else:
         pr.green_title("disabled in config.ini")
     pr.toc()
@@ -2,14 +2,14 @@
 
 """Export simplified DPD data for Kobo Reader"""
 
-from jinja2 import Environment, FileSystemLoader
-
 from db.db_helpers import get_db_session
 from db.models import DpdHeadword, Lookup
 from tools.cst_sc_text_sets import make_cst_text_set, make_sc_text_set
+from tools.headword_iterator import iter_headwords
 from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
+from tools.template_registry import jinja_template
 
 from pathlib import Path
 from tools.goldendict_exporter import DictEntry, DictInfo, DictVariables
@@ -22,11 +22,12 @@ class GlobalData:
         self.pth = ProjectPaths()
         self.db_session = get_db_session(self.pth.dpd_db_path)
         self.dict_data: list[DictEntry] = []
-        self.env = Environment(
-            loader=FileSystemLoader("exporter/kobo/templates"), autoescape=True
+        self.dpd_template = jinja_template(
+            "exporter/kobo/templates", "/dpd_headword.html", autoescape=True
+        )
+        self.lookup_template = jinja_template(
+            "exporter/kobo/templates", "/lookup.html", autoescape=True
         )
-        self.dpd_template = self.env.get_template("/dpd_headword.html")
-        self.lookup_template = self.env.get_template("/lookup.html")
         with open("exporter/kobo/templates/kobo.css") as f:
             self.css = f.read()
         self.word_set = self.make_word_set()
@@ -76,10 +77,8 @@ class GlobalData:
 def compile_dict_data(g: GlobalData):
     pr.green_title("compiling dict data")
 
-    db = g.db_session.query(DpdHeadword).all()
-    db = sorted(db, key=lambda x: pali_sort_key(x.lemma_1))
-    db_len = len(db)
-    for count, i in enumerate(db):
+    db_len = g.db_session.query(DpdHeadword).count()
+    for count, i in enumerate(iter_headwords(g.db_session, pali_order=True)):
         html = g.dpd_template.render(i=i, css=g.css)
 
         dict_entry = DictEntry(
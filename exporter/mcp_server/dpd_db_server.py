@@ -14,8 +14,8 @@ DATABASE_PATH = Path("dpd.db")
 
 class DpdDbServer:
     def __init__(self):
-        from db.db_helpers import get_db_session
-        self.db_session = get_db_session(DATABASE_PATH)
+        from db.db_helpers import get_db_session_readonly
+        self.db_session = get_db_session_readonly(DATABASE_PATH)
         self.server = Server("dpd-db-server", "0.1.0")
         
         @self.server.list_tools()
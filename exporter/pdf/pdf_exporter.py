@@ -3,32 +3,44 @@
 """Export DPD to PDF using Typst and Jinja templates."""
 
 import re
+from functools import partial
 
 # import subprocess
 import typst
 
-from jinja2 import Environment, FileSystemLoader
-
 from db.db_helpers import get_db_session
 from db.models import (
-    DpdHeadword,
     FamilyCompound,
     FamilyIdiom,
     FamilyRoot,
     FamilyWord,
     Lookup,
 )
+from exporter.pdf.pdf_sections import Contents, TypstPart, build_sectioned_pdf
 from tools.configger import config_test
 from tools.date_and_time import year_month_day_dash
+from tools.headword_iterator import iter_headwords
 from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
+from tools.template_registry import jinja_template
 from tools.tsv_read_write import read_tsv_dot_dict
 from tools.zip_up import zip_up_file
 
 debug = False
 
 
+def typst_template(name: str):
+    """Jinja templates with block tags which don't clash with Typst."""
+    return jinja_template(
+        "exporter/pdf/templates",
+        name,
+        autoescape=True,
+        block_start_string="////",
+        block_end_string="\\\\\\\\",
+    )
+
+
 class GlobalVars:
     # database
     pth = ProjectPaths()
@@ -38,27 +50,23 @@ class GlobalVars:
     typst_data: list[str] = []
     used_letters_single: list[str] = []
 
-    # jinja env
-    env = Environment(
-        loader=FileSystemLoader("exporter/pdf/templates"),
-        autoescape=True,
-        block_start_string="////",
-        block_end_string="\\\\\\\\",
-    )
+    # where each part of the sectioned build starts in typst_data:
+    # (index, name, continues the section before it)
+    typst_parts: list[tuple[int, str, bool]] = []
 
     # templates
-    layout_templ = env.get_template("layout.typ")
-    front_matter_templ = env.get_template("front_matter.typ")
-    first_letter_templ = env.get_template("first_letter.typ")
-    abbreviations_templ = env.get_template("abbreviations.typ")
-    headword_templ = env.get_template("lite_headword.typ")
-    epd_templ = env.get_template("lite_epd.typ")
-    root_fam_templ = env.get_template("lite_family_root.typ")
-    word_fam_templ = env.get_template("lite_family_word.typ")
-    compound_fam_templ = env.get_template("lite_family_compound.typ")
-    idiom_fam_templ = env.get_template("lite_family_idiom.typ")
-    bibliography_templ = env.get_template("bibliography.typ")
-    thanks_templ = env.get_template("thanks.typ")
+    layout_templ = typst_template("layout.typ")
+    front_matter_templ = typst_template("front_matter.typ")
+    first_letter_templ = typst_template("first_letter.typ")
+    abbreviations_templ = typst_template("abbreviations.typ")
+    headword_templ = typst_template("lite_headword.typ")
+    epd_templ = typst_template("lite_epd.typ")
+    root_fam_templ = typst_template("lite_family_root.typ")
+    word_fam_templ = typst_template("lite_family_word.typ")
+    compound_fam_templ = typst_template("lite_family_compound.typ")
+    idiom_fam_templ = typst_template("lite_family_idiom.typ")
+    bibliography_templ = typst_template("bibliography.typ")
+    thanks_templ = typst_template("thanks.typ")
     date = year_month_day_dash()
 
     # colours
@@ -66,6 +74,12 @@ class GlobalVars:
     colour2: str = "#65DBFF"
 
 
+def start_part(g: GlobalVars, name: str, continues: bool = False):
+    """Each top-level section and first letter is a separate part
+    in the sectioned build."""
+    g.typst_parts.append((len(g.typst_data), name, continues))
+
+
 def make_layout(g: GlobalVars):
     pr.green("compiling layout")
     g.typst_data.append(g.layout_templ.render())
@@ -74,6 +88,7 @@ def make_layout(g: GlobalVars):
 
 def make_front_matter(g: GlobalVars):
     pr.green("compiling front matter")
+    start_part(g, "front matter")
     g.typst_data.append(g.front_matter_templ.render())
     pr.yes("ok")
 
@@ -88,6 +103,7 @@ def make_abbreviations(g: GlobalVars):
         if not re.findall(r"[A-Z][A-z]", i.abbrev):
             abbreviations_data.append(i)
 
+    start_part(g, "Abbreviations")
     g.typst_data.append("#heading(level: 1)[Abbreviations]\n")
     g.typst_data.append(
         "#set par(first-line-indent: 0pt, hanging-indent: 0em, spacing: 0.65em)\n"
@@ -100,11 +116,11 @@ def make_pali_to_english(g: GlobalVars):
     pr.green("compiling pali to english")
 
     if debug is True:
-        dpd_db = g.db_session.query(DpdHeadword).limit(100).all()
+        dpd_db = iter_headwords(g.db_session, limit=100, pali_order=True)
     else:
-        dpd_db = g.db_session.query(DpdHeadword).all()
-    dpd_db = sorted(dpd_db, key=lambda x: pali_sort_key(x.lemma_1))
+        dpd_db = iter_headwords(g.db_session, pali_order=True)
 
+    start_part(g, "Pāḷi to English Dictionary")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#set page(columns: 1)\n")
     g.typst_data.append("#heading(level: 1)[Pāḷi to English Dictionary]\n")
@@ -112,16 +128,18 @@ def make_pali_to_english(g: GlobalVars):
         "#set par(first-line-indent: 0pt, hanging-indent: 1em, spacing: 0.65em)\n"
     )
 
-    for counter, i in enumerate(dpd_db):
+    counter = 0
+    for counter, i in enumerate(dpd_db, start=1):
         first_letter = i.lemma_1[0]
         if first_letter not in g.used_letters_single:
+            start_part(g, first_letter, continues=True)
             first_letter_render = g.first_letter_templ.render(first_letter=first_letter)
             g.typst_data.append(first_letter_render)
             g.used_letters_single.append(first_letter)
 
         g.typst_data.append(g.headword_templ.render(i=i, date=g.date))
 
-    pr.yes(len(dpd_db))
+    pr.yes(counter)
 
 
 def make_english_to_pali(g: GlobalVars):
@@ -134,6 +152,7 @@ def make_english_to_pali(g: GlobalVars):
     epd_db = sorted(epd_db, key=lambda x: x.lookup_key.casefold())
 
     g.used_letters_single = []
+    start_part(g, "English to Pāḷi Dictionary")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#heading(level: 1)[English to Pāḷi Dictionary]\n")
     g.typst_data.append(
@@ -155,6 +174,7 @@ def make_english_to_pali(g: GlobalVars):
             continue
 
         if first_letter not in g.used_letters_single:
+            start_part(g, first_letter, continues=True)
             first_letter_render = g.first_letter_templ.render(first_letter=first_letter)
             g.typst_data.append(first_letter_render)
             g.used_letters_single.append(first_letter)
@@ -177,6 +197,7 @@ def make_root_families(g: GlobalVars):
     )
 
     g.used_letters_single = []
+    start_part(g, "Root Families")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#heading(level: 1)[Root Families]\n")
 
@@ -185,6 +206,7 @@ def make_root_families(g: GlobalVars):
             first_letter = i.root_key[1]
 
             if first_letter not in g.used_letters_single:
+                start_part(g, first_letter, continues=True)
                 first_letter_render = g.first_letter_templ.render(
                     first_letter=first_letter
                 )
@@ -206,6 +228,7 @@ def make_word_families(g: GlobalVars):
     word_fam_db = sorted(word_fam_db, key=lambda x: pali_sort_key(x.word_family))
 
     g.used_letters_single = []
+    start_part(g, "Word Families")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#heading(level: 1)[Word Families]\n")
 
@@ -213,6 +236,7 @@ def make_word_families(g: GlobalVars):
         first_letter = i.word_family[0]
 
         if first_letter not in g.used_letters_single:
+            start_part(g, first_letter, continues=True)
             first_letter_render = g.first_letter_templ.render(first_letter=first_letter)
             g.typst_data.append(first_letter_render)
             g.used_letters_single.append(first_letter)
@@ -234,6 +258,7 @@ def make_compound_families(g: GlobalVars):
     )
 
     g.used_letters_single = []
+    start_part(g, "Compound Families")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#heading(level: 1)[Compound Families]\n")
 
@@ -241,6 +266,7 @@ def make_compound_families(g: GlobalVars):
         first_letter = i.compound_family[0]
 
         if first_letter not in g.used_letters_single:
+            start_part(g, first_letter, continues=True)
             first_letter_render = g.first_letter_templ.render(first_letter=first_letter)
             g.typst_data.append(first_letter_render)
             g.used_letters_single.append(first_letter)
@@ -260,6 +286,7 @@ def make_idiom_families(g: GlobalVars):
     idioms_fam_db = sorted(idioms_fam_db, key=lambda x: pali_sort_key(x.idiom))
 
     g.used_letters_single = []
+    start_part(g, "Idiom Families")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#heading(level: 1)[Idiom Families]\n")
 
@@ -267,6 +294,7 @@ def make_idiom_families(g: GlobalVars):
         first_letter = i.idiom[0]
 
         if first_letter not in g.used_letters_single:
+            start_part(g, first_letter, continues=True)
             first_letter_render = g.first_letter_templ.render(first_letter=first_letter)
             g.typst_data.append(first_letter_render)
             g.used_letters_single.append(first_letter)
@@ -282,6 +310,7 @@ def make_bibliography(g: GlobalVars):
     bibliography_data = read_tsv_dot_dict(g.pth.bibliography_tsv_path)
 
     g.used_letters_single = []
+    start_part(g, "Bibliography")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#heading(level: 1)[Bibliography]\n")
     g.typst_data.append("An incomplete list of references works")
@@ -307,6 +336,7 @@ def make_thanks(g: GlobalVars):
         thanks_data.append(i)
 
     g.used_letters_single = []
+    start_part(g, "Thanks")
     g.typst_data.append("#pagebreak()\n")
     g.typst_data.append("#heading(level: 1)[Thanks]\n")
     g.typst_data.append(g.thanks_templ.render(data=thanks_data))
@@ -317,21 +347,21 @@ def make_thanks(g: GlobalVars):
 def clean_up_typst_data(g: GlobalVars):
     pr.green("cleaning up")
 
-    cleaned_data = []
-    for i in g.typst_data:
-        # remove double blank lines
-        cleaned_string = re.sub(r"^$\n\n", "\n", i, flags=re.MULTILINE)
+    g.typst_data = [clean_up_typst_string(i) for i in g.typst_data]
+    pr.yes("ok")
 
-        # remove comments
-        cleaned_string = re.sub(r"^//.+$\n", "", cleaned_string, flags=re.MULTILINE)
 
-        # remove double lines with only spaces
-        cleaned_string = re.sub(r"^ *$\n *\n", "", cleaned_string, flags=re.MULTILINE)
+def clean_up_typst_string(typst_string: str) -> str:
+    # remove double blank lines
+    cleaned_string = re.sub(r"^$\n\n", "\n", typst_string, flags=re.MULTILINE)
 
-        cleaned_data.append(cleaned_string)
+    # remove comments
+    cleaned_string = re.sub(r"^//.+$\n", "", cleaned_string, flags=re.MULTILINE)
 
-    g.typst_data = cleaned_data
-    pr.yes("ok")
+    # remove double lines with only spaces
+    cleaned_string = re.sub(r"^ *$\n *\n", "", cleaned_string, flags=re.MULTILINE)
+
+    return cleaned_string
 
 
 def save_typist_file(g: GlobalVars):
@@ -364,6 +394,39 @@ def export_to_pdf(g: GlobalVars):
         pr.red(f"\n{e}")
 
 
+def split_typst_parts(g: GlobalVars) -> tuple[str, list[TypstPart]]:
+    """The layout, and the parts after the front matter."""
+
+    starts = g.typst_parts + [(len(g.typst_data), "", False)]
+    layout = "".join(g.typst_data[: starts[0][0]])
+    parts = [
+        TypstPart(name, "".join(g.typst_data[start:end]), continues)
+        for (start, name, continues), (end, __, __) in zip(starts[1:], starts[2:])
+    ]
+    return layout, parts
+
+
+def render_front_matter(g: GlobalVars, contents: Contents) -> str:
+    return clean_up_typst_string(g.front_matter_templ.render(contents=contents))
+
+
+def export_sectioned_pdf(g: GlobalVars):
+    """Compile each part separately and merge them, see pdf_sections.py"""
+
+    pr.green_title("rendering pdf in parts")
+
+    layout, parts = split_typst_parts(g)
+    try:
+        stats = build_sectioned_pdf(
+            g.pth, layout, partial(render_front_matter, g), parts
+        )
+        pr.summary("parts", stats.parts)
+        pr.summary("compiled", stats.compiled)
+        pr.summary("pages", stats.pages)
+    except Exception as e:
+        pr.red(f"\n{e}")
+
+
 def zip_up_pdf(g: GlobalVars):
     pr.green("zipping up pdf")
 
@@ -374,16 +437,7 @@ def zip_up_pdf(g: GlobalVars):
     pr.yes("ok")
 
 
-def main():
-    pr.tic()
-    pr.title("export to pdf with typst")
-
-    if not config_test("exporter", "make_pdf", "yes"):
-        pr.green_title("disabled in config.ini")
-        pr.toc()
-        return
-
-    g = GlobalVars()
+def make_typst_data(g: GlobalVars):
     make_layout(g)
     make_front_matter(g)
     make_abbreviations(g)
@@ -396,8 +450,24 @@ def main():
     make_bibliography(g)
     make_thanks(g)
     clean_up_typst_data(g)
-    save_typist_file(g)
-    export_to_pdf(g)
+
+
+def main():
+    pr.tic()
+    pr.title("export to pdf with typst")
+
+    if not config_test("exporter", "make_pdf", "yes"):
+        pr.green_title("disabled in config.ini")
+        pr.toc()
+        return
+
+    g = GlobalVars()
+    make_typst_data(g)
+    if config_test("pdf", "sectioned", "yes"):
+        export_sectioned_pdf(g)
+    else:
+        save_typist_file(g)
+        export_to_pdf(g)
     zip_up_pdf(g)
     pr.toc()
 
@@ -0,0 +1,328 @@
+"""Compile the PDF dictionary in parts, one for each top-level section
+and each first letter, and merge them into one PDF.
+
+Each part is compiled on its own in a pool of workers, with the layout
+and the set rules of all the parts before it. Parts are saved in
+exporter/pdf/sections under the hash of their source, so a part which
+hasn't changed since the last build isn't compiled again.
+
+Parts are compiled without page numbers. The page numbers are a separate
+document of empty pages, which compiles quickly, laid over the merged
+pages, so a part which gains a page doesn't change the parts after it.
+The front matter contents are made from the parts' outlines.
+
+Usage:
+parts = [TypstPart("Abbreviations", source), TypstPart("a", source, True), ...]
+build_sectioned_pdf(pth, layout, render_front_matter, parts)
+"""
+
+import hashlib
+import json
+import multiprocessing
+import re
+from functools import partial
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import psutil
+import typst
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import IndirectObject
+
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+# (title, page) of each level 1 heading, for the front matter contents
+Contents = list[tuple[str, int]]
+
+# the front matter is compiled again while its contents' page numbers change
+CONTENTS_ROUNDS = 3
+
+PAGEBREAK = "#pagebreak()"
+SET_RULE = re.compile(r"#set \w+\(")
+
+# parts don't show page numbers, the page numbers document does
+NO_FOOTER = "#set page(footer: [])\n"
+
+
+class TypstPart(NamedTuple):
+    name: str
+    source: str
+    # a first letter, whose outline goes under the section before it
+    continues: bool = False
+
+
+class OutlineItem(NamedTuple):
+    title: str
+    page: int
+    children: list["OutlineItem"]
+
+
+class SectionStats(NamedTuple):
+    parts: int
+    compiled: int
+    pages: int
+
+
+def split_set_rules(source: str) -> list[tuple[bool, str]]:
+    """Split the source into top-level set rules and everything else,
+    as (is_set_rule, text). Set rules can run over several lines."""
+
+    chunks: list[tuple[bool, str]] = []
+    rule: list[str] = []
+    depth = 0
+    for line in source.splitlines(keepends=True):
+        if not rule and not SET_RULE.match(line):
+            chunks.append((False, line))
+            continue
+        rule.append(line)
+        depth += line.count("(") - line.count(")")
+        if depth <= 0:
+            text = "".join(rule)
+            chunks.append((True, text if text.endswith("\n") else f"{text}\n"))
+            rule = []
+            depth = 0
+    if rule:
+        chunks.append((False, "".join(rule)))
+    return chunks
+
+
+def set_rules(source: str) -> list[str]:
+    return [text for is_rule, text in split_set_rules(source) if is_rule]
+
+
+def leading_set_rules(source: str) -> list[str]:
+    """The set rules before any content."""
+
+    rules = []
+    for is_rule, text in split_set_rules(source):
+        if is_rule:
+            rules.append(text)
+        elif text.strip():
+            break
+    return rules
+
+
+def strip_pagebreaks(source: str) -> str:
+    """A part always starts and ends a page, so a page break at its start,
+    or at its end before some set rules, would only add an empty page."""
+
+    body = source.strip()
+    if body.startswith(PAGEBREAK):
+        body = body[len(PAGEBREAK) :]
+
+    index = body.rfind(PAGEBREAK)
+    if index != -1:
+        after = body[index + len(PAGEBREAK) :]
+        if all(is_rule or not text.strip() for is_rule, text in split_set_rules(after)):
+            body = body[:index] + after
+
+    return f"{body.strip()}\n"
+
+
+def make_part_sources(layout: str, parts: list[TypstPart]) -> list[str]:
+    """Each part's page breaks stripped, after the layout
+    and the set rules of the parts before it."""
+
+    sources = []
+    rules: list[str] = []
+    for part in parts:
+        body = strip_pagebreaks(part.source)
+        sources.append(f"{layout}{''.join(rules)}{NO_FOOTER}{body}")
+        rules.extend(set_rules(body))
+    return sources
+
+
+def make_numbers_source(layout: str, parts: list[TypstPart], pages: list[int]) -> str:
+    """Empty pages with the parts' page numbering, one for each page
+    of the merged parts."""
+
+    source = [layout]
+    for part, page_count in zip(parts, pages):
+        body = strip_pagebreaks(part.source)
+        leading_rules = leading_set_rules(body)
+        source.extend(leading_rules)
+        source.append("#page[]\n" * page_count)
+        source.extend(set_rules(body)[len(leading_rules) :])
+    return "".join(source)
+
+
+def compile_part(typ_path: Path, root: Path) -> Path:
+    pdf_path = typ_path.with_suffix(".pdf")
+    typst.compile(str(typ_path), output=str(pdf_path), root=str(root))
+    return pdf_path
+
+
+def compile_sources(
+    sections_dir: Path, sources: list[str], processes: Optional[int] = None
+) -> tuple[list[Path], int]:
+    """The pdf of each source, compiling only those which aren't saved yet.
+    Paths like /images/... are in the directory above sections_dir,
+    as they are for pth.typst_lite_data_path."""
+
+    pdf_paths = []
+    missing: dict[Path, None] = {}
+    for source in sources:
+        key = hashlib.sha256(source.encode()).hexdigest()
+        typ_path = sections_dir / f"{key}.typ"
+        pdf_paths.append(typ_path.with_suffix(".pdf"))
+        if not typ_path.with_suffix(".pdf").exists():
+            typ_path.write_text(source)
+            missing[typ_path] = None
+
+    if missing:
+        processes = min(processes or psutil.cpu_count() or 1, len(missing))
+        # spawned, as typst's threads don't survive a fork
+        with multiprocessing.get_context("spawn").Pool(processes) as pool:
+            compile_in_root = partial(compile_part, root=sections_dir.parent)
+            for __ in pool.imap_unordered(compile_in_root, missing):
+                pass
+
+    return pdf_paths, len(missing)
+
+
+def read_outline(reader: PdfReader, items: Optional[list] = None) -> list[OutlineItem]:
+    """The pdf outline as a tree of titles and page indexes."""
+
+    outline: list[OutlineItem] = []
+    for item in reader.outline if items is None else items:
+        if isinstance(item, list):
+            outline[-1].children.extend(read_outline(reader, item))
+        else:
+            page = reader.get_destination_page_number(item)
+            outline.append(OutlineItem(str(item.title), page or 0, []))
+    return outline
+
+
+def make_contents(parts: list[TypstPart], readers: list[PdfReader]) -> Contents:
+    """The level 1 headings of all the parts, with their page numbers
+    in the merged pdf."""
+
+    contents: Contents = []
+    offset = 0
+    for part, reader in zip(parts, readers):
+        if not part.continues:
+            contents.extend(
+                (item.title, offset + item.page + 1) for item in read_outline(reader)
+            )
+        offset += len(reader.pages)
+    return contents
+
+
+def add_outline(
+    writer: PdfWriter,
+    outline: list[OutlineItem],
+    offset: int,
+    parent: Optional[IndirectObject] = None,
+) -> list[IndirectObject]:
+    added = []
+    for item in outline:
+        ref = writer.add_outline_item(item.title, offset + item.page, parent=parent)
+        add_outline(writer, item.children, offset, ref)
+        added.append(ref)
+    return added
+
+
+def merge_parts(
+    parts: list[TypstPart],
+    readers: list[PdfReader],
+    numbers_reader: PdfReader,
+    pdf_path: Path,
+) -> int:
+    """Append the parts' pages, rebuild their outlines as one tree
+    and lay the page numbers over the pages."""
+
+    writer = PdfWriter()
+    section: Optional[IndirectObject] = None
+    offset = 0
+    for part, reader in zip(parts, readers):
+        writer.append(reader, import_outline=False)
+        outline = read_outline(reader)
+        if part.continues and section is not None:
+            add_outline(writer, outline, offset, section)
+        else:
+            added = add_outline(writer, outline, offset)
+            if added:
+                section = added[-1]
+        offset += len(reader.pages)
+
+    for page, numbers_page in zip(writer.pages, numbers_reader.pages):
+        page.merge_page(numbers_page)
+
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(pdf_path, "wb") as f:
+        writer.write(f)
+    return offset
+
+
+def remove_unused(sections_dir: Path, used: list[Path]) -> None:
+    """Remove parts from older builds."""
+
+    used_keys = {pdf_path.stem for pdf_path in used}
+    for file_path in sections_dir.glob("*"):
+        if file_path.suffix in [".typ", ".pdf"] and file_path.stem not in used_keys:
+            file_path.unlink()
+
+
+def build_sectioned_pdf(
+    pth: ProjectPaths,
+    layout: str,
+    render_front_matter: Callable[[Contents], str],
+    parts: list[TypstPart],
+    pdf_path: Optional[Path] = None,
+    processes: Optional[int] = None,
+) -> SectionStats:
+    """Compile the front matter, rendered with its contents, and the parts,
+    and merge them into pdf_path, by default pth.typst_lite_pdf_path."""
+
+    sections_dir = pth.typst_sections_dir
+    sections_dir.mkdir(parents=True, exist_ok=True)
+    contents_path = sections_dir / "contents.json"
+
+    # start with the last build's contents, which are usually still right
+    contents: Contents = []
+    if contents_path.exists():
+        contents = [tuple(entry) for entry in json.loads(contents_path.read_text())]  # type: ignore
+
+    pr.green("compiling parts")
+    all_parts = [TypstPart("front matter", render_front_matter(contents))] + parts
+    pdf_paths, compiled = compile_sources(
+        sections_dir, make_part_sources(layout, all_parts), processes
+    )
+    pr.yes(f"{compiled} / {len(all_parts)}")
+
+    pr.green("compiling front matter contents")
+    for __ in range(CONTENTS_ROUNDS):
+        readers = [PdfReader(pdf_path) for pdf_path in pdf_paths]
+        new_contents = make_contents(all_parts, readers)
+        if new_contents == contents:
+            break
+        contents = new_contents
+        all_parts[0] = TypstPart("front matter", render_front_matter(contents))
+        pdf_paths, front_compiled = compile_sources(
+            sections_dir, make_part_sources(layout, all_parts), processes
+        )
+        compiled += front_compiled
+    else:
+        readers = [PdfReader(pdf_path) for pdf_path in pdf_paths]
+    contents_path.write_text(json.dumps(contents, ensure_ascii=False, indent=1))
+    pr.yes(len(contents))
+
+    pr.green("compiling page numbers")
+    pages = [len(reader.pages) for reader in readers]
+    numbers_paths, __ = compile_sources(
+        sections_dir, [make_numbers_source(layout, all_parts, pages)]
+    )
+    pr.yes(sum(pages))
+
+    pr.green("merging parts")
+    page_count = merge_parts(
+        all_parts,
+        readers,
+        PdfReader(numbers_paths[0]),
+        pdf_path or pth.typst_lite_pdf_path,
+    )
+    remove_unused(sections_dir, pdf_paths + numbers_paths)
+    pr.yes(page_count)
+
+    return SectionStats(len(all_parts), compiled, page_count)
@@ -62,7 +62,7 @@
   International License* \
 
   #image(
-    "images/by-nc-sa.png",
+    "/images/by-nc-sa.png",
     format: "png",
     width: auto,
     height: auto,
@@ -96,7 +96,15 @@
   #heading(level: 1)[Contents]
 ]
 
+//// if contents \\\\
+// the sectioned build lists the parts' level 1 headings itself
+#heading(level: 1, outlined: false)[Contents]
+//// for title, page in contents \\\\
+{{ title }} #box(width: 1fr, repeat(gap: 0.15em)[.]) {{ page }} \
+//// endfor \\\\
+//// else \\\\
 #outline(depth: 1)
+//// endif \\\\
 #pagebreak()
 
 #set page(numbering: "1 / 1")
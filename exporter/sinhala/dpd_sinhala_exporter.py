@@ -2,7 +2,6 @@
 
 """Export Sinhala Version of DPD for GoldenDict and MDict."""
 
-from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 from sqlalchemy.orm import joinedload
 
@@ -18,6 +17,7 @@ from tools.goldendict_exporter import (
 from tools.mdict_exporter import export_to_mdict
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
+from tools.template_registry import jinja_template
 
 
 class ProgData:
@@ -27,9 +27,8 @@ class ProgData:
         self.db = (
             self.db_session.query(DpdHeadword).options(joinedload(DpdHeadword.si)).all()
         )
-        self.env = Environment(loader=FileSystemLoader("."))
-        self.template = self.env.get_template(
-            "exporter/sinhala/dpd_sinhala_template.html"
+        self.template = jinja_template(
+            ".", "exporter/sinhala/dpd_sinhala_template.html"
         )  # TODO add to paths
 
 
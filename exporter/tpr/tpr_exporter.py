@@ -10,7 +10,6 @@ import sqlite3
 from zipfile import ZIP_DEFLATED, ZipFile
 
 import pandas as pd
-from mako.template import Template
 from sqlalchemy.orm import Session
 
 from db.db_helpers import get_db_session
@@ -18,10 +17,12 @@ from db.models import DpdHeadword, DpdRoot, Lookup
 from exporter.goldendict.export_dpd import render_dpd_definition_templ
 from exporter.goldendict.helpers import TODAY
 from tools.configger import config_read, config_test
+from tools.headword_iterator import iter_headwords
 from tools.headwords_clean_set import make_clean_headwords_set
 from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
+from tools.template_registry import mako_template
 from tools.tsv_read_write import read_tsv
 from tools.uposatha_day import uposatha_today
 
@@ -30,7 +31,6 @@ class ProgData:
     def __init__(self) -> None:
         self.pth = ProjectPaths()
         self.db_session: Session = get_db_session(self.pth.dpd_db_path)
-        self.dpd_db = self.make_dpd_db()
 
         self.all_headwords_clean: set[str]
 
@@ -42,19 +42,14 @@ class ProgData:
         self.i2h_df: pd.DataFrame
         self.deconstructor_df: pd.DataFrame
 
-    def make_dpd_db(self):
-        dpd_db = self.db_session.query(DpdHeadword).all()
-        dpd_db = sorted(dpd_db, key=lambda x: pali_sort_key(x.lemma_1))
-        return dpd_db
-
 
 def generate_tpr_data(g: ProgData):
     pr.green("compiling dpd headword data")
-    dpd_length = len(g.dpd_db)
+    dpd_length = g.db_session.query(DpdHeadword).count()
     tpr_data_list = []
-    dpd_definition_templ = Template(filename=str(g.pth.dpd_definition_templ_path))
+    dpd_definition_templ = mako_template(g.pth.dpd_definition_templ_path)
 
-    for counter, i in enumerate(g.dpd_db):
+    for counter, i in enumerate(iter_headwords(g.db_session, pali_order=True)):
         # headword
         html_string = render_dpd_definition_templ(
             g.pth, i, dpd_definition_templ, False, False
@@ -535,7 +530,7 @@ def main():
     g = ProgData()
 
     if g.pth.tpr_release_path.exists():
-        g.all_headwords_clean = make_clean_headwords_set(g.dpd_db)
+        g.all_headwords_clean = make_clean_headwords_set(iter_headwords(g.db_session))
         generate_tpr_data(g)
         generate_deconstructor_data(g)
         add_spelling_mistakes(g)
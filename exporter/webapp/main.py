@@ -7,17 +7,19 @@ from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import sessionmaker
 
-from db.db_helpers import get_db_session
-from db.models import BoldDefinition
+from db.db_helpers import get_db_session_readonly
+from db.models import BoldDefinition, DpdHeadword
 from exporter.webapp.preloads import (
     make_ascii_to_unicode_dict,
     make_headwords_clean_set,
     make_roots_count_dict,
 )
+from exporter.webapp.render_cache import RenderCache
 from exporter.webapp.toolkit import make_dpd_html
+from tools.configger import config_read
 from tools.css_manager import CSSManager
+from tools.fuzzy_index import FuzzyIndex
 from tools.paths import ProjectPaths
 from tools.translit import auto_translit_to_roman
 
@@ -27,16 +29,11 @@ app.mount("/static", StaticFiles(directory="exporter/webapp/static"), name="stat
 
 pth: ProjectPaths = ProjectPaths()
 
-# Create session factory for database connections
-SessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=get_db_session(pth.dpd_db_path).bind
-)
-
 
 @contextmanager
 def get_db():
-    """Provide a transactional scope around a series of operations."""
-    db = SessionLocal()
+    """Provide a read-only session from the shared connection pool."""
+    db = get_db_session_readonly(pth.dpd_db_path)
     try:
         yield db
     finally:
@@ -46,13 +43,42 @@ def get_db():
 # Preload data that is shared across languages
 with get_db() as db_session:
     roots_count_dict = make_roots_count_dict(db_session)
-    headwords_clean_set = make_headwords_clean_set(db_session)
+    headwords_fuzzy_index = FuzzyIndex(make_headwords_clean_set(db_session))
     ascii_to_unicode_dict = make_ascii_to_unicode_dict(db_session)
     bd_count = db_session.query(BoldDefinition).count()
 
 # Set up templates
 templates = Jinja2Templates(directory="exporter/webapp/templates")
 
+# Cache of rendered headwords and roots
+cache_max_mb = int(config_read("webapp", "cache_max_mb", "256") or 256)
+render_cache = RenderCache(cache_max_mb * 1024 * 1024)
+
+
+def warm_up_render_cache(count: int) -> None:
+    """Render the most frequent headwords in advance, by ebt_count."""
+
+    with get_db() as db_session:
+        results = (
+            db_session.query(DpdHeadword.id)
+            .order_by(DpdHeadword.ebt_count.desc())
+            .limit(count)
+            .all()
+        )
+    for i in results:
+        make_dpd_html(
+            str(i.id),
+            pth,
+            templates,
+            roots_count_dict,
+            headwords_fuzzy_index,
+            ascii_to_unicode_dict,
+            render_cache,
+        )
+
+
+warm_up_render_cache(int(config_read("webapp", "cache_warm_up", "0") or 0))
+
 # Update CSS
 css_manager = CSSManager()
 css_manager.update_webapp_css()
@@ -101,8 +127,9 @@ def db_search_html(request: Request, q: str):
         pth,
         templates,
         roots_count_dict,
-        headwords_clean_set,
+        headwords_fuzzy_index,
         ascii_to_unicode_dict,
+        render_cache,
     )
     return templates.TemplateResponse(
         "home.html",
@@ -125,8 +152,9 @@ def db_search_json(request: Request, q: str):
         pth,
         templates,
         roots_count_dict,
-        headwords_clean_set,
+        headwords_fuzzy_index,
         ascii_to_unicode_dict,
+        render_cache,
     )
     response_data = {"summary_html": summary_html, "dpd_html": dpd_html}
     headers = {"Accept-Encoding": "gzip"}
@@ -144,8 +172,9 @@ def db_search_gd(request: Request, search: str):
         pth,
         templates,
         roots_count_dict,
-        headwords_clean_set,
+        headwords_fuzzy_index,
         ascii_to_unicode_dict,
+        render_cache,
     )
     global dpd_css, dpd_js, home_simple_css
 
@@ -163,6 +192,13 @@ def db_search_gd(request: Request, search: str):
     )
 
 
+@app.get("/stats", response_class=JSONResponse)
+def cache_stats():
+    """Render cache hit, miss and size counters."""
+
+    return JSONResponse(content=render_cache.stats())
+
+
 @app.get("/bd_search", response_class=HTMLResponse)
 def db_search_bd(
     request: Request,
@@ -6,20 +6,12 @@ from unidecode import unidecode
 
 from db.models import DpdHeadword, Lookup
 from tools.pali_sort_key import pali_list_sorter
+from tools.root_stats import load_root_stats
 
 
 def make_roots_count_dict(db_session: Session) -> Dict[str, int]:
-    roots_db = db_session.query(DpdHeadword).all()
-    roots_count_dict: Dict[str, int] = dict()
-    for i in roots_db:
-        if i.root_key is None:
-            continue
-        if i.root_key in roots_count_dict:
-            roots_count_dict[i.root_key] += 1
-        else:
-            roots_count_dict[i.root_key] = 1
-
-    return roots_count_dict
+    """Headword count of every root, from the stored root stats."""
+    return dict(load_root_stats(db_session).root_count)
 
 
 def make_headwords_clean_set(db_session: Session) -> set[str]:
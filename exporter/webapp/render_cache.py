@@ -0,0 +1,109 @@
+"""Bounded in-process cache of rendered headword and root html."""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from db.models import DbInfo
+from tools.date_and_time import year_month_day_dash
+
+
+class RenderCache:
+    """LRU cache of (summary_html, dpd_html) keyed by ("headword", id) or
+    ("root", root).
+
+    Entries are only valid for one dpd.db release and one day
+    (the date is rendered into the feedback links),
+    so the whole cache is cleared when either changes.
+    Entries are evicted least-recently-used first
+    once their combined size passes max_bytes."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.release_version = ""
+        self.date = ""
+        self._db_mtime: float | None = None
+        self._entries: OrderedDict[tuple[str, str | int], tuple[str, str]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def refresh(self, db_path: Path, db_session: Session) -> None:
+        """Clear the cache if the db release version or the date has changed.
+        DbInfo is only queried when the db file has been modified."""
+
+        db_mtime = os.stat(db_path).st_mtime
+        if db_mtime != self._db_mtime:
+            db_info = (
+                db_session.query(DbInfo).filter_by(key="dpd_release_version").first()
+            )
+            release_version = db_info.value if db_info else ""
+            self._db_mtime = db_mtime
+        else:
+            release_version = self.release_version
+
+        date = year_month_day_dash()
+        if release_version != self.release_version or date != self.date:
+            with self._lock:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.size_bytes = 0
+                self.release_version = release_version
+                self.date = date
+
+    def get(self, key: tuple[str, str | int]) -> tuple[str, str] | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: tuple[str, str | int], value: tuple[str, str]) -> None:
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old_value = self._entries.pop(key, None)
+            if old_value is not None:
+                self.size_bytes -= self._sizeof(old_value)
+            self._entries[key] = value
+            self.size_bytes += size
+
+            while self.size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size_bytes -= self._sizeof(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int | float | str]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "release_version": self.release_version,
+                "date": self.date,
+            }
+
+    @staticmethod
+    def _sizeof(value: tuple[str, str]) -> int:
+        return sys.getsizeof(value[0]) + sys.getsizeof(value[1])
@@ -1,9 +1,8 @@
-import difflib
 import re
 
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, object_session
 
-from db.db_helpers import get_db_session
+from db.db_helpers import get_db_session_readonly
 from db.models import DpdHeadword, DpdRoot, FamilyRoot, Lookup
 from exporter.webapp.data_classes import (
     AbbreviationsData,
@@ -16,12 +15,15 @@ from exporter.webapp.data_classes import (
     SpellingData,
     VariantData,
 )
+from exporter.webapp.render_cache import RenderCache
 
 from tools.exporter_functions import (
-    get_family_compounds,
-    get_family_idioms,
-    get_family_set,
+    get_family_compounds_bulk,
+    get_family_idioms_bulk,
+    get_family_set_bulk,
 )
+from tools.fuzzy_index import FuzzyIndex
+from tools.lookup_key_fold import fold_lookup_key
 from tools.pali_sort_key import pali_sort_key
 from tools.paths import ProjectPaths
 
@@ -35,21 +37,23 @@ def make_dpd_html(
     pth: ProjectPaths,
     templates,
     roots_count_dict,
-    headwords_clean_set,
+    headwords_fuzzy_index: FuzzyIndex,
     ascii_to_unicode_dict,
+    render_cache: RenderCache,
 ) -> tuple[str, str]:
     retries = 3
     for attempt in range(retries):
         try:
-            with get_db_session(pth.dpd_db_path) as db_session:
+            with get_db_session_readonly(pth.dpd_db_path) as db_session:
                 with db_session.no_autoflush:
+                    render_cache.refresh(pth.dpd_db_path, db_session)
                     dpd_html = ""
                     summary_html = ""
                     q = q.replace("'", "").replace("ṁ", "ṃ").strip()
 
                     lookup_results = (
                         db_session.query(Lookup)
-                        .filter(Lookup.lookup_key.ilike(q))
+                        .filter(Lookup.lookup_key_folded == fold_lookup_key(q))
                         .all()
                     )
 
@@ -68,17 +72,11 @@ def make_dpd_html(
                                     headword_results,
                                     key=lambda x: pali_sort_key(x.lemma_1),
                                 )
-                                for i in headword_results:
-                                    fc = get_family_compounds(i)
-                                    fi = get_family_idioms(i)
-                                    fs = get_family_set(i)
-                                    d = HeadwordData(i, fc, fi, fs)
-                                    summary_html += templates.get_template(
-                                        "dpd_summary.html"
-                                    ).render(d=d)
-                                    dpd_html += templates.get_template(
-                                        "dpd_headword.html"
-                                    ).render(d=d)
+                                for summary, html in render_headwords(
+                                    headword_results, templates, render_cache
+                                ):
+                                    summary_html += summary
+                                    dpd_html += html
 
                             # roots
                             if lookup_result.roots:
@@ -89,19 +87,14 @@ def make_dpd_html(
                                     .all()
                                 )
                                 for r in root_results:
-                                    frs = db_session.query(FamilyRoot).filter(
-                                        FamilyRoot.root_key == r.root
+                                    summary, html = render_root(
+                                        r,
+                                        templates,
+                                        roots_count_dict,
+                                        render_cache,
                                     )
-                                    frs = sorted(
-                                        frs, key=lambda x: pali_sort_key(x.root_family)
-                                    )
-                                    d = RootsData(r, frs, roots_count_dict)
-                                    summary_html += templates.get_template(
-                                        "root_summary.html"
-                                    ).render(d=d)
-                                    dpd_html += templates.get_template(
-                                        "root.html"
-                                    ).render(d=d)
+                                    summary_html += summary
+                                    dpd_html += html
 
                             # deconstructor
                             if lookup_result.deconstructor:
@@ -161,18 +154,15 @@ def make_dpd_html(
                             .first()
                         )
                         if headword_result:
-                            fc = get_family_compounds(headword_result)
-                            fi = get_family_idioms(headword_result)
-                            fs = get_family_set(headword_result)
-                            d = HeadwordData(headword_result, fc, fi, fs)
-                            dpd_html += templates.get_template(
-                                "dpd_headword.html"
-                            ).render(d=d)
+                            _, html = render_headword(
+                                headword_result, templates, render_cache
+                            )
+                            dpd_html += html
 
                         # return closest matches
                         else:
                             dpd_html = find_closest_matches(
-                                q, headwords_clean_set, ascii_to_unicode_dict
+                                q, headwords_fuzzy_index, ascii_to_unicode_dict
                             )
 
                     elif re.search(r"\s\d", q):  # eg "kata 5"
@@ -182,24 +172,21 @@ def make_dpd_html(
                             .first()
                         )
                         if headword_result:
-                            fc = get_family_compounds(headword_result)
-                            fi = get_family_idioms(headword_result)
-                            fs = get_family_set(headword_result)
-                            d = HeadwordData(headword_result, fc, fi, fs)
-                            dpd_html += templates.get_template(
-                                "dpd_headword.html"
-                            ).render(d=d)
+                            _, html = render_headword(
+                                headword_result, templates, render_cache
+                            )
+                            dpd_html += html
 
                         # return closest matches
                         else:
                             dpd_html = find_closest_matches(
-                                q, headwords_clean_set, ascii_to_unicode_dict
+                                q, headwords_fuzzy_index, ascii_to_unicode_dict
                             )
 
                     # or finally return closest matches
                     else:
                         dpd_html = find_closest_matches(
-                            q, headwords_clean_set, ascii_to_unicode_dict
+                            q, headwords_fuzzy_index, ascii_to_unicode_dict
                         )
 
                     return dpd_html, summary_html
@@ -208,152 +195,81 @@ def make_dpd_html(
             if attempt == retries - 1:  # Last attempt
                 raise e
             time.sleep(0.1 * (attempt + 1))  # Exponential backoff
-        dpd_html = ""
-        summary_html = ""
-        q = q.replace("'", "").replace("ṁ", "ṃ").strip()
 
-        lookup_results = (
-            db_session.query(Lookup).filter(Lookup.lookup_key.ilike(q)).all()
+    return "", ""
+
+
+def render_headwords(
+    headwords: list[DpdHeadword],
+    templates,
+    render_cache: RenderCache,
+) -> list[tuple[str, str]]:
+    """Return the summary and full html of each headword, from cache if possible.
+    The families of all cache misses are fetched together."""
+
+    rendered = {i.id: render_cache.get(("headword", i.id)) for i in headwords}
+    misses = [i for i in headwords if rendered[i.id] is None]
+
+    fc_dict = get_family_compounds_bulk(misses)
+    fi_dict = get_family_idioms_bulk(misses)
+    fs_dict = get_family_set_bulk(misses)
+
+    for i in misses:
+        d = HeadwordData(i, fc_dict[i.id], fi_dict[i.id], fs_dict[i.id])
+        html = (
+            templates.get_template("dpd_summary.html").render(d=d),
+            templates.get_template("dpd_headword.html").render(d=d),
         )
+        render_cache.put(("headword", i.id), html)
+        rendered[i.id] = html
 
-        # first try the lookup table, if no results, then try other options
+    return [rendered[i.id] for i in headwords]  # type: ignore
 
-        if lookup_results:
-            for lookup_result in lookup_results:
-                # headwords
-                if lookup_result.headwords:
-                    headwords = lookup_result.headwords_unpack
-                    headword_results = (
-                        db_session.query(DpdHeadword)
-                        .filter(DpdHeadword.id.in_(headwords))
-                        .all()
-                    )
-                    headword_results = sorted(
-                        headword_results, key=lambda x: pali_sort_key(x.lemma_1)
-                    )
-                    for i in headword_results:
-                        fc = get_family_compounds(i)
-                        fi = get_family_idioms(i)
-                        fs = get_family_set(i)
-                        d = HeadwordData(i, fc, fi, fs)
-                        summary_html += templates.get_template(
-                            "dpd_summary.html"
-                        ).render(d=d)
-                        dpd_html += templates.get_template("dpd_headword.html").render(
-                            d=d
-                        )
 
-                # roots
-                if lookup_result.roots:
-                    roots_list = lookup_result.roots_unpack
-                    root_results = (
-                        db_session.query(DpdRoot)
-                        .filter(DpdRoot.root.in_(roots_list))
-                        .all()
-                    )
-                    for r in root_results:
-                        frs = db_session.query(FamilyRoot).filter(
-                            FamilyRoot.root_key == r.root
-                        )
-                        frs = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
-                        d = RootsData(r, frs, roots_count_dict)
-                        summary_html += templates.get_template(
-                            "root_summary.html"
-                        ).render(d=d)
-                        dpd_html += templates.get_template("root.html").render(d=d)
-
-                # deconstructor
-                if lookup_result.deconstructor:
-                    d = DeconstructorData(lookup_result)
-                    dpd_html += templates.get_template("deconstructor.html").render(d=d)
-
-                # variant
-                if lookup_result.variant:
-                    d = VariantData(lookup_result)
-                    dpd_html += templates.get_template("variant.html").render(d=d)
-
-                # spelling mistake
-                if lookup_result.spelling:
-                    d = SpellingData(lookup_result)
-                    dpd_html += templates.get_template("spelling.html").render(d=d)
-
-                if lookup_result.grammar:
-                    d = GrammarData(lookup_result)
-                    dpd_html += templates.get_template("grammar.html").render(d=d)
-
-                # help
-                if lookup_result.help:
-                    d = HelpData(lookup_result)
-                    dpd_html += templates.get_template("help.html").render(d=d)
-
-                # abbreviations
-                if lookup_result.abbrev:
-                    d = AbbreviationsData(lookup_result)
-                    dpd_html += templates.get_template("abbreviations.html").render(d=d)
-
-                # epd
-                if lookup_result.epd:
-                    d = EpdData(lookup_result)
-                    dpd_html += templates.get_template("epd.html").render(d=d)
-
-        # the two cases below search directly in the DpdHeadwords table
-
-        elif q.isnumeric():  # eg 78654
-            search_term = int(q)
-            headword_result = (
-                db_session.query(DpdHeadword)
-                .filter(DpdHeadword.id == search_term)
-                .first()
-            )
-            if headword_result:
-                fc = get_family_compounds(headword_result)
-                fi = get_family_idioms(headword_result)
-                fs = get_family_set(headword_result)
-                d = HeadwordData(headword_result, fc, fi, fs)
-                dpd_html += templates.get_template("dpd_headword.html").render(d=d)
-
-            # return closest matches
-            else:
-                dpd_html = find_closest_matches(
-                    q, headwords_clean_set, ascii_to_unicode_dict
-                )
-
-        elif re.search(r"\s\d", q):  # eg "kata 5"
-            headword_result = (
-                db_session.query(DpdHeadword).filter(DpdHeadword.lemma_1 == q).first()
-            )
-            if headword_result:
-                fc = get_family_compounds(headword_result)
-                fi = get_family_idioms(headword_result)
-                fs = get_family_set(headword_result)
-                d = HeadwordData(headword_result, fc, fi, fs)
-                dpd_html += templates.get_template("dpd_headword.html").render(d=d)
-
-            # return closest matches
-            else:
-                dpd_html = find_closest_matches(
-                    q, headwords_clean_set, ascii_to_unicode_dict
-                )
-
-        # or finally return closest matches
-
-        else:
-            dpd_html = find_closest_matches(
-                q, headwords_clean_set, ascii_to_unicode_dict
-            )
-
-    return dpd_html, summary_html
+def render_headword(
+    i: DpdHeadword,
+    templates,
+    render_cache: RenderCache,
+) -> tuple[str, str]:
+    """Return the summary and full html of a headword, from cache if possible."""
+
+    return render_headwords([i], templates, render_cache)[0]
+
+
+def render_root(
+    r: DpdRoot,
+    templates,
+    roots_count_dict,
+    render_cache: RenderCache,
+) -> tuple[str, str]:
+    """Return the summary and full html of a root, from cache if possible."""
+
+    cached = render_cache.get(("root", r.root))
+    if cached is not None:
+        return cached
+
+    db_session = object_session(r)
+    if db_session is None:
+        raise Exception("No db_session")
+
+    frs = db_session.query(FamilyRoot).filter(FamilyRoot.root_key == r.root)
+    frs = sorted(frs, key=lambda x: pali_sort_key(x.root_family))
+    d = RootsData(r, frs, roots_count_dict)
+    rendered = (
+        templates.get_template("root_summary.html").render(d=d),
+        templates.get_template("root.html").render(d=d),
+    )
+    render_cache.put(("root", r.root), rendered)
+    return rendered
 
 
 def find_closest_matches(
     q,
-    headwords_clean_set,
+    headwords_fuzzy_index: FuzzyIndex,
     ascii_to_unicode_dict,
 ) -> str:
     ascii_matches = ascii_to_unicode_dict[q]
-    closest_headword_matches = difflib.get_close_matches(
-        q, headwords_clean_set, n=10, cutoff=0.7
-    )
+    closest_headword_matches = headwords_fuzzy_index.closest(q, limit=10, cutoff=0.7)
 
     combined_list = []
     combined_list.extend(ascii_matches)
@@ -22,7 +22,8 @@ func GetDb() *gorm.DB {
 		tools.Pth.DpdDb,
 	)
 	// db, err := gorm.Open(sqlite.Open(dbPath), &gorm.Config{})
-	db, err := gorm.Open(sqlite.Open(dbPath), &gorm.Config{
+	// wait for other build stages writing to the db, rather than failing
+	db, err := gorm.Open(sqlite.Open(dbPath+"?_busy_timeout=600000"), &gorm.Config{
 		Logger: logger.Default.LogMode(logger.Error),
 	})
 	tools.HardCheck(err)
@@ -6,6 +6,8 @@ import (
 	"regexp"
 	"strings"
 	"time"
+
+	"gorm.io/gorm"
 )
 
 type InflectionTemplate struct {
@@ -204,12 +206,29 @@ type Lookup struct {
 	Sinhala       string `gorm:"column:sinhala"`
 	Devanagari    string `gorm:"column:devanagari"`
 	Thai          string `gorm:"column:thai"`
+	KeyFolded     string `gorm:"column:lookup_key_folded"`
 }
 
 func (Lookup) TableName() string {
 	return "lookup"
 }
 
+// FoldLookupKey is fold_lookup_key in tools/lookup_key_fold.py:
+// lowercase, replace ṁ with ṃ, remove apostrophes and strip whitespace.
+func FoldLookupKey(key string) string {
+	key = strings.ToLower(key)
+	key = strings.ReplaceAll(key, "ṁ", "ṃ")
+	key = strings.ReplaceAll(key, "'", "")
+	return strings.TrimSpace(key)
+}
+
+// BeforeSave fills lookup_key_folded on every insert and save,
+// so rewriting the table keeps the webapp's indexed search key.
+func (l *Lookup) BeforeSave(tx *gorm.DB) error {
+	l.KeyFolded = FoldLookupKey(l.Key)
+	return nil
+}
+
 func (l *Lookup) DeconstructorPack(deconList []string) {
 	deconJson, err := json.Marshal(deconList)
 	tools.HardCheck(err)
@@ -847,7 +847,7 @@ class DpdFields(PopUpMixin):
             # Test if known value
             elif value not in self.db.all_word_families:
                 suggestions = find_closest_matches(
-                    value, list(self.db.all_word_families or []), limit=3
+                    value, self.db.all_word_families or set(), limit=3
                 )
                 if suggestions:
                     field.error_text = ", ".join(suggestions)
@@ -1039,7 +1039,7 @@ class DpdFields(PopUpMixin):
 
             if value not in (self.db.all_patterns or set()):
                 suggestions = find_closest_matches(
-                    value, list(self.db.all_patterns or []), limit=3
+                    value, self.db.all_patterns or set(), limit=3
                 )
                 if suggestions:
                     field.error_text = ", ".join(suggestions)
@@ -2,6 +2,7 @@
 
 # This script updates all tables with the latest derived data in preparation for exporting.
 # You can finely control which parts get run in ./config.ini 
+# scripts/build/build_orchestrator.py runs the same stages in parallel, skipping unchanged ones.
 
 set -e
 
@@ -12,22 +13,20 @@ fi
 
 uv run python tools/version.py
 uv run scripts/build/config_uposatha_day.py
+uv run python db/lookup/lookup_key_folded.py
+uv run python db/db_indexes.py
 
 uv run python db/inflections/create_inflection_templates.py
 uv run python db/inflections/generate_inflection_tables.py
 
 uv run python scripts/build/sanskrit_root_families_updater.py
 
-uv run python db/families/family_root.py
-uv run python db/families/family_word.py
-uv run python db/families/family_compound.py
-uv run python db/families/family_set.py
-uv run python db/families/family_idiom.py
+uv run python db/families/family_builder.py
 uv run python scripts/build/families_to_json.py
 
 uv run python scripts/build/anki_updater.py
 
-uv run python db/variants/main.py 
+uv run python db/variants/main.py --parallel
 
 uv run python db/grammar/grammar_to_lookup.py
 
@@ -50,6 +49,11 @@ go run go_modules/frequency/main.go
 
 uv run python db/epd/epd_to_lookup.py
 
+# refill keys which the lookup writers above inserted without a folded key
+uv run python db/lookup/lookup_key_folded.py
+
+uv run python db/db_analyze.py
+
 uv run python scripts/build/dealbreakers.py
 status=$?
 if [[ $status -ne  0 ]]; then
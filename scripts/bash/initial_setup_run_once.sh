@@ -19,3 +19,6 @@ go run go_modules/frequency/setup/*.go
 # setup bold definitions database
 db/bold_definitions/extract_bold_definitions.py
 
+
+# pre-parse the CST texts for finding sutta examples
+tools/cst_sentence_store.py
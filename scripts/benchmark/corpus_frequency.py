@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+
+"""Benchmark of ebt_counter's per-headword dict loop
+against the CorpusFrequency matrix, and check they agree.
+
+Uses shared_data/frequency/cst_file_freq.json if it exists,
+otherwise a seeded synthetic corpus made from the db's inflections.
+Saved to and loaded from temp/, so the real matrix is never touched.
+
+Usage:
+uv run python scripts/benchmark/corpus_frequency.py
+"""
+
+import json
+import random
+import shutil
+import sys
+import time
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword
+from tools.corpus_frequency import CorpusFrequency
+from tools.pali_text_files import ebts
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def synthetic_file_freq(
+    words: list[str], files: list[str]
+) -> dict[str, dict[str, int]]:
+    """Every file gets a random third of the words with Zipf-like counts."""
+
+    rng = random.Random(0)
+    file_freq: dict[str, dict[str, int]] = {}
+    for file in files:
+        sample = rng.sample(words, len(words) // 3)
+        file_freq[file] = {word: int(rng.paretovariate(1.2)) for word in sample}
+    return file_freq
+
+
+def dict_loop(
+    file_freq: dict[str, dict[str, int]],
+    inflections_lists: list[list[str]],
+    ebt_files: list[str],
+) -> list[int]:
+    """The calculation in ebt_counter as it was."""
+
+    results = []
+    for inflections in inflections_lists:
+        total = 0
+        for ebt_file in ebt_files:
+            file_freq_dict = file_freq[ebt_file]
+            for inflection in inflections:
+                total += file_freq_dict.get(inflection, 0)
+        results.append(total)
+    return results
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("corpus frequency matrix")
+
+    pth = ProjectPaths()
+    pth.temp_dir.mkdir(parents=True, exist_ok=True)
+    db_session = get_db_session(pth.dpd_db_path)
+
+    pr.green("collecting inflections")
+    inflections_lists = [
+        i.inflections_list_all for i in db_session.query(DpdHeadword).all()
+    ]
+    pr.yes(len(inflections_lists))
+
+    ebt_files = [ebt_file.replace(".txt", ".xml") for ebt_file in ebts]
+    source_path = pth.cst_file_freq
+    if source_path.exists():
+        pr.green("loading cst_file_freq.json")
+        with open(source_path) as f:
+            file_freq = json.load(f)
+    else:
+        pr.green("making a synthetic corpus")
+        words = sorted({word for words in inflections_lists for word in words})
+        other_files = [f"other_{n}.xml" for n in range(100)]
+        file_freq = synthetic_file_freq(words, ebt_files + other_files)
+        source_path = pth.temp_dir / "corpus_frequency_file_freq.json"
+        with open(source_path, "w") as f:
+            json.dump(file_freq, f, ensure_ascii=False)
+    pr.yes(len(file_freq))
+
+    pr.green("dict loop")
+    start = time.perf_counter()
+    expected = dict_loop(file_freq, inflections_lists, ebt_files)
+    loop_time = time.perf_counter() - start
+    pr.yes(f"{loop_time:.3f} s")
+
+    matrix_dir = pth.temp_dir / "corpus_frequency_matrix"
+    shutil.rmtree(matrix_dir, ignore_errors=True)
+
+    pr.green("build and save matrix")
+    start = time.perf_counter()
+    CorpusFrequency.load_or_build(source_path, matrix_dir)
+    build_time = time.perf_counter() - start
+    pr.yes(f"{build_time:.3f} s")
+
+    pr.green("load memory-mapped")
+    start = time.perf_counter()
+    corpus = CorpusFrequency.load_or_build(source_path, matrix_dir)
+    load_time = time.perf_counter() - start
+    pr.yes(f"{load_time:.3f} s")
+
+    pr.green("matrix counts")
+    start = time.perf_counter()
+    results = corpus.counts(inflections_lists, ebt_files)
+    matrix_time = time.perf_counter() - start
+    pr.yes(f"{matrix_time:.3f} s")
+
+    pr.green("comparing")
+    differences = [
+        n for n, (a, b) in enumerate(zip(expected, results.tolist())) if a != b
+    ]
+    single = [corpus.count(words, ebt_files) for words in inflections_lists[:100]]
+    differences += [n for n, total in enumerate(single) if total != expected[n]]
+    if differences:
+        pr.no(len(differences))
+    else:
+        pr.yes("same")
+
+    shutil.rmtree(matrix_dir, ignore_errors=True)
+    if source_path != pth.cst_file_freq:
+        source_path.unlink()
+
+    pr.summary("headwords", len(inflections_lists))
+    pr.summary("words in corpus", len(corpus))
+    pr.summary("differences", len(differences))
+    pr.summary("dict loop", f"{loop_time:.3f} s")
+    pr.summary("matrix build", f"{build_time:.3f} s")
+    pr.summary("matrix load", f"{load_time:.3f} s")
+    pr.summary("matrix counts", f"{matrix_time:.3f} s")
+    pr.toc()
+
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+"""Benchmark of find_cst_source_sutta_example parsing the CST XML
+against querying the cst sentence store, and check they agree.
+
+The store is built in temp/, so the real one is never touched.
+Needs the CST XML in resources/dpd_submodules/cst/romn.
+
+Usage:
+uv run python scripts/benchmark/cst_sentence_store.py [book ...]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import tools.cst_sentence_store as cst_sentence_store
+from tools.cst_source_sutta_example import (
+    CstSourceSuttaExample,
+    find_cst_source_sutta_example,
+)
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+PATTERNS = ["akatvā", "dhamm", "bhikkhave", "ti", "gacch(a|ā)mi", "saṃ"]
+
+
+def parse_book(book: str, pattern: str) -> list[CstSourceSuttaExample]:
+    """find_cst_source_sutta_example without the store or its debug output."""
+
+    query = cst_sentence_store.query_cst_examples
+    cst_sentence_store.query_cst_examples = lambda *args: None  # type:ignore
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return find_cst_source_sutta_example(book, pattern)
+    finally:
+        cst_sentence_store.query_cst_examples = query
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("cst sentence store")
+
+    pth = ProjectPaths()
+    books = sys.argv[1:] or ["dn1", "mn1", "sn1", "kn2", "kn5"]
+    db_path = pth.temp_dir / "cst_sentence_store_benchmark.db"
+
+    pr.green("building store")
+    start = time.perf_counter()
+    cst_sentence_store.build_cst_sentence_store(db_path, books)
+    build_time = time.perf_counter() - start
+    pr.yes(f"{build_time:.2f} s")
+
+    parse_time = 0.0
+    query_time = 0.0
+    differences = 0
+    for book in books:
+        for pattern in PATTERNS:
+            pr.green(f"{book} {pattern}")
+
+            start = time.perf_counter()
+            parsed = parse_book(book, pattern)
+            parse_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            stored = cst_sentence_store.query_cst_examples(book, pattern, db_path)
+            query_time += time.perf_counter() - start
+
+            if parsed == stored:
+                pr.yes(len(parsed))
+            else:
+                pr.no(f"{len(parsed)} != {len(stored or [])}")
+                differences += 1
+
+    db_path.unlink()
+
+    queries = len(books) * len(PATTERNS)
+    pr.summary("queries", queries)
+    pr.summary("differences", differences)
+    pr.summary("store build", f"{build_time:.2f} s")
+    pr.summary("parse per query", f"{parse_time / queries * 1000:.1f} ms")
+    pr.summary("store per query", f"{query_time / queries * 1000:.1f} ms")
+    pr.toc()
+
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+"""Wall-clock benchmark of running all db_tests on the whole db.
+Compare the row by row Python loop with the compiled SQL and regex tests,
+and check that both find the same failures.
+
+Usage:
+uv run python scripts/benchmark/db_tests_compiled.py
+"""
+
+import time
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword
+from db_tests.db_tests_compiled import compile_tests, run_compiled_tests
+from db_tests.db_tests_manager import DbTestManager, TestFailure
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("db tests benchmark")
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+    test_manager = DbTestManager()
+    db = db_session.query(DpdHeadword).all()
+
+    pr.green("row by row")
+    start = time.perf_counter()
+    loop_failures: dict[int, list[TestFailure]] = {}
+    for test_row, test in enumerate(test_manager.internal_tests_list, start=2):
+        test_failure = TestFailure(test_row, test.test_name, test.error_column)
+        for headword in db:
+            if test_manager.error_test_each_single_row(test, headword):
+                loop_failures.setdefault(headword.id, []).append(test_failure)
+    loop_time = time.perf_counter() - start
+    pr.yes(sum(len(i) for i in loop_failures.values()))
+
+    pr.green("compiled")
+    start = time.perf_counter()
+    compiled_tests = compile_tests(test_manager.internal_tests_list)
+    compiled_failures = run_compiled_tests(db_session, compiled_tests)
+    compiled_time = time.perf_counter() - start
+    pr.yes(sum(len(i) for i in compiled_failures.values()))
+
+    pr.green("same failures")
+    if compiled_failures == loop_failures:
+        pr.yes("yes")
+    else:
+        pr.no("no")
+
+    pr.summary("headwords", len(db))
+    pr.summary("tests", len(compiled_tests))
+    pr.summary("row by row", f"{loop_time:.2f} s")
+    pr.summary("compiled", f"{compiled_time:.2f} s")
+    pr.summary("speedup", f"{loop_time / compiled_time:.2f}x")
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
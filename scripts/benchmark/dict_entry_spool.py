@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+"""Check that exporting a DictEntrySpool writes the same GoldenDict and
+MDict files as exporting a list of DictEntry, and compare their peak memory.
+
+The entries are made from the db's headwords, with their inflections
+as synonyms, and repeated to make a bigger dictionary.
+Everything is written to temp/, so the real exports are never touched.
+
+Usage:
+uv run python scripts/benchmark/dict_entry_spool.py [copies]
+"""
+
+import gc
+import gzip
+import shutil
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword
+from tools.goldendict_exporter import (
+    DictEntry,
+    DictEntrySpool,
+    DictInfo,
+    DictVariables,
+    add_data,
+    create_glossary,
+    write_to_file,
+)
+from tools.mdict_exporter import export_to_mdict
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def make_entries(copy: int) -> list[DictEntry]:
+    """One copy of the headwords, like one page of rendered html."""
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+
+    entries: list[DictEntry] = []
+    suffix = f" {copy}" if copy else ""
+    for i in db_session.query(DpdHeadword).all():
+        html = f"<p>{i.lemma_1} GoldenDict {i.meaning_combo}</p>" * 20
+        synonyms = [f"{word}{suffix}" for word in i.inflections_list_all]
+        entries.append(DictEntry(f"{i.lemma_1}{suffix}", html, "", synonyms))
+    db_session.close()
+    return entries
+
+
+def export(
+    dict_info: DictInfo, out_dir: Path, copies: int, spool: bool
+) -> tuple[float, int, int]:
+    """Make the entries and write GoldenDict and MDict,
+    return the seconds and the peak memory of each."""
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dict_var = DictVariables(
+        css_paths=None,
+        js_paths=None,
+        gd_path=out_dir,
+        md_path=out_dir,
+        dict_name="spool",
+        icon_path=None,
+    )
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    dict_data: list[DictEntry] | DictEntrySpool
+    if spool:
+        dict_data = DictEntrySpool(ProjectPaths().temp_dir)
+        for copy in range(copies):
+            dict_data.extend(make_entries(copy))
+    else:
+        dict_data = []
+        for copy in range(copies):
+            dict_data.extend(make_entries(copy))
+
+    glos = create_glossary(dict_info)
+    glos = add_data(glos, dict_data)
+    write_to_file(glos, dict_var)
+    __current__, goldendict_peak = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    export_to_mdict(dict_info, dict_var, dict_data)
+    __current__, mdict_peak = tracemalloc.get_traced_memory()
+
+    seconds = time.perf_counter() - start
+    tracemalloc.stop()
+    if isinstance(dict_data, DictEntrySpool):
+        dict_data.close()
+    return seconds, goldendict_peak, mdict_peak
+
+
+def read_file(path: Path) -> bytes:
+    """The contents, without the modification time of dictzip files."""
+
+    if path.suffix == ".dz":
+        return gzip.decompress(path.read_bytes())
+    return path.read_bytes()
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("dict entry spool")
+
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    pth = ProjectPaths()
+    list_dir = pth.temp_dir / "dict_entry_spool" / "list"
+    spool_dir = pth.temp_dir / "dict_entry_spool" / "spool"
+    shutil.rmtree(list_dir.parent, ignore_errors=True)
+
+    dict_info = DictInfo(
+        bookname="spool",
+        author="spool",
+        description="spool",
+        website="",
+        source_lang="pi",
+        target_lang="en",
+    )
+
+    list_time, list_gd_peak, list_md_peak = export(
+        dict_info, list_dir, copies, spool=False
+    )
+    spool_time, spool_gd_peak, spool_md_peak = export(
+        dict_info, spool_dir, copies, spool=True
+    )
+
+    pr.green("comparing files")
+    files = sorted(
+        path.relative_to(list_dir) for path in list_dir.rglob("*") if path.is_file()
+    )
+    differences = [
+        str(file)
+        for file in files
+        if read_file(list_dir / file) != read_file(spool_dir / file)
+    ]
+    if differences:
+        pr.no(", ".join(differences))
+    else:
+        pr.yes(len(files))
+
+    shutil.rmtree(list_dir.parent, ignore_errors=True)
+
+    pr.summary("files", len(files))
+    pr.summary("differences", len(differences))
+    pr.summary("list time", f"{list_time:.2f} s")
+    pr.summary("spool time", f"{spool_time:.2f} s")
+    pr.summary("list gd peak", f"{list_gd_peak / 1024 / 1024:.0f} MB")
+    pr.summary("spool gd peak", f"{spool_gd_peak / 1024 / 1024:.0f} MB")
+    pr.summary("list md peak", f"{list_md_peak / 1024 / 1024:.0f} MB")
+    pr.summary("spool md peak", f"{spool_md_peak / 1024 / 1024:.0f} MB")
+    pr.toc()
+
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
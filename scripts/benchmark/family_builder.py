@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+"""Check that db/families/family_builder.py writes the same families,
+root info, root matrix, lookup roots and DbInfo caches as the five
+separate family scripts, and time both.
+
+The scripts run once first, so idioms synced from family compounds are
+already in the db, as they would be on any build after the first.
+dpd.db is backed up to temp/ and restored before the builder runs,
+so it ends up as the builder left it.
+
+Usage:
+uv run python scripts/benchmark/family_builder.py
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from contextlib import closing
+from pathlib import Path
+
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+FAMILY_SCRIPTS = [
+    "db/families/family_root.py",
+    "db/families/family_word.py",
+    "db/families/family_compound.py",
+    "db/families/family_set.py",
+    "db/families/family_idiom.py",
+]
+BUILDER = "db/families/family_builder.py"
+
+QUERIES = {
+    "family_root": "SELECT * FROM family_root ORDER BY root_family_key",
+    "family_word": "SELECT * FROM family_word ORDER BY word_family",
+    "family_compound": "SELECT * FROM family_compound ORDER BY compound_family",
+    "family_set": "SELECT * FROM family_set ORDER BY \"set\"",
+    "family_idiom": "SELECT * FROM family_idiom ORDER BY idiom",
+    "root info and matrix": "SELECT root, root_info, root_matrix FROM dpd_roots ORDER BY root",
+    "lookup roots": "SELECT lookup_key, roots FROM lookup WHERE roots != '' ORDER BY lookup_key",
+    "family idioms": "SELECT id, family_idioms FROM dpd_headwords ORDER BY id",
+}
+# sets stored as json lists, in no particular order
+DB_INFO_SETS = ["cf_set", "idioms_set"]
+
+
+def run_scripts(scripts: list[str]) -> float:
+    env = dict(os.environ, PYTHONPATH=".")
+    start = time.perf_counter()
+    for script in scripts:
+        subprocess.run(
+            [sys.executable, script], env=env, check=True, stdout=subprocess.DEVNULL
+        )
+    return time.perf_counter() - start
+
+
+def dump_families(db_path: Path) -> dict:
+    dump = {}
+    with closing(sqlite3.connect(db_path)) as conn:
+        for name, query in QUERIES.items():
+            dump[name] = conn.execute(query).fetchall()
+        for key in DB_INFO_SETS:
+            (value,) = conn.execute(
+                "SELECT value FROM db_info WHERE key = ?", (key,)
+            ).fetchone()
+            dump[key] = sorted(json.loads(value))
+    return dump
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("family builder")
+
+    pth = ProjectPaths()
+    backup_path = pth.temp_dir / "family_builder_backup.db"
+    backup_path.parent.mkdir(parents=True, exist_ok=True)
+
+    pr.green("first run of the family scripts")
+    pr.yes(f"{run_scripts(FAMILY_SCRIPTS):.2f} s")
+    shutil.copy(pth.dpd_db_path, backup_path)
+
+    pr.green("family scripts")
+    scripts_time = run_scripts(FAMILY_SCRIPTS)
+    scripts_dump = dump_families(pth.dpd_db_path)
+    pr.yes(f"{scripts_time:.2f} s")
+
+    shutil.copy(backup_path, pth.dpd_db_path)
+    backup_path.unlink()
+
+    pr.green("family builder")
+    builder_time = run_scripts([BUILDER])
+    builder_dump = dump_families(pth.dpd_db_path)
+    pr.yes(f"{builder_time:.2f} s")
+
+    differences = [
+        name for name in scripts_dump if scripts_dump[name] != builder_dump[name]
+    ]
+    for name in scripts_dump:
+        pr.green(name)
+        if name in differences:
+            pr.no("different")
+        else:
+            pr.yes(len(scripts_dump[name]))
+
+    pr.summary("differences", len(differences))
+    pr.summary("scripts", f"{scripts_time:.2f} s")
+    pr.summary("builder", f"{builder_time:.2f} s")
+    pr.toc()
+
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+"""Latency benchmark for the closest matches to misspelled words.
+Compare difflib.get_close_matches and fuzzywuzzy's extractBests,
+which score every word, with FuzzyIndex.
+
+Queries are headwords misspelled one way each: without diacritics,
+with an aspirate swapped, a letter dropped or a letter doubled.
+Recall is how often the headword is in the matches.
+
+Usage:
+uv run python scripts/benchmark/fuzzy_index.py [queries]
+"""
+
+import difflib
+import random
+import statistics
+import sys
+import time
+from typing import Callable
+
+from fuzzywuzzy import process as fuzzy_process
+
+from db.db_helpers import get_db_session_readonly
+from exporter.webapp.preloads import make_headwords_clean_set
+from tools.fuzzy_index import ASPIRATES, FOLDED_LETTERS, FuzzyIndex, split_letters
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+UNASPIRATED = {plain: aspirate for aspirate, plain in ASPIRATES.items()}
+
+
+def percentiles(timings: list[float]) -> tuple[float, float]:
+    """Return p50 and p99 in milliseconds."""
+    cuts = statistics.quantiles(timings, n=100)
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def time_queries(search: Callable[[str], list], queries: list[str]) -> list[float]:
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        search(q)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def misspell(word: str, rng: random.Random) -> str:
+    letters = list(split_letters(word))
+    index = rng.randrange(len(letters))
+    kind = rng.randrange(4)
+    if kind == 0:
+        letters = [
+            letter if letter in ASPIRATES else FOLDED_LETTERS.get(letter, letter)
+            for letter in letters
+        ]
+    elif kind == 1:
+        letter = letters[index]
+        if letter in ASPIRATES:
+            letters[index] = ASPIRATES[letter]
+        else:
+            letters[index] = UNASPIRATED.get(letter, letter * 2)
+    elif kind == 2 and len(letters) > 3:
+        del letters[index]
+    else:
+        letters.insert(index, letters[index])
+    return "".join(letters)
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("fuzzy index latency benchmark")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    pth = ProjectPaths()
+    with get_db_session_readonly(pth.dpd_db_path) as db_session:
+        headwords_clean_set = make_headwords_clean_set(db_session)
+    headwords_list = sorted(headwords_clean_set)
+
+    pr.green("building index")
+    start = time.perf_counter()
+    fuzzy_index = FuzzyIndex(headwords_clean_set)
+    build_time = time.perf_counter() - start
+    pr.yes(f"{build_time * 1000:.0f}ms")
+
+    pr.green("misspelling headwords")
+    rng = random.Random(0)
+    pali_words = sorted(
+        word for word in headwords_clean_set if " " not in word and len(word) > 3
+    )
+    targets = [rng.choice(pali_words) for _ in range(count)]
+    queries = [misspell(word, rng) for word in targets]
+    pr.yes(len(queries))
+
+    def search_difflib(q: str) -> list:
+        return difflib.get_close_matches(q, headwords_clean_set, n=10, cutoff=0.7)
+
+    def search_fuzzywuzzy(q: str) -> list:
+        return [
+            match[0]
+            for match in fuzzy_process.extractBests(q, headwords_list, limit=10)
+        ]
+
+    def search_index(q: str) -> list:
+        return fuzzy_index.closest(q, limit=10, cutoff=0.7)
+
+    results = {}
+    for name, search in [
+        ("difflib", search_difflib),
+        ("fuzzywuzzy", search_fuzzywuzzy),
+        ("index", search_index),
+    ]:
+        pr.green(name)
+        p50, p99 = percentiles(time_queries(search, queries))
+        found = sum(
+            target in search(q) for target, q in zip(targets, queries)
+        )
+        results[name] = (p50, p99, found / len(queries))
+        pr.yes(f"{p99:.2f}ms")
+
+    pr.summary("words", len(fuzzy_index))
+    pr.summary("index build", f"{build_time * 1000:.0f} ms")
+    for name, (p50, p99, recall) in results.items():
+        pr.summary(f"{name} p50", f"{p50:.2f} ms")
+        pr.summary(f"{name} p99", f"{p99:.2f} ms")
+        pr.summary(f"{name} recall", f"{recall:.0%}")
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
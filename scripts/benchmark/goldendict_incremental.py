@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""Wall-clock benchmark of the GoldenDict dpd html generation.
+Compare a full rebuild with an incremental rebuild after one edit.
+
+The edit is made in the session only and rolled back, dpd.db is not changed.
+
+Usage:
+uv run python scripts/benchmark/goldendict_incremental.py
+"""
+
+import time
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword
+from exporter.goldendict.export_cache import ExportCache
+from exporter.goldendict.export_dpd import dpd_export_fingerprint, generate_dpd_html
+from exporter.goldendict.render_pool import RenderPool
+from tools.cache_load import load_cf_set, load_idioms_set
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+from tools.sandhi_contraction import SandhiContractionFinder
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("goldendict incremental export benchmark")
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+    sandhi_contractions = SandhiContractionFinder().get_sandhi_contractions_simple()
+    cf_set = load_cf_set()
+    idioms_set = load_idioms_set()
+    cache_path = pth.temp_dir / "benchmark_export_cache"
+    cache_path.unlink(missing_ok=True)
+
+    fingerprint = dpd_export_fingerprint(
+        pth, sandhi_contractions, cf_set, idioms_set, False, False
+    )
+
+    with RenderPool(pth, sandhi_contractions, cf_set, idioms_set) as render_pool:
+        start = time.perf_counter()
+        generate_dpd_html(db_session, render_pool)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        export_cache = ExportCache(cache_path, fingerprint)
+        generate_dpd_html(db_session, render_pool, export_cache=export_cache)
+        export_cache.save()
+        cold_time = time.perf_counter() - start
+
+        headword = db_session.query(DpdHeadword).first()
+        if headword is None:
+            raise Exception("no headwords in the db")
+        headword.meaning_1 = f"{headword.meaning_1} (edited)"
+
+        start = time.perf_counter()
+        export_cache = ExportCache(cache_path, fingerprint)
+        generate_dpd_html(db_session, render_pool, export_cache=export_cache)
+        export_cache.save()
+        one_edit_time = time.perf_counter() - start
+        rendered = export_cache.misses
+
+    db_session.rollback()
+    db_session.close()
+    cache_path.unlink(missing_ok=True)
+
+    pr.summary("full rebuild", f"{full_time:.2f} s")
+    pr.summary("empty cache", f"{cold_time:.2f} s")
+    pr.summary("one edit", f"{one_edit_time:.2f} s")
+    pr.summary("re-rendered", rendered)
+    pr.summary("speedup", f"{full_time / one_edit_time:.2f}x")
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
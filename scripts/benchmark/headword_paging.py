@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+"""Wall-clock benchmark for paging through the whole DpdHeadword table,
+with the same joined query as the GoldenDict export.
+Compare ORDER BY lemma_1 LIMIT/OFFSET with keyset pagination.
+
+Usage:
+uv run python scripts/benchmark/headword_paging.py [page_size]
+"""
+
+import sys
+import time
+
+from sqlalchemy.orm import Query, joinedload
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword, FamilyRoot, FamilyWord
+from tools.headword_iterator import keyset_chunks
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def offset_pages(query: Query, page_size: int) -> int:
+    offset = 0
+    total = 0
+    while True:
+        rows = query.order_by(DpdHeadword.lemma_1).limit(page_size).offset(offset).all()
+        if not rows:
+            return total
+        total += len(rows)
+        offset += page_size
+
+
+def keyset_pages(query: Query, page_size: int) -> int:
+    total = 0
+    for rows in keyset_chunks(query, DpdHeadword.lemma_1, page_size):
+        total += len(rows)
+    return total
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("headword paging benchmark")
+
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+    query = (
+        db_session.query(DpdHeadword, FamilyRoot, FamilyWord)
+        .outerjoin(FamilyRoot, DpdHeadword.root_family_key == FamilyRoot.root_family_key)
+        .outerjoin(FamilyWord, DpdHeadword.family_word == FamilyWord.word_family)
+        .options(joinedload(DpdHeadword.rt))
+    )
+
+    pr.green("limit / offset")
+    start = time.perf_counter()
+    offset_total = offset_pages(query, page_size)
+    offset_time = time.perf_counter() - start
+    pr.yes(offset_total)
+    db_session.expunge_all()
+
+    pr.green("keyset")
+    start = time.perf_counter()
+    keyset_total = keyset_pages(query, page_size)
+    keyset_time = time.perf_counter() - start
+    pr.yes(keyset_total)
+
+    pr.summary("page size", page_size)
+    pr.summary("limit / offset", f"{offset_time:.2f} s")
+    pr.summary("keyset", f"{keyset_time:.2f} s")
+    pr.summary("speedup", f"{offset_time / keyset_time:.2f}x")
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
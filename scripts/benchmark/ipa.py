@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+"""Micro-benchmark of converting every lemma_clean to IPA and TTS.
+Compare re-reading ipa.tsv on every call, as convert_uni_to_ipa used to,
+with the load-once table, uncached and cached.
+
+Usage:
+uv run python scripts/benchmark/ipa.py
+"""
+
+import time
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword
+from tools.ipa import (
+    ProgData,
+    a_at_the_end,
+    clean_text,
+    convert_many,
+    convert_uni_to_ipa,
+    long_e_o,
+)
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def reload_each_call(text: str, ipa_or_tts: str) -> str:
+    """The converter as it was, reading ipa.tsv on every call."""
+
+    g = ProgData()
+    if ipa_or_tts == "ipa":
+        dict = g.uni_to_ipa_dict
+    else:
+        dict = g.uni_to_tts_dict
+    text = a_at_the_end(long_e_o(clean_text(text)))
+
+    ipa_text = ""
+    i = 0
+    while i < len(text):
+        if i < len(text) - 2 and text[i : i + 3] in dict:
+            ipa_text += dict[text[i : i + 3]]
+            i += 3
+        elif i < len(text) - 1 and text[i : i + 2] in dict:
+            ipa_text += dict[text[i : i + 2]]
+            i += 2
+        elif text[i] in dict:
+            ipa_text += dict[text[i]]
+            i += 1
+        else:
+            ipa_text += text[i]
+            i += 1
+
+    return ipa_text.strip().replace("  ", " ")
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("ipa converter benchmark")
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+    words = [i.lemma_clean for i in db_session.query(DpdHeadword)]
+
+    results = {}
+    timings = {}
+    for ipa_or_tts in ["ipa", "tts"]:
+        start = time.perf_counter()
+        reloaded = [reload_each_call(word, ipa_or_tts) for word in words]
+        timings[f"{ipa_or_tts} reload"] = time.perf_counter() - start
+
+        convert_uni_to_ipa.cache_clear()
+        start = time.perf_counter()
+        uncached = convert_many(words, ipa_or_tts)
+        timings[f"{ipa_or_tts} load once"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached = convert_many(words, ipa_or_tts)
+        timings[f"{ipa_or_tts} cached"] = time.perf_counter() - start
+
+        results[ipa_or_tts] = reloaded == uncached == cached
+
+    pr.green("same results")
+    if all(results.values()):
+        pr.yes("yes")
+    else:
+        pr.no("no")
+
+    pr.summary("lemma_clean", len(words))
+    for name, seconds in timings.items():
+        pr.summary(name, f"{seconds * 1000:.1f} ms")
+    pr.summary(
+        "speedup", f"{timings['tts reload'] / timings['tts load once']:.1f}x"
+    )
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+"""Check that render_xhtml_parallel writes the same EPUB letter files as
+render_xhtml, and compare their wall-clock time and peak memory.
+
+Each way runs in its own process, so its peak memory includes
+only its own workers. The letter files are copied to temp/kindle_epub/.
+
+The words come from the CST and SC texts, like the exporter's.
+With --db-words, which needs no texts, they are made from the db instead:
+every other inflection of each headword, and every other deconstructed word.
+
+Usage:
+uv run python scripts/benchmark/kindle_epub.py [processes] [--db-words]
+"""
+
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from zipfile import ZIP_STORED, ZipFile
+
+from sqlalchemy.orm import Session
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword, Lookup
+from exporter.kindle.kindle_exporter import (
+    EbookWords,
+    EpubZip,
+    make_ebook_words,
+    render_xhtml,
+    render_xhtml_parallel,
+)
+from tools.deconstructed_words import make_words_in_deconstructions
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+MODES = ["serial", "parallel"]
+
+
+def peak_memory_mb() -> float:
+    """The peak resident memory of this process or any one of its workers."""
+
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return peak_kb / 1024
+
+
+def letter_files(pth: ProjectPaths) -> list[Path]:
+    return sorted(
+        file_path
+        for file_path in pth.epub_text_dir.glob("*_*.xhtml")
+        if file_path.name.split("_")[0].isdigit()
+    )
+
+
+def make_db_words(db_session: Session) -> EbookWords:
+    """A word set like the texts', with some of each headword's inflections
+    and some deconstructed words, but not others."""
+
+    combined_text_set: set[str] = set()
+    for i in db_session.query(DpdHeadword).order_by(DpdHeadword.id):
+        combined_text_set.update(i.inflections_list_all[::2])
+    deconstructed = sorted(
+        lookup_key
+        for (lookup_key,) in db_session.query(Lookup.lookup_key).filter(
+            Lookup.deconstructor != ""
+        )
+    )
+    combined_text_set.update(deconstructed[::2])
+
+    all_words_set = combined_text_set | make_words_in_deconstructions(db_session)
+    return EbookWords(combined_text_set, all_words_set)
+
+
+def run_mode(mode: str, words: EbookWords, processes: int = 0) -> dict:
+    """Render the letters one way, copy them to temp/kindle_epub/mode
+    and return the seconds and peak memory."""
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+    for file_path in letter_files(pth):
+        file_path.unlink()
+
+    start = time.perf_counter()
+    if mode == "serial":
+        id_counter = render_xhtml(pth, db_session, words)
+    else:
+        with EpubZip(pth) as epub_zip:
+            id_counter = render_xhtml_parallel(
+                pth, db_session, words, epub_zip, processes or None
+            )
+    seconds = time.perf_counter() - start
+    db_session.close()
+
+    out_dir = pth.temp_dir / "kindle_epub" / mode
+    shutil.rmtree(out_dir, ignore_errors=True)
+    out_dir.mkdir(parents=True)
+    for file_path in letter_files(pth):
+        shutil.copy(file_path, out_dir)
+
+    return {"seconds": seconds, "peak_mb": peak_memory_mb(), "id_counter": id_counter}
+
+
+def check_epub_zip(pth: ProjectPaths) -> bool:
+    """mimetype is the first file in the zip, and stored."""
+
+    with ZipFile(pth.dpd_epub_path) as zipf:
+        first = zipf.infolist()[0]
+    return first.filename == "mimetype" and first.compress_type == ZIP_STORED
+
+
+def compare(pth: ProjectPaths, results: dict) -> list[str]:
+    """The names of the letter files which differ."""
+
+    serial_dir = pth.temp_dir / "kindle_epub" / "serial"
+    parallel_dir = pth.temp_dir / "kindle_epub" / "parallel"
+    names = {p.name for p in serial_dir.iterdir()} | {
+        p.name for p in parallel_dir.iterdir()
+    }
+
+    differences = [
+        name
+        for name in sorted(names)
+        if not (serial_dir / name).exists()
+        or not (parallel_dir / name).exists()
+        or (serial_dir / name).read_bytes() != (parallel_dir / name).read_bytes()
+    ]
+    if results["serial"]["id_counter"] != results["parallel"]["id_counter"]:
+        differences.append("id_counter")
+    return differences
+
+
+def main():
+    pr.stop_logging()
+    db_words = "--db-words" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != "--db-words"]
+
+    if len(args) > 1 and args[0] in MODES:
+        pth = ProjectPaths()
+        db_session = get_db_session(pth.dpd_db_path)
+        if db_words:
+            words = make_db_words(db_session)
+        else:
+            words = make_ebook_words(pth, db_session)
+        db_session.close()
+        result = run_mode(args[0], words, int(args[1]))
+        print(json.dumps(result))
+        return
+
+    pr.tic()
+    pr.title("kindle epub")
+
+    pth = ProjectPaths()
+    processes = int(args[0]) if args else 0
+
+    results = {}
+    for mode in MODES:
+        pr.green(mode)
+        process = subprocess.run(
+            [sys.executable, __file__, mode, str(processes)]
+            + (["--db-words"] if db_words else []),
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        results[mode] = json.loads(process.stdout.splitlines()[-1])
+        pr.yes(f"{results[mode]['seconds']:.2f} s")
+
+    differences = compare(pth, results)
+    for name in differences:
+        pr.red(f"different: {name}")
+
+    mimetype_ok = check_epub_zip(pth)
+
+    pr.summary("differences", len(differences))
+    pr.summary("mimetype first", "yes" if mimetype_ok else "no")
+    for mode in MODES:
+        pr.summary(f"{mode} time", f"{results[mode]['seconds']:.2f} s")
+        pr.summary(f"{mode} peak", f"{results[mode]['peak_mb']:.0f} MB")
+    pr.toc()
+
+    if differences or not mimetype_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""Latency benchmark for webapp lookup searches.
+Compare Lookup.lookup_key ILIKE (full table scan)
+with an indexed equality search on Lookup.lookup_key_folded.
+
+Usage:
+uv run python scripts/benchmark/lookup_search_latency.py [queries]
+"""
+
+import random
+import statistics
+import sys
+import time
+from typing import Callable
+
+from db.db_helpers import get_db_session_readonly
+from db.models import Lookup
+from tools.lookup_key_fold import fold_lookup_key
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def percentiles(timings: list[float]) -> tuple[float, float]:
+    """Return p50 and p99 in milliseconds."""
+    cuts = statistics.quantiles(timings, n=100)
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def time_queries(search: Callable[[str], list], queries: list[str]) -> list[float]:
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        search(q)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("lookup search latency benchmark")
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    pth = ProjectPaths()
+    db_session = get_db_session_readonly(pth.dpd_db_path)
+
+    pr.green("sampling lookup keys")
+    keys = [i.lookup_key for i in db_session.query(Lookup.lookup_key).limit(100_000)]
+    table_size = db_session.query(Lookup).count()
+    # mix of hits, upper case hits and misses
+    queries = [random.choice(keys) for _ in range(count)]
+    queries = [q.upper() if n % 3 == 0 else q for n, q in enumerate(queries)]
+    queries = [q + "x" if n % 5 == 0 else q for n, q in enumerate(queries)]
+    pr.yes(len(queries))
+
+    def search_ilike(q: str) -> list:
+        return db_session.query(Lookup).filter(Lookup.lookup_key.ilike(q)).all()
+
+    def search_folded(q: str) -> list:
+        return (
+            db_session.query(Lookup)
+            .filter(Lookup.lookup_key_folded == fold_lookup_key(q))
+            .all()
+        )
+
+    pr.green("ilike")
+    ilike_p50, ilike_p99 = percentiles(time_queries(search_ilike, queries))
+    pr.yes(f"{ilike_p99:.2f}ms")
+
+    pr.green("folded key")
+    folded_p50, folded_p99 = percentiles(time_queries(search_folded, queries))
+    pr.yes(f"{folded_p99:.2f}ms")
+
+    db_session.close()
+
+    pr.summary("lookup rows", table_size)
+    pr.summary("ilike p50", f"{ilike_p50:.2f} ms")
+    pr.summary("ilike p99", f"{ilike_p99:.2f} ms")
+    pr.summary("folded p50", f"{folded_p50:.2f} ms")
+    pr.summary("folded p99", f"{folded_p99:.2f} ms")
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
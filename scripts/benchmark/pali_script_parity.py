@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""Parity test and benchmark of tools/pali_script.py
+against the Path Nirvana pali-script.mjs run with node.
+
+Transliterates every lookup_key and every inflection in the db
+plus a set of edge cases with both, and reports any differences.
+Needs node.
+
+Usage:
+uv run python scripts/benchmark/pali_script_parity.py
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword, Lookup
+from tools.pali_script import (
+    roman_to_sinhala,
+    sinhala_to_devanagari,
+    sinhala_to_thai,
+    transliterate_batch,
+)
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+EDGE_CASES = [
+    "",
+    "a",
+    "ka",
+    "k",
+    "kkh",
+    "saṃyutta",
+    "saṁyutta",
+    "ñāṇa",
+    "aiau",
+    "kai kau",
+    "kṛṣṇa",
+    "l̥ḹṝ",
+    "śiva",
+    "dvattiṃsa",
+    "ḍḍh ṭṭh",
+    "Buddha",
+    "a-b c'd",
+    "1 23 x",
+    "brāhmaṇa\n",
+    "ka\nkha",
+    "ū ī ā e o",
+    "aa āā ii",
+    "ḥ",
+]
+
+
+def run_node(pth: ProjectPaths, words: list[str]) -> tuple[dict, float]:
+    """Transliterate words with transliterate_lookup.mjs, as the build did."""
+
+    input_path = pth.temp_dir / "pali_script_parity_input.json"
+    output_path = pth.temp_dir / "pali_script_parity_output.json"
+    with open(input_path, "w") as f:
+        json.dump(
+            {str(n): {"inflections": [word]} for n, word in enumerate(words)},
+            f,
+            ensure_ascii=False,
+        )
+
+    start = time.perf_counter()
+    subprocess.run(
+        [
+            "node",
+            "db/lookup/transliterate_lookup.mjs",
+            input_path.resolve(),
+            output_path.resolve(),
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    node_time = time.perf_counter() - start
+
+    with open(output_path) as f:
+        node_output = json.load(f)
+    input_path.unlink()
+    output_path.unlink()
+    return node_output, node_time
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("pāḷi script parity with pali-script.mjs")
+
+    pth = ProjectPaths()
+    pth.temp_dir.mkdir(parents=True, exist_ok=True)
+    db_session = get_db_session(pth.dpd_db_path)
+
+    pr.green("collecting words")
+    words_set: set[str] = set(EDGE_CASES)
+    words_set.update(i.lookup_key for i in db_session.query(Lookup.lookup_key))
+    for i in db_session.query(DpdHeadword):
+        words_set.update(i.inflections_list_all)
+    words = sorted(words_set)
+    pr.yes(len(words))
+
+    pr.green("node")
+    node_output, node_time = run_node(pth, words)
+    pr.yes(f"{node_time:.2f} s")
+
+    pr.green("python")
+    roman_to_sinhala.cache_clear()
+    sinhala_to_devanagari.cache_clear()
+    sinhala_to_thai.cache_clear()
+    start = time.perf_counter()
+    sinhala, devanagari, thai = transliterate_batch(words)
+    python_time = time.perf_counter() - start
+    pr.yes(f"{python_time:.2f} s")
+
+    pr.green("comparing")
+    differences = []
+    for n, word in enumerate(words):
+        node = node_output[str(n)]
+        python = [sinhala[n], devanagari[n], thai[n]]
+        expected = [node["sinhala"][0], node["devanagari"][0], node["thai"][0]]
+        if python != expected:
+            differences.append((word, expected, python))
+    if differences:
+        pr.no(len(differences))
+        for word, expected, python in differences[:20]:
+            pr.red(f"{word!r} node: {expected} python: {python}")
+    else:
+        pr.yes("same")
+
+    pr.summary("words", len(words))
+    pr.summary("differences", len(differences))
+    pr.summary("node", f"{node_time:.2f} s")
+    pr.summary("python", f"{python_time:.2f} s")
+    pr.toc()
+
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
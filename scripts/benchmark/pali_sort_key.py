@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""Micro-benchmark of sorting all lemma_1 in Pāḷi alphabetical order.
+Compare the regex key, the translation table key uncached and cached,
+and ORDER BY lemma_1 COLLATE pali in SQLite, and check they agree.
+
+Usage:
+uv run python scripts/benchmark/pali_sort_key.py [repeats]
+"""
+
+import re
+import sys
+import time
+
+from sqlalchemy import text
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword
+from tools.pali_sort_key import letter_to_number, pali_sort_key
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def regex_sort_key(word: str) -> str:
+    """The key as it was, with the pattern built on every call."""
+
+    pattern = "|".join(re.escape(key) for key in letter_to_number.keys())
+
+    def replace(match):
+        return letter_to_number[match.group(0)]
+
+    return re.sub(pattern, replace, word)
+
+
+def time_sort(words: list[str], key, repeats: int) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    for __i__ in range(repeats):
+        sorted_words = sorted(words, key=key)
+    return (time.perf_counter() - start) / repeats, sorted_words
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("pāḷi sort key benchmark")
+
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+    words = [i.lemma_1 for i in db_session.query(DpdHeadword.lemma_1)]
+
+    regex_time, regex_sorted = time_sort(words, regex_sort_key, repeats)
+    uncached_time, uncached_sorted = time_sort(
+        words, pali_sort_key.__wrapped__, repeats
+    )
+    pali_sort_key.cache_clear()
+    pali_sort_key(words[0])
+    cached_time, cached_sorted = time_sort(words, pali_sort_key, repeats)
+
+    pali_sort_key.cache_clear()
+    start = time.perf_counter()
+    for __i__ in range(repeats):
+        sql_sorted = [
+            i[0]
+            for i in db_session.execute(
+                text("SELECT lemma_1 FROM dpd_headwords ORDER BY lemma_1 COLLATE pali")
+            )
+        ]
+    sql_time = (time.perf_counter() - start) / repeats
+
+    pr.green("same order")
+    if regex_sorted == uncached_sorted == cached_sorted == sql_sorted:
+        pr.yes("yes")
+    else:
+        pr.no("no")
+
+    pr.summary("lemma_1", len(words))
+    pr.summary("regex", f"{regex_time * 1000:.1f} ms")
+    pr.summary("translate", f"{uncached_time * 1000:.1f} ms")
+    pr.summary("translate cached", f"{cached_time * 1000:.1f} ms")
+    pr.summary("COLLATE pali", f"{sql_time * 1000:.1f} ms")
+    pr.summary("speedup", f"{regex_time / cached_time:.1f}x")
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+"""Check that the sectioned PDF build makes the same pages and outline
+as compiling one Typst document, and time both, and time rebuilding
+with nothing changed and with one headword changed.
+
+The parts are kept in exporter/pdf/sections_benchmark, which is removed
+at the end, and the pdfs are written to temp/.
+
+Usage:
+uv run python scripts/benchmark/pdf_sections.py [processes]
+"""
+
+import shutil
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+import typst
+from pypdf import PdfReader
+
+from exporter.pdf.pdf_exporter import (
+    GlobalVars,
+    make_typst_data,
+    render_front_matter,
+    save_typist_file,
+    split_typst_parts,
+)
+from exporter.pdf.pdf_sections import (
+    OutlineItem,
+    SectionStats,
+    build_sectioned_pdf,
+    read_outline,
+)
+from tools.printer import printer as pr
+
+
+def flat_outline(outline: list[OutlineItem], depth: int = 0) -> list[tuple]:
+    flat = []
+    for item in outline:
+        flat.append((depth, item.title, item.page))
+        flat.extend(flat_outline(item.children, depth + 1))
+    return flat
+
+
+def compare_pdfs(monolithic_path: Path, sectioned_path: Path) -> list[str]:
+    """The differences in page count, text on each page and outline."""
+
+    monolithic = PdfReader(monolithic_path)
+    sectioned = PdfReader(sectioned_path)
+
+    differences = []
+    if len(monolithic.pages) != len(sectioned.pages):
+        differences.append(
+            f"pages {len(monolithic.pages)} != {len(sectioned.pages)}"
+        )
+    for page_number, (page_1, page_2) in enumerate(
+        zip(monolithic.pages, sectioned.pages), start=1
+    ):
+        if sorted(page_1.extract_text().split()) != sorted(
+            page_2.extract_text().split()
+        ):
+            differences.append(f"text on page {page_number}")
+    if flat_outline(read_outline(monolithic)) != flat_outline(read_outline(sectioned)):
+        differences.append("outline")
+    return differences
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("pdf sections")
+
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
+    g = GlobalVars()
+    make_typst_data(g)
+    pth = g.pth
+    pth.typst_sections_dir = pth.typst_sections_dir.parent / "sections_benchmark"
+    shutil.rmtree(pth.typst_sections_dir, ignore_errors=True)
+    pth.temp_dir.mkdir(parents=True, exist_ok=True)
+    monolithic_path = pth.temp_dir / "pdf_sections_monolithic.pdf"
+    sectioned_path = pth.temp_dir / "pdf_sections_sectioned.pdf"
+
+    pr.green_title("monolithic")
+    save_typist_file(g)
+    start = time.perf_counter()
+    typst.compile(str(pth.typst_lite_data_path), output=str(monolithic_path))
+    monolithic_time = time.perf_counter() - start
+
+    def build(name: str) -> tuple[float, SectionStats]:
+        pr.green_title(name)
+        layout, parts = split_typst_parts(g)
+        start = time.perf_counter()
+        stats = build_sectioned_pdf(
+            pth,
+            layout,
+            partial(render_front_matter, g),
+            parts,
+            sectioned_path,
+            processes,
+        )
+        return time.perf_counter() - start, stats
+
+    cold_time, cold_stats = build("sectioned, nothing saved")
+    differences = compare_pdfs(monolithic_path, sectioned_path)
+
+    warm_time, warm_stats = build("sectioned, nothing changed")
+
+    # change the first headword of the first Pāḷi letter
+    letter_start, __, __ = next(part for part in g.typst_parts if part[2])
+    headword_index = letter_start + 1
+    g.typst_data[headword_index] = g.typst_data[headword_index].replace(
+        "#blue-bold[", "#blue-bold[changed ", 1
+    )
+    changed_time, changed_stats = build("sectioned, one headword changed")
+
+    shutil.rmtree(pth.typst_sections_dir)
+
+    for difference in differences:
+        pr.red(difference)
+    pr.summary("differences", len(differences))
+    pr.summary("parts", cold_stats.parts)
+    pr.summary("pages", cold_stats.pages)
+    pr.summary("monolithic", f"{monolithic_time:.2f} s")
+    pr.summary(
+        "nothing saved", f"{cold_time:.2f} s, {cold_stats.compiled} compiled"
+    )
+    pr.summary(
+        "nothing changed", f"{warm_time:.2f} s, {warm_stats.compiled} compiled"
+    )
+    pr.summary(
+        "one headword", f"{changed_time:.2f} s, {changed_stats.compiled} compiled"
+    )
+    pr.toc()
+
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+"""Load benchmark for webapp database access.
+Compare requests per second of a new engine per search (the old way)
+with the shared, read-only, pooled engine (the new way).
+
+Usage:
+uv run python scripts/benchmark/webapp_db_pool.py [requests] [threads]
+"""
+
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from db.db_helpers import get_db_session, get_db_session_readonly
+from db.models import DpdHeadword, Lookup
+from tools.lookup_key_fold import fold_lookup_key
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+def search(db_session: Session, q: str) -> int:
+    """The database part of a webapp search, without the templates."""
+
+    with db_session:
+        lookup_results = (
+            db_session.query(Lookup)
+            .filter(Lookup.lookup_key_folded == fold_lookup_key(q))
+            .all()
+        )
+        hits = 0
+        for lookup_result in lookup_results:
+            if lookup_result.headwords:
+                hits += len(
+                    db_session.query(DpdHeadword)
+                    .filter(DpdHeadword.id.in_(lookup_result.headwords_unpack))
+                    .all()
+                )
+        return hits
+
+
+def run_load(
+    session_factory: Callable[[], Session], queries: list[str], threads: int
+) -> float:
+    """Run all queries across a thread pool and return requests per second."""
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda q: search(session_factory(), q), queries))
+    elapsed = time.perf_counter() - start
+    return len(queries) / elapsed
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("webapp database pool benchmark")
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    pth = ProjectPaths()
+
+    pr.green("sampling lookup keys")
+    with get_db_session(pth.dpd_db_path) as db_session:
+        keys = [
+            i.lookup_key
+            for i in db_session.query(Lookup.lookup_key)
+            .filter(Lookup.headwords != "")
+            .limit(50_000)
+        ]
+    queries = [random.choice(keys) for _ in range(requests)]
+    pr.yes(len(queries))
+
+    pr.green("new engine per request")
+    before = run_load(lambda: get_db_session(pth.dpd_db_path), queries, threads)
+    pr.yes(f"{before:.1f}/s")
+
+    pr.green("shared read-only pool")
+    get_db_session_readonly(pth.dpd_db_path).close()  # warm up the pool
+    after = run_load(lambda: get_db_session_readonly(pth.dpd_db_path), queries, threads)
+    pr.yes(f"{after:.1f}/s")
+
+    pr.summary("requests", requests)
+    pr.summary("threads", threads)
+    pr.summary("before", f"{before:.1f} requests/s")
+    pr.summary("after", f"{after:.1f} requests/s")
+    pr.summary("speedup", f"{after / before:.2f}x")
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+"""Check the MDictWriter fast path writes byte-for-byte the same files
+as the original path, and time both.
+
+The entries are every headword with its meaning, every inflection as a
+@@@LINK= synonym as in tools/mdict_exporter.py, and some duplicate,
+punctuated and mixed case keys, written as mdx 2.0, mdx 1.2, utf16 and mdd,
+to a seekable and an unseekable output.
+
+Usage:
+uv run python scripts/benchmark/writemdict_compat.py [copies]
+"""
+
+import io
+import sys
+import time
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+from tools.writemdict.writemdict import MDictWriter
+
+
+class Unseekable:
+    """A binary output the writer can't seek in."""
+
+    def __init__(self) -> None:
+        self.buffer = io.BytesIO()
+
+    def write(self, data: bytes) -> int:
+        return self.buffer.write(data)
+
+    def getvalue(self) -> bytes:
+        return self.buffer.getvalue()
+
+
+def make_entries(copies: int) -> list[tuple[str, str]]:
+    """Headwords, inflection links and keys which only differ
+    in case, punctuation or being a link."""
+
+    pth = ProjectPaths()
+    db_session = get_db_session(pth.dpd_db_path)
+
+    entries: list[tuple[str, str]] = []
+    for copy in range(copies):
+        suffix = f" {copy}" if copy else ""
+        for i in db_session.query(DpdHeadword).all():
+            word = f"{i.lemma_clean}{suffix}"
+            entries.append((word, f"<h3>{i.lemma_1}</h3><p>{i.meaning_combo}</p>"))
+            for inflection in i.inflections_list_all:
+                if inflection != word:
+                    entries.append((f"{inflection}{suffix}", f"@@@LINK={word}"))
+
+    edge_cases = [
+        ("dhamma", "@@@LINK=dhamma 1"),
+        ("dhamma", "<p>dhamma</p>"),
+        ("Dhamma", "@@@link=dhamma 2"),
+        ("dhamma.", "<p>dhamma.</p>"),
+        ("dhamma-", "@@@LINK=dhamma 3"),
+        ("dham ma", "<p>dham ma</p>"),
+        ("dham-ma", "@@@LINK=dham ma"),
+        ("DHAMMA", "<p>DHAMMA</p>"),
+        ("!?", "<p>punctuation only</p>"),
+        ("", "<p>empty key</p>"),
+        ("ñāṇa", "@@@LINK=ñāṇa"),
+    ]
+    entries.extend(edge_cases)
+    entries.extend(reversed(edge_cases))
+    return entries
+
+
+def write(entries: list, output, **kwargs) -> tuple[bytes, float]:
+    start = time.perf_counter()
+    writer = MDictWriter(entries, title="compat", description="compat", **kwargs)
+    writer.write(output)
+    return output.getvalue(), time.perf_counter() - start
+
+
+def main():
+    pr.stop_logging()
+    pr.tic()
+    pr.title("mdict writer fast path")
+
+    copies = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+    pr.green("making entries")
+    entries = make_entries(copies)
+    pr.yes(len(entries))
+
+    assets = [
+        (f"\\file_{n}.css", bytes(range(256)) * (n + 1) * 50) for n in range(50)
+    ]
+
+    configs = {
+        "mdx 2.0": (entries, {}),
+        "mdx 1.2": (entries, {"version": "1.2"}),
+        "mdx utf16": (entries, {"encoding": "utf16"}),
+        "mdx small blocks": (entries, {"block_size": 1024}),
+        "mdd": (assets, {"is_mdd": True}),
+    }
+
+    differences = 0
+    original_time = 0.0
+    fast_time = 0.0
+    for name, (data, kwargs) in configs.items():
+        pr.green(name)
+        original, seconds = write(data, io.BytesIO(), **kwargs)
+        original_time += seconds
+
+        fast, seconds = write(data, io.BytesIO(), fast=True, **kwargs)
+        fast_time += seconds
+        unseekable, __seconds__ = write(data, Unseekable(), fast=True, **kwargs)
+
+        if original == fast == unseekable:
+            pr.yes(f"{len(original)} bytes")
+        else:
+            pr.no("different")
+            differences += 1
+
+    pr.summary("entries", len(entries))
+    pr.summary("differences", differences)
+    pr.summary("original", f"{original_time:.2f} s")
+    pr.summary("fast", f"{fast_time:.2f} s")
+    pr.toc()
+
+    if differences:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,794 @@
+#!/usr/bin/env python3
+
+"""Run the stages of generate_components.sh as a dependency graph.
+
+Each stage declares what it reads and writes:
+- db:table              the table's source columns, i.e. all columns
+                        which no stage writes, or the whole table
+                        if a stage writes the whole table
+- db:table.column       one column
+- file:path             a file, or a directory and everything in it
+- config:section.option one config.ini option
+
+A stage waits for every earlier stage which writes what it reads,
+or reads what it writes. All writes to dpd.db, and all writes to
+config.ini, keep their order. The scripts read and then write in one
+transaction, and two such SQLite writers fail with "database is locked"
+at once rather than waiting. And they rewrite the whole config.ini.
+Stages which don't depend on each other, eg readers and a writer,
+run at the same time.
+
+A stage is skipped when its script and everything it reads hash the same as
+on its last successful run, and what only it writes hasn't changed since.
+
+Each stage's output goes to temp/build_logs/, and a timing report
+is printed and saved to temp/build_report.tsv.
+
+Usage:
+uv run python scripts/build/build_orchestrator.py [options]
+
+Options:
+--jobs n    run up to n stages at once, default is the number of cpu cores
+--force     run all stages, don't skip unchanged ones
+--dry-run   print the stages and what they wait for, then exit
+"""
+
+import configparser
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Set
+
+import psutil
+
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+class Resource(NamedTuple):
+    kind: str  # db, file or config
+    name: str  # table, path or section
+    part: str  # column or option, "" for the whole table or path
+
+    @classmethod
+    def parse(cls, resource: str) -> "Resource":
+        kind, name = resource.split(":", 1)
+        if kind == "file":
+            return cls(kind, name.rstrip("/"), "")
+        name, __dot__, part = name.partition(".")
+        return cls(kind, name, part)
+
+
+class Stage:
+    def __init__(
+        self,
+        name: str,
+        command: List[str],
+        reads: List[str] = [],
+        writes: List[str] = [],
+        always_run: bool = False,
+        barrier: bool = False,
+        args: List[str] = [],
+    ) -> None:
+        """A build stage.
+        command[-1] is the script, its contents are part of the input hash.
+        args are passed to the script.
+        always_run stages are never skipped.
+        barrier stages wait for all earlier stages, and all later stages
+        wait for them."""
+
+        self.name = name
+        self.command = command
+        self.script = Path(command[-1])
+        self.reads = [Resource.parse(i) for i in reads]
+        self.writes = [Resource.parse(i) for i in writes]
+        self.always_run = always_run
+        self.barrier = barrier
+        self.args = args
+        self.depends_on: Set[str] = set()
+
+        self.status = "waiting"
+        self.start = 0.0
+        self.seconds = 0.0
+        self.input_hash = ""
+
+
+PY = "python"
+FAMILY_CONFIG = [
+    "config:exporter.make_dpd",
+    "config:exporter.make_tpr",
+    "config:exporter.make_ebook",
+    "config:regenerate.db_rebuild",
+]
+
+STAGES: List[Stage] = [
+    Stage(
+        "version",
+        [PY, "tools/version.py"],
+        reads=["file:pyproject.toml"],
+        writes=["db:db_info", "config:version.version"],
+        always_run=True,
+        barrier=True,
+    ),
+    Stage(
+        "config_uposatha_day",
+        [PY, "scripts/build/config_uposatha_day.py"],
+        reads=["file:tools/uposatha_day.ini"],
+        writes=["config:*"],
+        always_run=True,
+        barrier=True,
+    ),
+    Stage(
+        "lookup_key_folded",
+        [PY, "db/lookup/lookup_key_folded.py"],
+        reads=["db:lookup.lookup_key"],
+        writes=["db:lookup.lookup_key_folded"],
+    ),
+    Stage(
+        "db_indexes",
+        [PY, "db/db_indexes.py"],
+        reads=["file:db/models.py"],
+        # it changes the schema of several tables
+        barrier=True,
+    ),
+    Stage(
+        "inflection_templates",
+        [PY, "db/inflections/create_inflection_templates.py"],
+        reads=["file:db/inflections/inflection_templates.xlsx"],
+        writes=[
+            "db:inflection_templates",
+            "db:db_info",
+            "file:shared_data/changed_templates",
+        ],
+    ),
+    Stage(
+        "inflection_tables",
+        [PY, "db/inflections/generate_inflection_tables.py"],
+        reads=[
+            "db:dpd_headwords",
+            "db:inflection_templates",
+            "file:shared_data/changed_templates",
+            "file:shared_data/all_tipitaka_words",
+            "config:regenerate.db_rebuild",
+            "config:regenerate.inflections",
+        ],
+        writes=[
+            "db:dpd_headwords.inflections",
+            "db:dpd_headwords.inflections_html",
+            "file:shared_data/changed_headwords",
+            "file:shared_data/headword_stem_pattern_dict",
+            "config:regenerate.inflections",
+        ],
+    ),
+    Stage(
+        "sanskrit_root_families",
+        [PY, "scripts/build/sanskrit_root_families_updater.py"],
+        reads=[
+            "db:dpd_headwords",
+            "db:dpd_roots",
+            "file:db/sanskrit/root_families_sanskrit.tsv",
+        ],
+        writes=[
+            "db:dpd_headwords.sanskrit",
+            "file:db/sanskrit/root_families_sanskrit.tsv",
+        ],
+    ),
+    Stage(
+        "families",
+        [PY, "db/families/family_builder.py"],
+        reads=[
+            "db:dpd_headwords",
+            "db:dpd_roots",
+            "config:anki.update",
+            # the builder uses the functions of the separate family scripts
+            "file:db/families/family_root.py",
+            "file:db/families/family_word.py",
+            "file:db/families/family_compound.py",
+            "file:db/families/family_set.py",
+            "file:db/families/family_idiom.py",
+            "file:db/families/root_info.py",
+            "file:db/families/root_matrix.py",
+        ]
+        + FAMILY_CONFIG,
+        writes=[
+            "db:family_root",
+            "db:family_word",
+            "db:family_compound",
+            "db:family_set",
+            "db:family_idiom",
+            "db:dpd_roots.root_info",
+            "db:dpd_roots.root_matrix",
+            "db:dpd_headwords.family_idioms",
+            "db:lookup.roots",
+            "db:db_info",
+        ],
+    ),
+    Stage(
+        "families_to_json",
+        [PY, "scripts/build/families_to_json.py"],
+        reads=[
+            "db:family_root",
+            "db:family_word",
+            "db:family_compound",
+            "db:family_set",
+            "db:family_idiom",
+        ],
+        writes=[
+            "file:exporter/goldendict/javascript/family_compound_json.js",
+            "file:exporter/goldendict/javascript/family_idiom_json.js",
+            "file:exporter/goldendict/javascript/family_root_json.js",
+            "file:exporter/goldendict/javascript/family_set_json.js",
+            "file:exporter/goldendict/javascript/family_word_json.js",
+        ],
+    ),
+    Stage(
+        "anki_updater",
+        [PY, "scripts/build/anki_updater.py"],
+        reads=[
+            "db:dpd_headwords",
+            "db:dpd_headwords.sanskrit",
+            "db:dpd_headwords.family_idioms",
+            "config:anki.update",
+            "config:anki.db_path",
+            "config:anki.backup_path",
+        ],
+        always_run=True,
+    ),
+    Stage(
+        "variants",
+        [PY, "db/variants/main.py"],
+        reads=[
+            "file:resources/dpd_submodules/cst/romn",
+            "file:resources/dpd_submodules/bjt/public/static/roman_json",
+            "file:resources/syāmaraṭṭha_1927",
+            "file:resources/sc-data/sc_bilara_data/variant/pli/ms",
+        ],
+        writes=["db:lookup.variant", "file:temp/variants.json"],
+        args=["--parallel"],
+    ),
+    Stage(
+        "grammar",
+        [PY, "db/grammar/grammar_to_lookup.py"],
+        reads=["db:dpd_headwords", "db:inflection_templates"],
+        writes=["db:lookup.grammar"],
+    ),
+    Stage(
+        "deconstructor_extract_archive",
+        [PY, "scripts/build/deconstructor_extract_archive.py"],
+        reads=[
+            "file:resources/deconstructor_output/deconstructor_output.json.tar.gz",
+            "config:deconstructor.use_premade",
+        ],
+        writes=["file:resources/deconstructor_output/deconstructor_output.json"],
+    ),
+    Stage(
+        "deconstructor_add_to_db",
+        [PY, "scripts/build/deconstructor_output_add_to_db.py"],
+        reads=[
+            "file:resources/deconstructor_output/deconstructor_output.json",
+            "config:deconstructor.use_premade",
+        ],
+        writes=["db:lookup.deconstructor"],
+    ),
+    Stage(
+        "deconstructor",
+        ["go", "run", "go_modules/deconstructor/main.go"],
+        reads=[
+            "db:dpd_headwords",
+            "db:dpd_headwords.inflections",
+            "db:lookup.headwords",
+            "file:shared_data/deconstructor",
+            "config:exporter.make_deconstructor",
+            "config:deconstructor.use_premade",
+        ],
+        # it deletes and re-inserts every row of the lookup table
+        writes=[
+            "db:lookup",
+            "file:go_modules/deconstructor/output",
+        ],
+    ),
+    Stage(
+        "tarball_deconstructor_output",
+        [PY, "scripts/build/tarball_deconstructor_output.py"],
+        reads=[
+            "file:resources/deconstructor_output/deconstructor_output.json",
+            "config:deconstructor.use_premade",
+        ],
+        writes=[
+            "file:resources/deconstructor_output/deconstructor_output.json.tar.gz"
+        ],
+    ),
+    Stage(
+        "api_ca_evi_iti",
+        [PY, "scripts/build/api_ca_evi_iti.py"],
+        reads=["db:dpd_headwords", "db:dpd_headwords.inflections"],
+        writes=["db:dpd_headwords.inflections_api_ca_eva_iti"],
+    ),
+    Stage(
+        "transliterate_inflections",
+        [PY, "db/inflections/transliterate_inflections.py"],
+        reads=[
+            "db:dpd_headwords.inflections",
+            "db:dpd_headwords.inflections_api_ca_eva_iti",
+            "file:shared_data/changed_templates",
+            "file:shared_data/changed_headwords",
+            "config:regenerate.transliterations",
+        ],
+        writes=[
+            "db:dpd_headwords.inflections_sinhala",
+            "db:dpd_headwords.inflections_devanagari",
+            "db:dpd_headwords.inflections_thai",
+        ],
+    ),
+    Stage(
+        "inflections_to_headwords",
+        [PY, "db/inflections/inflections_to_headwords.py"],
+        reads=[
+            "db:dpd_headwords",
+            "db:dpd_headwords.inflections",
+            "db:dpd_headwords.inflections_api_ca_eva_iti",
+        ],
+        writes=["db:lookup.headwords", "file:exporter/tpr/output/i2h.tsv"],
+    ),
+    Stage(
+        "spelling_mistakes",
+        [PY, "db/lookup/spelling_mistakes.py"],
+        reads=["file:shared_data/deconstructor/spelling_mistakes.tsv"],
+        writes=["db:lookup.spelling"],
+    ),
+    Stage(
+        "transliterate_lookup",
+        [PY, "db/lookup/transliterate_lookup_table.py"],
+        reads=["db:lookup.lookup_key", "config:regenerate.transliterations"],
+        writes=[
+            "db:lookup.sinhala",
+            "db:lookup.devanagari",
+            "db:lookup.thai",
+            "config:regenerate.transliterations",
+        ],
+    ),
+    Stage(
+        "help_abbrev",
+        [PY, "db/lookup/help_abbrev_add_to_lookup.py"],
+        reads=[
+            "file:shared_data/help/help.tsv",
+            "file:shared_data/help/abbreviations.tsv",
+        ],
+        writes=["db:lookup.help", "db:lookup.abbrev"],
+    ),
+    Stage(
+        "ebt_counter",
+        [PY, "scripts/build/ebt_counter.py"],
+        reads=[
+            "db:dpd_headwords.inflections",
+            "db:dpd_headwords.inflections_api_ca_eva_iti",
+            "file:shared_data/frequency/cst_file_freq.json",
+        ],
+        writes=[
+            "db:dpd_headwords.ebt_count",
+            "file:shared_data/frequency/cst_file_freq_matrix",
+        ],
+    ),
+    Stage(
+        "frequency",
+        ["go", "run", "go_modules/frequency/main.go"],
+        reads=[
+            "db:dpd_headwords",
+            "db:dpd_headwords.inflections",
+            "db:dpd_headwords.inflections_api_ca_eva_iti",
+            "file:shared_data/frequency",
+            "file:go_modules/frequency/templates",
+        ],
+        writes=["db:dpd_headwords.freq_data", "db:dpd_headwords.freq_html"],
+    ),
+    Stage(
+        "epd",
+        [PY, "db/epd/epd_to_lookup.py"],
+        reads=["db:dpd_headwords", "db:dpd_roots", "config:dictionary.make_link"],
+        writes=["db:lookup.epd"],
+    ),
+    Stage(
+        "lookup_key_folded_refill",
+        [PY, "db/lookup/lookup_key_folded.py"],
+        reads=["db:lookup.lookup_key"],
+        writes=["db:lookup.lookup_key_folded"],
+        always_run=True,
+    ),
+    Stage(
+        "db_analyze",
+        [PY, "db/db_analyze.py"],
+        always_run=True,
+        barrier=True,
+    ),
+    Stage(
+        "dealbreakers",
+        [PY, "scripts/build/dealbreakers.py"],
+        always_run=True,
+        barrier=True,
+    ),
+]
+
+
+def find_dependencies(stages: List[Stage]) -> None:
+    """Work out which earlier stages each stage must wait for."""
+
+    for n, later in enumerate(stages):
+        for earlier in stages[:n]:
+            if earlier.barrier or later.barrier:
+                later.depends_on.add(earlier.name)
+            elif conflicts(earlier, later):
+                later.depends_on.add(earlier.name)
+
+
+def conflicts(earlier: Stage, later: Stage) -> bool:
+    for w in earlier.writes:
+        for r in later.reads:
+            if overlaps(w, r):
+                return True
+        for w2 in later.writes:
+            if same_writer_resource(w, w2):
+                return True
+    for r in earlier.reads:
+        for w in later.writes:
+            if overlaps(w, r):
+                return True
+    return False
+
+
+def overlaps(write: Resource, read: Resource) -> bool:
+    if write.kind != read.kind:
+        return False
+    if write.kind == "config" and write.name == "*":
+        return True
+    if write.kind == "file":
+        return (
+            write.name == read.name
+            or read.name.startswith(f"{write.name}/")
+            or write.name.startswith(f"{read.name}/")
+        )
+    if write.name != read.name:
+        return False
+    if write.part == read.part:
+        return True
+    # a whole table write changes every column,
+    # but reading a table only means its source columns
+    return write.part == ""
+
+
+def same_writer_resource(a: Resource, b: Resource) -> bool:
+    """Keep the order of all writes to dpd.db, and all writes to config.ini."""
+    if a.kind != b.kind:
+        return False
+    if a.kind in ("db", "config"):
+        return True
+    return overlaps(a, b)
+
+
+def same_table(a: Resource, b: Resource) -> bool:
+    return a.kind == b.kind == "db" and a.name == b.name
+
+
+class ResourceHasher:
+    """Hash the current content of resources.
+    Hashes are kept until a stage which writes the resource finishes."""
+
+    def __init__(self, pth: ProjectPaths, stages: List[Stage]) -> None:
+        self.pth = pth
+        self.base_dir = pth.dpd_db_path.parent
+        self._hashes: Dict[Resource, str] = {}
+        self._lock = threading.Lock()
+
+        # columns written by a stage are derived, all others are source data
+        self.derived_columns: Dict[str, Set[str]] = {}
+        self.whole_tables: Set[str] = set()
+        for stage in stages:
+            for w in stage.writes:
+                if w.kind != "db":
+                    continue
+                if w.part:
+                    self.derived_columns.setdefault(w.name, set()).add(w.part)
+                else:
+                    self.whole_tables.add(w.name)
+
+    def get(self, resource: Resource) -> str:
+        with self._lock:
+            if resource in self._hashes:
+                return self._hashes[resource]
+        if resource.kind == "db":
+            value = self._hash_db(resource)
+        elif resource.kind == "file":
+            value = self._hash_file(self.base_dir / resource.name)
+        else:
+            value = self._hash_config(resource)
+        with self._lock:
+            self._hashes[resource] = value
+        return value
+
+    def forget(self, writes: List[Resource]) -> None:
+        with self._lock:
+            for cached in list(self._hashes):
+                if any(
+                    overlaps(w, cached)
+                    or same_table(w, cached)
+                    or w.kind == cached.kind == "config"
+                    for w in writes
+                ):
+                    del self._hashes[cached]
+
+    def _hash_db(self, resource: Resource) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        uri = f"file:{self.pth.dpd_db_path}?mode=ro"
+        try:
+            with sqlite3.connect(uri, uri=True) as conn:
+                table_info = conn.execute(
+                    f'PRAGMA table_info("{resource.name}")'
+                ).fetchall()
+                if not table_info:
+                    return "missing"
+                columns = [i[1] for i in table_info]
+                pk = [i[1] for i in sorted(table_info, key=lambda x: x[5]) if i[5]]
+                order_by = ", ".join(pk) if pk else "rowid"
+
+                if resource.part:
+                    sql = (
+                        f"SELECT {order_by}, {resource.part} FROM {resource.name} "
+                        f"WHERE {resource.part} IS NOT NULL "
+                        f"AND {resource.part} != '' "
+                        f"ORDER BY {order_by}"
+                    )
+                else:
+                    if resource.name not in self.whole_tables:
+                        derived = self.derived_columns.get(resource.name, set())
+                        columns = [i for i in columns if i not in derived]
+                    sql = (
+                        f"SELECT {', '.join(columns)} FROM {resource.name} "
+                        f"ORDER BY {order_by}"
+                    )
+
+                for row in conn.execute(sql):
+                    hasher.update(repr(row).encode())
+        except sqlite3.OperationalError:
+            return "missing"
+        return hasher.hexdigest()
+
+    def _hash_file(self, path: Path) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        if path.is_file():
+            with open(path, "rb") as f:
+                while chunk := f.read(1024 * 1024):
+                    hasher.update(chunk)
+        elif path.is_dir():
+            # large text corpora, so size and mtime rather than contents
+            for file in sorted(path.rglob("*")):
+                if file.is_file():
+                    stat = file.stat()
+                    hasher.update(
+                        f"{file.relative_to(path)}{stat.st_size}{stat.st_mtime_ns}".encode()
+                    )
+        else:
+            return "missing"
+        return hasher.hexdigest()
+
+    def _hash_config(self, resource: Resource) -> str:
+        config = configparser.ConfigParser()
+        config.read(self.base_dir / "config.ini")
+        return config.get(resource.name, resource.part, fallback="missing")
+
+
+class Orchestrator:
+    def __init__(self, stages: List[Stage], jobs: int, force: bool) -> None:
+        self.pth = ProjectPaths()
+        self.base_dir = self.pth.dpd_db_path.parent
+        self.stages = stages
+        self.stages_dict = {stage.name: stage for stage in stages}
+        self.jobs = jobs
+        self.force = force
+        self.hasher = ResourceHasher(self.pth, stages)
+        self.state_path = self.pth.temp_dir / "build_state.json"
+        self.report_path = self.pth.temp_dir / "build_report.tsv"
+        self.logs_dir = self.pth.temp_dir / "build_logs"
+        self.state: Dict[str, Dict] = {}
+        self.state_lock = threading.Lock()
+        self.start = 0.0
+
+        # outputs only one stage writes can be checked before skipping it
+        writers: Dict[Resource, int] = {}
+        for stage in stages:
+            for w in stage.writes:
+                writers[w] = writers.get(w, 0) + 1
+        # and a whole table only if no other stage writes its columns
+        for stage in stages:
+            for w in stage.writes:
+                whole_table = Resource(w.kind, w.name, "")
+                if w.kind == "db" and w.part and whole_table in writers:
+                    writers[whole_table] += 1
+        self.exclusive_writes = {
+            stage.name: [w for w in stage.writes if writers[w] == 1 and w.name != "*"]
+            for stage in stages
+        }
+
+        find_dependencies(stages)
+
+    def input_hash(self, stage: Stage) -> str:
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(" ".join(stage.command + stage.args).encode())
+        hasher.update(self.hasher._hash_file(self.base_dir / stage.script).encode())
+        for resource in stage.reads:
+            hasher.update(f"{resource}{self.hasher.get(resource)}".encode())
+        return hasher.hexdigest()
+
+    def output_hashes(self, stage: Stage) -> Dict[str, str]:
+        return {
+            str(tuple(w)): self.hasher.get(w) for w in self.exclusive_writes[stage.name]
+        }
+
+    def can_skip(self, stage: Stage) -> bool:
+        if self.force or stage.always_run:
+            return False
+        previous = self.state.get(stage.name)
+        if not previous or previous["input_hash"] != stage.input_hash:
+            return False
+        return previous["output_hashes"] == self.output_hashes(stage)
+
+    def run_stage(self, stage: Stage) -> None:
+        stage.start = time.perf_counter() - self.start
+        stage.input_hash = self.input_hash(stage)
+
+        if self.can_skip(stage):
+            stage.status = "skipped"
+            stage.seconds = time.perf_counter() - self.start - stage.start
+            return
+
+        command = stage.command + stage.args
+        if command[0] == PY:
+            command = [sys.executable] + command[1:]
+
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.pathsep.join(
+            [str(self.base_dir), env.get("PYTHONPATH", "")]
+        ).rstrip(os.pathsep)
+
+        log_path = self.logs_dir / f"{stage.name}.log"
+        with open(log_path, "w") as log:
+            process = subprocess.run(
+                command,
+                cwd=self.base_dir,
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+        stage.seconds = time.perf_counter() - self.start - stage.start
+        self.hasher.forget(stage.writes)
+
+        if process.returncode != 0:
+            stage.status = "failed"
+            return
+
+        stage.status = "ran"
+        with self.state_lock:
+            self.state[stage.name] = {
+                "input_hash": stage.input_hash,
+                "output_hashes": self.output_hashes(stage),
+            }
+            self.save_state()
+
+    def run(self) -> bool:
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        if self.state_path.exists():
+            self.state = json.loads(self.state_path.read_text())
+
+        self.start = time.perf_counter()
+        done: Set[str] = set()
+        failed = False
+        running: Dict[Future, Stage] = {}
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while True:
+                if not failed:
+                    for stage in self.stages:
+                        if (
+                            stage.status == "waiting"
+                            and stage.depends_on <= done
+                            and len(running) < self.jobs
+                        ):
+                            stage.status = "running"
+                            pr.white(f"starting {stage.name}")
+                            pr.yes("")
+                            running[executor.submit(self.run_stage, stage)] = stage
+
+                if not running:
+                    break
+
+                finished, __pending__ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    future.result()
+                    pr.green(f"{stage.name}")
+                    pr.yes(f"{stage.status} {stage.seconds:.1f}s")
+                    if stage.status == "failed":
+                        pr.red(f"see {self.logs_dir / f'{stage.name}.log'}")
+                        failed = True
+                    else:
+                        done.add(stage.name)
+
+        self.report()
+        return not failed
+
+    def save_state(self) -> None:
+        self.state_path.write_text(json.dumps(self.state, indent=1))
+
+    def report(self) -> None:
+        wall_time = time.perf_counter() - self.start
+        stage_time = sum(stage.seconds for stage in self.stages)
+
+        pr.title("timing report")
+        with open(self.report_path, "w", newline="") as f:
+            writer = csv.writer(f, delimiter="\t")
+            writer.writerow(["stage", "status", "start", "seconds", "depends_on"])
+            for stage in sorted(self.stages, key=lambda x: x.seconds, reverse=True):
+                writer.writerow(
+                    [
+                        stage.name,
+                        stage.status,
+                        f"{stage.start:.1f}",
+                        f"{stage.seconds:.1f}",
+                        " ".join(sorted(stage.depends_on)),
+                    ]
+                )
+                pr.summary(stage.name, f"{stage.status} {stage.seconds:.1f}s")
+
+        pr.summary("stage time", f"{stage_time:.1f}s")
+        pr.summary("wall time", f"{wall_time:.1f}s")
+        pr.summary("report", str(self.report_path))
+
+
+def print_plan(stages: List[Stage]) -> None:
+    for stage in stages:
+        # only the direct dependencies which aren't implied by another
+        direct = set(stage.depends_on)
+        for name in stage.depends_on:
+            for other in stages:
+                if other.name == name:
+                    direct -= other.depends_on
+        pr.summary(stage.name, ", ".join(sorted(direct)) or "-")
+
+
+def main():
+    pr.tic()
+    pr.title("build orchestrator")
+
+    args = sys.argv[1:]
+    force = "--force" in args
+    dry_run = "--dry-run" in args
+    jobs = psutil.cpu_count() or 1
+    if "--jobs" in args:
+        jobs = int(args[args.index("--jobs") + 1])
+
+    if not ProjectPaths().dpd_db_path.exists():
+        pr.red("dpd.db file not found")
+        sys.exit(1)
+
+    orchestrator = Orchestrator(STAGES, jobs, force)
+
+    if dry_run:
+        print_plan(STAGES)
+        pr.toc()
+        return
+
+    ok = orchestrator.run()
+    pr.toc()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
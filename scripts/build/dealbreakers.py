@@ -6,6 +6,7 @@ import sys
 from rich import print
 from db.db_helpers import get_db_session
 from db.models import DpdHeadword
+from db_tests.db_tests_manager import DbTestManager
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
 from tools.pos import POS
@@ -20,6 +21,7 @@ def main():
     apostrophe_in_key_fields(db_session)
 
     ok = pos_not_in_pos(db_session)
+    db_tests_report(db_session)
     if not ok:
         sys.exit(1)
     pr.toc()
@@ -98,5 +100,24 @@ def apostrophe_in_key_fields(db_session):
     print(found)
 
 
+def db_tests_report(db_session):
+    """Run all the db_tests, and report how many headwords fail.
+    These aren't dealbreakers, so they don't stop the build."""
+    db_test_manager = DbTestManager()
+    print(f"[green]{'running db tests':<30} ", end="")
+
+    try:
+        failures = db_test_manager.run_all_tests_on_all_db_entries(db_session)
+    except Exception as e:
+        print(f"[red]{e}")
+        return
+    print(len(failures))
+    if not db_test_manager.integrity_ok:
+        print(
+            f"[red]{'invalid tests skipped':<30} "
+            f"{len(db_test_manager.integrity_failures)}"
+        )
+
+
 if __name__ == "__main__":
     main()
@@ -6,9 +6,9 @@ in early texts and add to db.
 EBT books are VIN1, VIN2, DN, MN, SN, AN and KN1
 """
 
-import json
 from db.db_helpers import get_db_session
 from db.models import DpdHeadword
+from tools.corpus_frequency import CorpusFrequency
 from tools.paths import ProjectPaths
 from tools.printer import printer as pr
 from tools.pali_text_files import ebts
@@ -22,8 +22,9 @@ def main():
     pth = ProjectPaths()
     db_session = get_db_session(pth.dpd_db_path)
 
-    with open(pth.cst_file_freq) as f:
-        cst_file_freq_dict = json.load(f)
+    cst_freq = CorpusFrequency.load_or_build(
+        pth.cst_file_freq, pth.cst_file_freq_matrix_dir
+    )
 
     db = db_session.query(DpdHeadword).all()
 
@@ -31,14 +32,9 @@ def main():
     pr.yes("ok")
 
     pr.green("calculating")
-    for i in db:
-        total = 0
-        inflections = i.inflections_list_all
-        for ebt_file in ebt_files:
-            file_freq = cst_file_freq_dict[ebt_file]
-            for inflection in inflections:
-                total += file_freq.get(inflection, 0)
-        i.ebt_count = total
+    ebt_counts = cst_freq.counts([i.inflections_list_all for i in db], ebt_files)
+    for i, ebt_count in zip(db, ebt_counts):
+        i.ebt_count = int(ebt_count)
     pr.yes("ok")
 
     pr.green("saving to db")
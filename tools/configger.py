@@ -45,6 +45,7 @@ DEFAULT_CONFIG = {
         "make_link": "yes",
         "show_id": "no",
         "data_limit": "0",
+        "incremental": "no",
     },
     "exporter": {
         "make_dpd": "yes",
@@ -64,6 +65,8 @@ DEFAULT_CONFIG = {
     "anki": {"update": "no", "db_path": "", "backup_path": ""},
     "simsapa": {"app_path": "", "db_path": ""},
     "tpr": {"db_path": ""},
+    "pdf": {"sectioned": "no"},
+    "webapp": {"cache_max_mb": "256", "cache_warm_up": "0"},
 }
 
 
@@ -0,0 +1,197 @@
+"""A word x file frequency matrix of a Pāḷi corpus,
+built once from xyz_file_freq.json and memory-mapped from disk.
+
+The matrix is stored in CSR form as plain NumPy arrays:
+indptr[word_id] : indptr[word_id + 1] slices indices (file ids) and data (counts).
+vocab.json and files.json map the row and column numbers back to words and files.
+The matrix is rebuilt whenever the source json changes.
+
+Usage:
+corpus = CorpusFrequency.load_or_build(pth.cst_file_freq, pth.cst_file_freq_matrix_dir)
+corpus.count(["dhammo", "dhammaṃ"], ["s0101m.mul.xml"])
+corpus.counts([i.inflections_list_all for i in db], ebt_files)
+"""
+
+import json
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+
+
+class CorpusFrequency:
+    def __init__(
+        self,
+        vocab: list[str],
+        files: list[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+    ) -> None:
+        self.vocab = vocab
+        self.files = files
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+        self.word_to_id: dict[str, int] = {word: n for n, word in enumerate(vocab)}
+        self.file_to_id: dict[str, int] = {file: n for n, file in enumerate(files)}
+        self._rows: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.vocab)
+
+    @classmethod
+    def build(cls, file_freq: dict[str, dict[str, int]]) -> "CorpusFrequency":
+        """Build the matrix from {file: {word: count}}."""
+
+        files = list(file_freq)
+        word_to_id: dict[str, int] = {}
+        rows: list[int] = []
+        cols: list[int] = []
+        counts: list[int] = []
+        for file_id, file in enumerate(files):
+            for word, count in file_freq[file].items():
+                if count:
+                    rows.append(word_to_id.setdefault(word, len(word_to_id)))
+                    cols.append(file_id)
+                    counts.append(count)
+
+        rows_array = np.array(rows, dtype=np.int64)
+        cols_array = np.array(cols, dtype=np.int32)
+        order = np.lexsort((cols_array, rows_array))
+
+        indptr = np.zeros(len(word_to_id) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows_array, minlength=len(word_to_id)), out=indptr[1:])
+
+        return cls(
+            list(word_to_id),
+            files,
+            indptr,
+            cols_array[order],
+            np.array(counts, dtype=np.int64)[order],
+        )
+
+    @classmethod
+    def from_json(cls, file_freq_path: Path) -> "CorpusFrequency":
+        with open(file_freq_path) as f:
+            return cls.build(json.load(f))
+
+    def save(self, matrix_dir: Path, source: Optional[Path] = None) -> None:
+        matrix_dir.mkdir(parents=True, exist_ok=True)
+        np.save(matrix_dir / "indptr.npy", self.indptr)
+        np.save(matrix_dir / "indices.npy", self.indices)
+        np.save(matrix_dir / "data.npy", self.data)
+        with open(matrix_dir / "vocab.json", "w") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        with open(matrix_dir / "files.json", "w") as f:
+            json.dump(self.files, f, ensure_ascii=False)
+        # written last, so an interrupted save is rebuilt
+        with open(matrix_dir / "source.json", "w") as f:
+            json.dump(_source_stamp(source), f)
+
+    @classmethod
+    def load(cls, matrix_dir: Path, mmap: bool = True) -> "CorpusFrequency":
+        mmap_mode = "r" if mmap else None
+        with open(matrix_dir / "vocab.json") as f:
+            vocab = json.load(f)
+        with open(matrix_dir / "files.json") as f:
+            files = json.load(f)
+        return cls(
+            vocab,
+            files,
+            np.load(matrix_dir / "indptr.npy", mmap_mode=mmap_mode),
+            np.load(matrix_dir / "indices.npy", mmap_mode=mmap_mode),
+            np.load(matrix_dir / "data.npy", mmap_mode=mmap_mode),
+        )
+
+    @classmethod
+    def load_or_build(
+        cls, file_freq_path: Path, matrix_dir: Path, mmap: bool = True
+    ) -> "CorpusFrequency":
+        """Load the saved matrix, or build and save it
+        if it's missing or the json has changed since."""
+
+        stamp_path = matrix_dir / "source.json"
+        if stamp_path.exists():
+            with open(stamp_path) as f:
+                if json.load(f) == _source_stamp(file_freq_path):
+                    return cls.load(matrix_dir, mmap)
+
+        corpus = cls.from_json(file_freq_path)
+        corpus.save(matrix_dir, file_freq_path)
+        return corpus
+
+    def word_ids(self, words: Iterable[str]) -> np.ndarray:
+        """Row of each word, len(self) for words not in the corpus."""
+
+        missing = len(self.vocab)
+        return np.array(
+            [self.word_to_id.get(word, missing) for word in words], dtype=np.int64
+        )
+
+    def file_mask(self, files: Optional[Iterable[str]] = None) -> np.ndarray:
+        """A boolean mask of the files, all files if None.
+        Raises KeyError on an unknown file."""
+
+        if files is None:
+            return np.ones(len(self.files), dtype=bool)
+        mask = np.zeros(len(self.files), dtype=bool)
+        mask[[self.file_to_id[file] for file in files]] = True
+        return mask
+
+    def word_totals(self, files: Optional[Iterable[str]] = None) -> np.ndarray:
+        """The count of every word over the file subset,
+        with a trailing 0 for words not in the corpus."""
+
+        if self._rows is None:
+            self._rows = np.repeat(
+                np.arange(len(self.vocab), dtype=np.int64), np.diff(self.indptr)
+            )
+        selected = self.file_mask(files)[self.indices]
+        # float weights are exact far beyond any corpus count
+        return np.bincount(
+            self._rows[selected],
+            weights=self.data[selected],
+            minlength=len(self.vocab) + 1,
+        ).astype(np.int64)
+
+    def count(self, words: Iterable[str], files: Optional[Iterable[str]] = None) -> int:
+        """Total count of the words over the file subset.
+        Repeated words are counted every time."""
+
+        ids = self.word_ids(words)
+        ids = ids[ids < len(self.vocab)]
+        starts = self.indptr[ids]
+        lengths = self.indptr[ids + 1] - starts
+
+        # positions of all the words' nonzero entries, without a python loop
+        offsets = np.cumsum(lengths) - lengths
+        positions = (
+            np.arange(lengths.sum(), dtype=np.int64)
+            - np.repeat(offsets, lengths)
+            + np.repeat(starts, lengths)
+        )
+        selected = self.file_mask(files)[self.indices[positions]]
+        return int(self.data[positions][selected].sum())
+
+    def counts(
+        self, word_lists: list[list[str]], files: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """Total count of each list of words over the file subset.
+        Repeated words are counted every time."""
+
+        totals = self.word_totals(files)
+        lengths = [len(words) for words in word_lists]
+        ids = self.word_ids(word for words in word_lists for word in words)
+        groups = np.repeat(np.arange(len(word_lists), dtype=np.int64), lengths)
+        return np.bincount(
+            groups, weights=totals[ids], minlength=len(word_lists)
+        ).astype(np.int64)
+
+
+def _source_stamp(source: Optional[Path]) -> dict:
+    if source is None:
+        return {}
+    stat = source.stat()
+    return {"name": source.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+
+"""A pre-parsed store of the CST texts for finding source, sutta and example,
+so find_cst_source_sutta_example doesn't have to parse whole books every time.
+
+Every head and p tag of a book is stored once with its source, sutta,
+cleaned text and, for gāthā lines, the whole gāthā, in an sqlite db
+with an FTS5 trigram index on the text.
+
+The XML is streamed with lxml iterparse, and the source and sutta come from
+the same per-book functions in tools/cst_source_sutta_example.py.
+
+A book is only queried while its XML files are unchanged,
+otherwise find_cst_source_sutta_example parses the book as before.
+
+Usage:
+uv run python tools/cst_sentence_store.py [book ...]
+"""
+
+import json
+import re
+import sqlite3
+import sys
+from contextlib import closing
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Optional
+
+from lxml import etree
+
+from tools.cst_source_sutta_example import (
+    CstSourceSuttaExample,
+    GlobalData,
+    clean_example,
+    gatha_example,
+    get_cst_filenames,
+    sentence_example,
+    update_source_sutta,
+)
+from tools.pali_text_files import cst_texts
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+# regex special characters, a pattern without any is searched for literally
+REGEX_CHARACTERS = set(".^$*+?{}[]\\|()")
+
+SCHEMA = """
+CREATE TABLE books (book TEXT PRIMARY KEY, files TEXT NOT NULL);
+CREATE TABLE chunks (
+    id INTEGER PRIMARY KEY,
+    book TEXT NOT NULL,
+    rend TEXT NOT NULL,
+    text TEXT NOT NULL,
+    gatha TEXT NOT NULL,
+    source TEXT NOT NULL,
+    sutta TEXT NOT NULL
+);
+CREATE INDEX chunks_book ON chunks (book);
+CREATE VIRTUAL TABLE chunks_fts USING fts5(
+    text, content='chunks', content_rowid='id', tokenize='trigram'
+);
+"""
+
+
+class CstElement:
+    """The attributes of an lxml element, read like a bs4 Tag."""
+
+    def __init__(self, attrs: dict[str, str]) -> None:
+        self.attrs = attrs
+
+    def __getitem__(self, key: str) -> str:
+        return self.attrs[key]
+
+    def has_attr(self, key: str) -> bool:
+        return key in self.attrs
+
+
+class CstChunk(CstElement):
+    """A head or p tag with the text it has after GlobalData.make_cst_soup,
+    and its head or p siblings, which is all the per-book functions use."""
+
+    def __init__(
+        self,
+        attrs: dict[str, str],
+        text: str,
+        parent: CstElement,
+        chunks: list["CstChunk"],
+        previous_index: Optional[int],
+    ) -> None:
+        super().__init__(attrs)
+        self.text = text
+        self.parent = parent
+        self._chunks = chunks
+        self.previous_index = previous_index
+        self.next_index: Optional[int] = None
+
+    @property
+    def previous_sibling(self) -> Optional["CstChunk"]:
+        if self.previous_index is None:
+            return None
+        return self._chunks[self.previous_index]
+
+    @property
+    def next_sibling(self) -> Optional["CstChunk"]:
+        if self.next_index is None:
+            return None
+        return self._chunks[self.next_index]
+
+
+def element_text(element) -> str:
+    """Text of an element with pb tags removed
+    and notes as [variant readings]."""
+
+    parts = [element.text or ""]
+    for child in element:
+        if child.tag == "note":
+            parts.append(f" [{''.join(child.itertext())}] ")
+        elif isinstance(child.tag, str) and child.tag != "pb":
+            parts.append(element_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def previous_element(element):
+    """The previous sibling, skipping pb tags and comments."""
+
+    previous = element.getprevious()
+    while previous is not None and (
+        not isinstance(previous.tag, str) or previous.tag == "pb"
+    ):
+        previous = previous.getprevious()
+    return previous
+
+
+def read_cst_chunks(xml_path: Path) -> list[CstChunk]:
+    """Stream the head and p tags of a CST XML file in document order."""
+
+    chunks: list[CstChunk] = []
+    chunk_index: dict = {}
+    parents: dict = {}
+
+    for __event__, element in etree.iterparse(
+        str(xml_path), events=("end",), tag=("head", "p")
+    ):
+        parent_element = element.getparent()
+        if parent_element not in parents:
+            parents[parent_element] = CstElement(dict(parent_element.attrib))
+
+        # a sibling which isn't a head or p ends a gāthā
+        previous = previous_element(element)
+        previous_index = chunk_index.get(previous) if previous is not None else None
+
+        chunk = CstChunk(
+            dict(element.attrib),
+            element_text(element),
+            parents[parent_element],
+            chunks,
+            previous_index,
+        )
+        if previous_index is not None:
+            chunks[previous_index].next_index = len(chunks)
+        chunk_index[element] = len(chunks)
+        chunks.append(chunk)
+
+        # the text is read, so only the empty tag is kept for its siblings
+        element.clear(keep_tail=True)
+
+    return chunks
+
+
+def files_stamp(pth: ProjectPaths, book: str) -> str:
+    """Size and modification time of all the book's files."""
+
+    stamp = []
+    for filename in get_cst_filenames(book):
+        xml_path = pth.cst_xml_dir / filename.replace(".txt", ".xml")
+        stat = xml_path.stat()
+        stamp.append([filename, stat.st_size, stat.st_mtime_ns])
+    return json.dumps(stamp)
+
+
+def parse_book(book: str) -> tuple[str, str, list[tuple[str, str, str, str, str, str]]]:
+    """All the chunks of a book which have a source and sutta."""
+
+    pth = ProjectPaths()
+    g = GlobalData(book, "", load_soups=False)
+    g.debug = False
+    rows = []
+
+    for filename in g.filenames:
+        xml_path = pth.cst_xml_dir / filename.replace(".txt", ".xml")
+        for x in read_cst_chunks(xml_path):
+            g.x = x  # type:ignore
+            g.example = ""
+            g.text = clean_example(x.text)
+            gatha = gatha_example(x) if "gatha" in x["rend"] else ""
+
+            update_source_sutta(g, book)
+
+            if g.source and g.sutta:
+                rows.append((book, x["rend"], g.text, gatha, g.source, g.sutta))
+
+    return book, files_stamp(pth, book), rows
+
+
+def build_cst_sentence_store(
+    db_path: Path, books: Optional[list[str]] = None, processes: Optional[int] = None
+) -> dict[str, int]:
+    """Parse the books in parallel and rebuild the store.
+    Returns the number of chunks of each book."""
+
+    books = books or list(cst_texts)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = db_path.with_suffix(".tmp")
+    temp_path.unlink(missing_ok=True)
+
+    counts: dict[str, int] = {}
+    with closing(sqlite3.connect(temp_path)) as conn:
+        conn.executescript(SCHEMA)
+        with Pool(processes) as pool:
+            for book, stamp, rows in pool.imap(parse_book, books):
+                conn.execute("INSERT INTO books VALUES (?, ?)", (book, stamp))
+                conn.executemany(
+                    "INSERT INTO chunks (book, rend, text, gatha, source, sutta) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                counts[book] = len(rows)
+        conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+        conn.commit()
+
+    # replaced in one go, so the gui never sees half a store
+    temp_path.replace(db_path)
+    return counts
+
+
+def query_cst_examples(
+    book: str, text_to_find: str, db_path: Optional[Path] = None
+) -> Optional[list[CstSourceSuttaExample]]:
+    """Same results as parsing the book in find_cst_source_sutta_example.
+    None if the book isn't in the store or its files have changed."""
+
+    pth = ProjectPaths()
+    db_path = db_path or pth.cst_sentence_store_path
+    if not db_path.exists():
+        return None
+
+    with closing(sqlite3.connect(db_path)) as conn:
+        stored = conn.execute(
+            "SELECT files FROM books WHERE book = ?", (book,)
+        ).fetchone()
+        try:
+            if stored is None or stored[0] != files_stamp(pth, book):
+                return None
+        except FileNotFoundError:
+            return None
+
+        # a literal of three or more characters can use the trigram index,
+        # the regex is always tested below
+        if len(text_to_find) >= 3 and not set(text_to_find) & REGEX_CHARACTERS:
+            phrase = '"' + text_to_find.replace('"', '""') + '"'
+            rows = conn.execute(
+                """
+                SELECT chunks.rend, chunks.text, chunks.gatha,
+                    chunks.source, chunks.sutta
+                FROM chunks_fts JOIN chunks ON chunks.id = chunks_fts.rowid
+                WHERE chunks_fts MATCH ? AND chunks.book = ?
+                ORDER BY chunks.id
+                """,
+                (phrase, book),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT rend, text, gatha, source, sutta FROM chunks "
+                "WHERE book = ? ORDER BY id",
+                (book,),
+            ).fetchall()
+
+    examples: list[CstSourceSuttaExample] = []
+    seen: set[tuple[str, str, str]] = set()
+    for rend, text, gatha, source, sutta in rows:
+        if not re.findall(text_to_find, text):
+            continue
+        if "gatha" in rend:
+            example = gatha
+        else:
+            example = sentence_example(text, text_to_find)
+        if example and (source, sutta, example) not in seen:
+            seen.add((source, sutta, example))
+            examples.append(CstSourceSuttaExample(source, sutta, example))
+
+    return examples
+
+
+def main():
+    pr.tic()
+    pr.title("building the cst sentence store")
+
+    pth = ProjectPaths()
+    books = sys.argv[1:] or list(cst_texts)
+
+    pr.green(f"parsing {len(books)} books")
+    counts = build_cst_sentence_store(pth.cst_sentence_store_path, books)
+    pr.yes(sum(counts.values()))
+
+    pr.toc()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import re
-import time
 from collections import namedtuple
 
 from bs4 import BeautifulSoup, element
@@ -156,7 +155,7 @@ def get_cst_filenames(books: list[str] | str) -> list[str]:
 
 
 class GlobalData:
-    def __init__(self, book: str, text_to_find: str) -> None:
+    def __init__(self, book: str, text_to_find: str, load_soups: bool = True) -> None:
         self.debug: bool = True
         self.pth = ProjectPaths()
 
@@ -164,7 +163,7 @@ class GlobalData:
         self.text_to_find: str = text_to_find
         self.source_sutta_examples: list[CstSourceSuttaExample] = []
         self.filenames: list[str] = get_cst_filenames(self.book)
-        self.soups: list[BeautifulSoup] = self.make_cst_soup(self.filenames)
+        self.soups: list[BeautifulSoup] = self.make_cst_soup() if load_soups else []
         self.x: element.Tag | None  # current soup item
 
         self.source: str = ""
@@ -269,71 +268,70 @@ class GlobalData:
                 return 0
 
 
-def find_gatha_example(g: GlobalData):
-    """Find an example in a gāthā."""
-
-    x = g.x
-    example = ""
+def gatha_example(x) -> str:
+    """Assemble the whole gāthā that x is a line of, gatha1 to gathalast.
+    x is a bs4 Tag or anything with the same text, rend and siblings."""
 
-    start_time = time.time()
-    while True:
-        if x:
-            if x.text == "\n":
-                x = x.previous_sibling
-            elif x["rend"] == "gatha1":
-                break
-            elif x["rend"] == "gatha2":
-                x = x.previous_sibling
-            elif x["rend"] == "gatha3":
-                x = x.previous_sibling
-            elif x["rend"] == "gathalast":
-                x = x.previous_sibling
-            if time.time() - start_time > 1:
-                print(f"[bright_red]{g.text_to_find} [red]is stuck in a loop")
-                break
+    # back to the first line
+    while x is not None:
+        if x.text == "\n":
+            x = x.previous_sibling
+        elif x["rend"] in ["gatha2", "gatha3", "gathalast"]:
+            x = x.previous_sibling
+        else:
+            break
+    if x is None:
+        return ""
 
-    text = clean_gatha(x.text)
-    example += text
+    example = clean_gatha(x.text)
 
     while True:
-        try:
-            if x is not None:
-                x = x.next_sibling
-                if x.text == "\n":
-                    pass
-                elif x["rend"] == "gatha2":
-                    text = clean_gatha(x.text)
-                    text = text.replace(".", ",")
-                    example += text
-                elif x["rend"] == "gatha3":
-                    text = clean_gatha(x.text)
-                    text = text.replace(".", ",")
-                    example += text
-                elif x["rend"] == "gathalast":
-                    text = clean_gatha(x.text)
-                    text = re.sub(",$", ".", text)
-                    example += text
-                    break
-            else:
-                break
-        except AttributeError as e:
-            print(f"[red]{e}")
-            print(g.text_to_find)
-            print(x)
+        x = x.next_sibling
+        if x is None:
+            break
+        elif x.text == "\n":
+            pass
+        elif x["rend"] == "gatha2":
+            text = clean_gatha(x.text)
+            text = text.replace(".", ",")
+            example += text
+        elif x["rend"] == "gatha3":
+            text = clean_gatha(x.text)
+            text = text.replace(".", ",")
+            example += text
+        elif x["rend"] == "gathalast":
+            text = clean_gatha(x.text)
+            text = re.sub(",$", ".", text)
+            example += text
             break
 
+    return example
+
+
+def find_gatha_example(g: GlobalData):
+    """Find an example in a gāthā."""
+
+    example = gatha_example(g.x)
     if example:
         g.example = example
 
 
-def find_sentence_example(g: GlobalData):
-    sentences = split_sentences(g.text)
+def sentence_example(text: str, text_to_find: str) -> str:
+    """The last sentence containing text_to_find,
+    with the sentences before and after it."""
+
+    example = ""
+    sentences = split_sentences(text)
     for i, sentence in enumerate(sentences):
-        if re.findall(g.text_to_find, sentence):
+        if re.findall(text_to_find, sentence):
             prev_sentence = sentences[i - 1] if i > 0 else ""
             next_sentence = sentences[i + 1] if i < len(sentences) - 1 else ""
             example = f"{prev_sentence}{sentence}{next_sentence}"
+    return example
 
+
+def find_sentence_example(g: GlobalData):
+    example = sentence_example(g.text, g.text_to_find)
     if example:
         g.example = example
 
@@ -2580,10 +2578,155 @@ def apt_abhidhanapadipikatika(g: GlobalData):
         g.sutta = sutta.lower()
 
 
+def update_source_sutta(g: GlobalData, book: str):
+    """Update the source and sutta from the current soup item."""
+
+    match book:
+        case "vin1":
+            vin1_parajika(g)
+        case "vin2":
+            vin2_pacittiya(g)
+        case "vin3" | "vin4":
+            vin3_vin4_maha_culavagga(g)
+
+        case "dn1" | "dn2" | "dn3":
+            dn_digha_nikaya(g)
+        case "mn1" | "mn2" | "mn3":
+            mn_majjhima_nikaya(g)
+        case "sn1" | "sn2" | "sn3" | "sn4" | "sn5":
+            sn_samyutta_nikaya(g)
+        case (
+            "an1"
+            | "an2"
+            | "an3"
+            | "an4"
+            | "an5"
+            | "an6"
+            | "an7"
+            | "an8"
+            | "an9"
+            | "an10"
+            | "an11"
+        ):
+            an_anguttara_nikaya(g)
+        case "kn1":
+            kn1_khuddakapāṭha(g)
+        case "kn2":
+            kn2_dhammpada(g)
+        case "kn3":
+            kn3_udana(g)
+        case "kn4":
+            kn4_itivuttaka(g)
+        case "kn5":
+            kn5_suttanipata(g)
+        case "kn6":
+            kn6_vimanavatthu(g)
+        case "kn7":
+            kn7_petavatthu(g)
+        case "kn8" | "kn9":
+            kn8_9_thera_therigatha(g)
+        case "kn10" | "kn11":
+            kn10_11_thera_theriapadana(g)
+        case "kn12":
+            kn12_buddhavamsa(g)
+        case "kn13":
+            kn13_cariyapitaka(g)
+        case "kn14":
+            kn14_jataka(g)
+        case "kn15":
+            kn15_mahaniddesa(g)
+        case "kn16":
+            kn16_culaniddesa(g)
+        case "kn17":
+            kn17_patisambhidamagga(g)
+        case "kn18":
+            kn18_milindapanha(g)
+        case "kn19":
+            kn19_netti(g)
+        case "kn20":
+            kn20_petakopadesa(g)
+
+        case "abh1":
+            abh1_dhammasangani(g)
+        case "abh2":
+            abh2_vibhanga(g)
+        case "abh3":
+            abh3_dhatukatha(g)
+        case "abh4":
+            abh4_puggalapannati(g)
+        case "abh5":
+            abh5_kathavatthu(g)
+        case "abh6":
+            abh6_yamaka(g)
+        case "abh7":
+            abh7_patthana(g)
+
+        case "vina":
+            vina_commentary(g)
+        case "dna":
+            dna_digha_nikaya_commentary(g)
+        case "mna":
+            mna_majjhima_nikaya_commentary(g)
+        case "sna":
+            sna_samyutta_nikaya_commentary(g)
+        case "ana":
+            ana_anguttara_nikaya_commentary(g)
+        case "kn1a":
+            kn1a_khuddakapāṭha_commentary(g)
+        case "kn2a":
+            kn2a_dhammpada_commentary(g)
+        case "kn3a":
+            kn3a_udana_commentary(g)
+        case "kn4a":
+            kn4a_itivuttaka_commentary(g)
+        case "kn5a":
+            kn5a_suttanipata_commentary(g)
+        case "kn6a":
+            kn6a_vimanavatthu_commentary(g)
+        case "kn7a":
+            kn7a_petavatthu_commentary(g)
+        case "kn8a" | "kn9a":
+            kn8a_9a_thera_therigatha_commentary(g)
+        case "kn10a":
+            kn10a_therapadana_commentary(g)
+        # case "kn11a": doesnt exist
+        case "kn12a":
+            kn12a_buddhavamsa_commentary(g)
+        case "kn13a":
+            kn13a_cariyapitaka_commentary(g)
+        case "kn14a":
+            kn14a_jataka_commentary(g)
+        case "kn15a":
+            kn15a_mahaniddesa_commentary(g)
+        case "kn16a":
+            kn16a_culaniddesa_commentary(g)
+        case "kn17a":
+            kn17a_patisambhidamagga_commentary(g)
+        case "kn19a":
+            kn19a_netti_commentary(g)
+
+        case "vism" | "visma":
+            vism_visuddhimagga_and_commentary(g)
+        case "ap":
+            ap_abhidhanapadipika(g)
+        case "apt":
+            apt_abhidhanapadipikatika(g)
+
+
 def find_cst_source_sutta_example(
     book: str, text_to_find: str
 ) -> List[CstSourceSuttaExample]:
+    # query the prebuilt sentence store, if it's up to date
+    from tools.cst_sentence_store import query_cst_examples
+
+    stored_examples = query_cst_examples(book, text_to_find)
+    if stored_examples is not None:
+        return stored_examples
+
     g: GlobalData = GlobalData(book, text_to_find)
+    source_sutta_seen: set[tuple[str, str, str]] = set()
+    source_sutta_examples_seen: set[tuple[str, str, str]] = set()
+
     for soup in g.soups:
         soup_chunks = soup.find_all(["head", "p"])
         for x in soup_chunks:
@@ -2602,150 +2745,23 @@ def find_cst_source_sutta_example(
 
             # find source and sutta
 
-            match book:
-                case "vin1":
-                    vin1_parajika(g)
-                case "vin2":
-                    vin2_pacittiya(g)
-                case "vin3" | "vin4":
-                    vin3_vin4_maha_culavagga(g)
-
-                case "dn1" | "dn2" | "dn3":
-                    dn_digha_nikaya(g)
-                case "mn1" | "mn2" | "mn3":
-                    mn_majjhima_nikaya(g)
-                case "sn1" | "sn2" | "sn3" | "sn4" | "sn5":
-                    sn_samyutta_nikaya(g)
-                case (
-                    "an1"
-                    | "an2"
-                    | "an3"
-                    | "an4"
-                    | "an5"
-                    | "an6"
-                    | "an7"
-                    | "an8"
-                    | "an9"
-                    | "an10"
-                    | "an11"
-                ):
-                    an_anguttara_nikaya(g)
-                case "kn1":
-                    kn1_khuddakapāṭha(g)
-                case "kn2":
-                    kn2_dhammpada(g)
-                case "kn3":
-                    kn3_udana(g)
-                case "kn4":
-                    kn4_itivuttaka(g)
-                case "kn5":
-                    kn5_suttanipata(g)
-                case "kn6":
-                    kn6_vimanavatthu(g)
-                case "kn7":
-                    kn7_petavatthu(g)
-                case "kn8" | "kn9":
-                    kn8_9_thera_therigatha(g)
-                case "kn10" | "kn11":
-                    kn10_11_thera_theriapadana(g)
-                case "kn12":
-                    kn12_buddhavamsa(g)
-                case "kn13":
-                    kn13_cariyapitaka(g)
-                case "kn14":
-                    kn14_jataka(g)
-                case "kn15":
-                    kn15_mahaniddesa(g)
-                case "kn16":
-                    kn16_culaniddesa(g)
-                case "kn17":
-                    kn17_patisambhidamagga(g)
-                case "kn18":
-                    kn18_milindapanha(g)
-                case "kn19":
-                    kn19_netti(g)
-                case "kn20":
-                    kn20_petakopadesa(g)
-
-                case "abh1":
-                    abh1_dhammasangani(g)
-                case "abh2":
-                    abh2_vibhanga(g)
-                case "abh3":
-                    abh3_dhatukatha(g)
-                case "abh4":
-                    abh4_puggalapannati(g)
-                case "abh5":
-                    abh5_kathavatthu(g)
-                case "abh6":
-                    abh6_yamaka(g)
-                case "abh7":
-                    abh7_patthana(g)
-
-                case "vina":
-                    vina_commentary(g)
-                case "dna":
-                    dna_digha_nikaya_commentary(g)
-                case "mna":
-                    mna_majjhima_nikaya_commentary(g)
-                case "sna":
-                    sna_samyutta_nikaya_commentary(g)
-                case "ana":
-                    ana_anguttara_nikaya_commentary(g)
-                case "kn1a":
-                    kn1a_khuddakapāṭha_commentary(g)
-                case "kn2a":
-                    kn2a_dhammpada_commentary(g)
-                case "kn3a":
-                    kn3a_udana_commentary(g)
-                case "kn4a":
-                    kn4a_itivuttaka_commentary(g)
-                case "kn5a":
-                    kn5a_suttanipata_commentary(g)
-                case "kn6a":
-                    kn6a_vimanavatthu_commentary(g)
-                case "kn7a":
-                    kn7a_petavatthu_commentary(g)
-                case "kn8a" | "kn9a":
-                    kn8a_9a_thera_therigatha_commentary(g)
-                case "kn10a":
-                    kn10a_therapadana_commentary(g)
-                # case "kn11a": doesnt exist
-                case "kn12a":
-                    kn12a_buddhavamsa_commentary(g)
-                case "kn13a":
-                    kn13a_cariyapitaka_commentary(g)
-                case "kn14a":
-                    kn14a_jataka_commentary(g)
-                case "kn15a":
-                    kn15a_mahaniddesa_commentary(g)
-                case "kn16a":
-                    kn16a_culaniddesa_commentary(g)
-                case "kn17a":
-                    kn17a_patisambhidamagga_commentary(g)
-                case "kn19a":
-                    kn19a_netti_commentary(g)
-
-                case "vism" | "visma":
-                    vism_visuddhimagga_and_commentary(g)
-                case "ap":
-                    ap_abhidhanapadipika(g)
-                case "apt":
-                    apt_abhidhanapadipikatika(g)
+            update_source_sutta(g, book)
 
             if (
                 g.source
                 and g.sutta
-                and (g.source, g.source_alt, g.sutta) not in g.source_sutta_list
+                and (g.source, g.source_alt, g.sutta) not in source_sutta_seen
             ):
+                source_sutta_seen.add((g.source, g.source_alt, g.sutta))
                 g.source_sutta_list.append((g.source, g.source_alt, g.sutta))
 
             if (
                 g.source
                 and g.sutta
                 and g.example
-                and (g.source, g.sutta, g.example) not in g.source_sutta_examples
+                and (g.source, g.sutta, g.example) not in source_sutta_examples_seen
             ):
+                source_sutta_examples_seen.add((g.source, g.sutta, g.example))
                 g.source_sutta_examples.append(
                     CstSourceSuttaExample(
                         source=g.source,
@@ -1,6 +1,6 @@
-from sqlalchemy.orm import object_session
+from sqlalchemy.orm import Session, object_session
 
-from typing import List
+from typing import Dict, List, TypeVar
 
 from db.models import DpdHeadword, FamilyIdiom
 from db.models import FamilyCompound
@@ -10,73 +10,122 @@ from tools.paths import ProjectPaths
 
 pth = ProjectPaths()
 
+# stay well below SQLite's limit of variables per query
+IN_CLAUSE_BATCH_SIZE = 500
 
-def get_family_compounds(i: DpdHeadword) -> List[FamilyCompound]:
-    db_session = object_session(i)
-    if db_session is None:
-        raise Exception("No db_session")
-
-    if i.family_compound:
-        fc = db_session \
-            .query(FamilyCompound) \
-            .filter(FamilyCompound.compound_family.in_(i.family_compound_list)) \
-            .all()
-
-        # sort by order of the  family compound list
-        word_order = i.family_compound_list
-        fc = sorted(fc, key=lambda x: word_order.index(x.compound_family))
+FamilyRow = TypeVar("FamilyRow", FamilyCompound, FamilyIdiom, FamilySet)
 
-    else:
-        fc = db_session.query(FamilyCompound) \
-            .filter(FamilyCompound.compound_family == i.lemma_clean) \
-            .all()
 
-    # Make sure it's not a lazy-loaded iterable.
-    fc = list(fc)
-
-    return fc
-
-
-def get_family_idioms(i: DpdHeadword) -> List[FamilyIdiom]:
-    db_session = object_session(i)
+def _get_session(headwords: List[DpdHeadword]) -> Session:
+    db_session = object_session(headwords[0])
     if db_session is None:
         raise Exception("No db_session")
+    return db_session
+
+
+def _fetch_by_keys(
+    db_session: Session, model, key_column, keys: set[str]
+) -> Dict[str, FamilyRow]:
+    """Fetch all rows whose key is in keys, in as few queries as possible."""
+
+    keys_list = list(keys)
+    rows: Dict[str, FamilyRow] = {}
+    for start in range(0, len(keys_list), IN_CLAUSE_BATCH_SIZE):
+        batch = keys_list[start : start + IN_CLAUSE_BATCH_SIZE]
+        for row in db_session.query(model).filter(key_column.in_(batch)):
+            rows[getattr(row, key_column.key)] = row
+    return rows
+
+
+def _order_by_keys(
+    keys_per_headword: Dict[int, List[str]], rows: Dict[str, FamilyRow]
+) -> Dict[int, List[FamilyRow]]:
+    """Return each headword's rows in the order of its own key list,
+    without duplicates and skipping keys that have no row."""
+
+    results: Dict[int, List[FamilyRow]] = {}
+    for headword_id, keys in keys_per_headword.items():
+        ordered: List[FamilyRow] = []
+        for key in dict.fromkeys(keys):
+            row = rows.get(key)
+            if row is not None:
+                ordered.append(row)
+        results[headword_id] = ordered
+    return results
+
+
+def get_family_compounds_bulk(
+    headwords: List[DpdHeadword],
+) -> Dict[int, List[FamilyCompound]]:
+    """Get the compound families of many headwords in one query.
+    Returns {headword.id: [FamilyCompound]}, sorted by the order of each
+    headword's family_compound_list, or its lemma_clean if it has none."""
+
+    if not headwords:
+        return {}
+
+    # family_compound_list falls back to lemma_clean
+    keys_per_headword = {i.id: i.family_compound_list for i in headwords}
+    all_keys = {key for keys in keys_per_headword.values() for key in keys}
+    rows = _fetch_by_keys(
+        _get_session(headwords),
+        FamilyCompound,
+        FamilyCompound.compound_family,
+        all_keys,
+    )
+    return _order_by_keys(keys_per_headword, rows)
+
+
+def get_family_idioms_bulk(
+    headwords: List[DpdHeadword],
+) -> Dict[int, List[FamilyIdiom]]:
+    """Get the idioms of many headwords in one query.
+    Returns {headword.id: [FamilyIdiom]}, sorted by the order of each
+    headword's family_idioms_list, or its lemma_clean if it has none."""
+
+    if not headwords:
+        return {}
+
+    # family_idioms_list falls back to lemma_clean
+    keys_per_headword = {i.id: i.family_idioms_list for i in headwords}
+    all_keys = {key for keys in keys_per_headword.values() for key in keys}
+    rows = _fetch_by_keys(
+        _get_session(headwords),
+        FamilyIdiom,
+        FamilyIdiom.idiom,
+        all_keys,
+    )
+    return _order_by_keys(keys_per_headword, rows)
+
+
+def get_family_set_bulk(
+    headwords: List[DpdHeadword],
+) -> Dict[int, List[FamilySet]]:
+    """Get the sets of many headwords in one query.
+    Returns {headword.id: [FamilySet]}, sorted by the order of each
+    headword's family_set_list."""
+
+    if not headwords:
+        return {}
+
+    keys_per_headword = {i.id: i.family_set_list for i in headwords}
+    all_keys = {key for keys in keys_per_headword.values() for key in keys}
+    rows = _fetch_by_keys(
+        _get_session(headwords),
+        FamilySet,
+        FamilySet.set,
+        all_keys,
+    )
+    return _order_by_keys(keys_per_headword, rows)
 
-    if i.family_idioms:
-        fi = db_session \
-            .query(FamilyIdiom) \
-            .filter(FamilyIdiom.idiom.in_(i.family_idioms_list)) \
-            .all()
 
-        # sort by order of the  family compound list
-        word_order = i.family_idioms_list
-        fi = sorted(fi, key=lambda x: word_order.index(x.idiom))
-    else:
-        fi = db_session.query(FamilyIdiom) \
-            .filter(FamilyIdiom.idiom == i.lemma_clean) \
-            .all()
-
-    # Make sure it's not a lazy-loaded iterable.
-    fi = list(fi)
+def get_family_compounds(i: DpdHeadword) -> List[FamilyCompound]:
+    return get_family_compounds_bulk([i])[i.id]
 
-    return fi
 
+def get_family_idioms(i: DpdHeadword) -> List[FamilyIdiom]:
+    return get_family_idioms_bulk([i])[i.id]
 
 
 def get_family_set(i: DpdHeadword) -> List[FamilySet]:
-    db_session = object_session(i)
-    if db_session is None:
-        raise Exception("No db_session")
-
-    fs = db_session.query(FamilySet) \
-        .filter(FamilySet.set.in_(i.family_set_list)) \
-        .all()
-
-    # sort by order of the  family set list
-    word_order = i.family_set_list
-    fs = sorted(fs, key=lambda x: word_order.index(x.set))
-
-    # Make sure it's not a lazy-loaded iterable.
-    fs = list(fs)
-
-    return fs
+    return get_family_set_bulk([i])[i.id]
@@ -0,0 +1,263 @@
+"""Find the closest Pāḷi words to a misspelled one, without comparing it
+to every word.
+
+Words are split into Pāḷi letters, with aspirates like kh and th as one
+letter. Each letter also has a folded form, without vowel length,
+nasal, retroflex or aspirate differences: ā > a, ṃ ṁ ṅ ñ ṇ > n,
+ṭ > t, ḷ > l, kh > k, ṭh > t, and so on.
+
+Letters with the same folded form are a cheap substitution in the
+edit distance, so "dhamma", "dhāmma" and "damma" are close.
+Words are compared in lower case, and as they are and with their
+words sorted, so "masc a" is close to "a masc".
+A trigram index of the folded words finds the candidates,
+and only they are compared with the full distance. If no word shares
+a trigram with the term, all the words are compared.
+
+Before the full distance, each word's set of folded letters is compared
+with the term's, as a letter in only one of them needs a full edit.
+
+Usage:
+fuzzy_index = FuzzyIndex(words)
+fuzzy_index.closest("dhama", limit=10, cutoff=0.7)
+"""
+
+from collections import Counter
+from typing import Iterable, NamedTuple
+
+# aspirates and their unaspirated letter
+ASPIRATES = {
+    "kh": "k",
+    "gh": "g",
+    "ch": "c",
+    "jh": "j",
+    "ṭh": "t",
+    "ḍh": "d",
+    "th": "t",
+    "dh": "d",
+    "ph": "p",
+    "bh": "b",
+}
+
+FOLDED_LETTERS = {
+    "ā": "a",
+    "ī": "i",
+    "ū": "u",
+    "ṃ": "n",
+    "ṁ": "n",
+    "ṅ": "n",
+    "ñ": "n",
+    "ṇ": "n",
+    "ṭ": "t",
+    "ḍ": "d",
+    "ḷ": "l",
+    **ASPIRATES,
+}
+
+# edit costs, cheap substitutions are half the others
+SAME_FOLD_COST = 1
+EDIT_COST = 2
+
+# padding, so the start and end of a word are trigrams too
+WORD_START = "^"
+WORD_END = "$"
+
+# most candidates to compare with the full distance
+MAX_CANDIDATES = 300
+
+
+class WordForm(NamedTuple):
+    letters: tuple[str, ...]
+    folded: tuple[str, ...]
+
+
+class FuzzyMatch(NamedTuple):
+    word: str
+    distance: int
+    similarity: float
+
+
+def split_letters(word: str) -> tuple[str, ...]:
+    """Split a word into letters, with aspirates as one letter."""
+
+    letters = []
+    index = 0
+    while index < len(word):
+        if word[index : index + 2] in ASPIRATES:
+            letters.append(word[index : index + 2])
+            index += 2
+        else:
+            letters.append(word[index])
+            index += 1
+    return tuple(letters)
+
+
+def fold_letters(letters: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(FOLDED_LETTERS.get(letter, letter) for letter in letters)
+
+
+def make_forms(word: str) -> tuple[WordForm, WordForm]:
+    """The lower case word, and the same with its words sorted."""
+
+    word = word.lower()
+    letters = split_letters(word)
+    form = WordForm(letters, fold_letters(letters))
+    sorted_word = " ".join(sorted(word.split()))
+    if sorted_word == word:
+        return form, form
+    sorted_letters = split_letters(sorted_word)
+    return form, WordForm(sorted_letters, fold_letters(sorted_letters))
+
+
+def make_trigrams(folded: tuple[str, ...]) -> set[str]:
+    padded = (WORD_START, *folded, WORD_END)
+    return {"".join(padded[index : index + 3]) for index in range(len(padded) - 2)}
+
+
+def pali_distance(
+    letters_1: tuple[str, ...],
+    letters_2: tuple[str, ...],
+    folded_1: tuple[str, ...],
+    folded_2: tuple[str, ...],
+    max_distance: int,
+) -> int:
+    """Weighted Levenshtein distance between two words' letters.
+    Returns max_distance + 1 as soon as the distance is sure to be more."""
+
+    previous = list(range(0, (len(letters_2) + 1) * EDIT_COST, EDIT_COST))
+    for index_1, letter_1 in enumerate(letters_1, start=1):
+        current = [index_1 * EDIT_COST]
+        folded_letter_1 = folded_1[index_1 - 1]
+        for index_2, letter_2 in enumerate(letters_2, start=1):
+            if letter_1 == letter_2:
+                substitution = 0
+            elif folded_letter_1 == folded_2[index_2 - 1]:
+                substitution = SAME_FOLD_COST
+            else:
+                substitution = EDIT_COST
+            current.append(
+                min(
+                    previous[index_2] + EDIT_COST,
+                    current[index_2 - 1] + EDIT_COST,
+                    previous[index_2 - 1] + substitution,
+                )
+            )
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIndex:
+    def __init__(self, words: Iterable[str]) -> None:
+        self.words: list[str] = []
+        self.forms: list[tuple[WordForm, WordForm]] = []
+        self.trigrams: dict[str, list[int]] = {}
+        # each folded letter is one bit of a word's letters
+        self.letter_bits: dict[str, int] = {}
+        self.letter_masks: list[int] = []
+
+        # empty words are never a useful match
+        for word_id, word in enumerate(
+            sorted({word for word in words if word.strip()})
+        ):
+            forms = make_forms(word)
+            self.words.append(word)
+            self.forms.append(forms)
+            self.letter_masks.append(self.letter_mask(forms[0].folded))
+            trigrams = make_trigrams(forms[0].folded) | make_trigrams(forms[1].folded)
+            for trigram in trigrams:
+                self.trigrams.setdefault(trigram, []).append(word_id)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def letter_mask(self, folded: tuple[str, ...], add: bool = True) -> int:
+        """The bits of the folded letters. Letters not seen yet get a new bit,
+        or with add False, are left out."""
+
+        mask = 0
+        for letter in folded:
+            bit = self.letter_bits.get(letter)
+            if bit is None:
+                if not add:
+                    continue
+                bit = self.letter_bits[letter] = 1 << len(self.letter_bits)
+            mask |= bit
+        return mask
+
+    def closest_matches(
+        self, term: str, limit: int = 10, cutoff: float = 0.0
+    ) -> list[FuzzyMatch]:
+        """The closest words with a similarity of at least cutoff,
+        closest first. Similarity is 1 - distance / the longest distance
+        the two words could have, like difflib's ratio."""
+
+        if not term:
+            return []
+
+        term_form, term_sorted = make_forms(term)
+        term_trigrams = make_trigrams(term_form.folded) | make_trigrams(
+            term_sorted.folded
+        )
+
+        shared: Counter[int] = Counter()
+        for trigram in term_trigrams:
+            shared.update(self.trigrams.get(trigram, []))
+        if shared:
+            candidates = [word_id for word_id, __ in shared.most_common(MAX_CANDIDATES)]
+        else:
+            candidates = list(range(len(self.words)))
+
+        term_mask = self.letter_mask(term_form.folded, add=False)
+        unknown_letters = len(
+            {letter for letter in term_form.folded if letter not in self.letter_bits}
+        )
+
+        # a word can't be closer than cutoff if it's too long or short,
+        # or has too many letters which the term hasn't, or the other way round
+        length_ratio = 1 - cutoff
+        term_length = len(term_form.letters)
+        matches = []
+        for word_id in candidates:
+            word_form, word_sorted = self.forms[word_id]
+            longest = max(term_length, len(word_form.letters)) * EDIT_COST
+            max_distance = int(longest * length_ratio)
+            if abs(term_length - len(word_form.letters)) * EDIT_COST > max_distance:
+                continue
+            word_mask = self.letter_masks[word_id]
+            letter_edits = max(
+                (term_mask & ~word_mask).bit_count() + unknown_letters,
+                (word_mask & ~term_mask).bit_count(),
+            )
+            if letter_edits * EDIT_COST > max_distance:
+                continue
+            distance = pali_distance(
+                term_form.letters,
+                word_form.letters,
+                term_form.folded,
+                word_form.folded,
+                max_distance,
+            )
+            if term_sorted is not term_form or word_sorted is not word_form:
+                distance = min(
+                    distance,
+                    pali_distance(
+                        term_sorted.letters,
+                        word_sorted.letters,
+                        term_sorted.folded,
+                        word_sorted.folded,
+                        max_distance,
+                    ),
+                )
+            if distance <= max_distance:
+                similarity = 1 - distance / longest
+                matches.append(FuzzyMatch(self.words[word_id], distance, similarity))
+
+        matches.sort(key=lambda x: (-x.similarity, x.distance, x.word))
+        return matches[:limit]
+
+    def closest(self, term: str, limit: int = 10, cutoff: float = 0.0) -> list[str]:
+        """The closest words, see closest_matches."""
+
+        return [match.word for match in self.closest_matches(term, limit, cutoff)]
@@ -1,16 +1,40 @@
-from typing import List
+from typing import Collection, List
 
-from fuzzywuzzy import process as fuzzy_process
+from tools.fuzzy_index import FuzzyIndex
+
+# most collections to keep an index of
+MAX_INDEXES = 8
+
+# id of the collection: the collection, its length and its index.
+# The collection is kept, so its id isn't reused while it's cached.
+_indexes: dict[int, tuple[Collection[str], int, FuzzyIndex]] = {}
+
+
+def get_fuzzy_index(allowed: Collection[str]) -> FuzzyIndex:
+    """The index of a collection of strings, built once for each collection
+    and again when its length changes, as the GUIs only add to their sets."""
+
+    cached = _indexes.get(id(allowed))
+    if cached is not None and cached[0] is allowed and cached[1] == len(allowed):
+        return cached[2]
+
+    fuzzy_index = FuzzyIndex(allowed)
+    _indexes.pop(id(allowed), None)
+    if len(_indexes) >= MAX_INDEXES:
+        del _indexes[next(iter(_indexes))]
+    _indexes[id(allowed)] = (allowed, len(allowed), fuzzy_index)
+    return fuzzy_index
 
 
 def find_closest_matches(
-    term: str, allowed_list: List[str], limit: int = 3
+    term: str, allowed_list: Collection[str], limit: int = 3
 ) -> List[str]:
-    """Finds the closest matches for a term within a list of allowed strings.
+    """Finds the closest matches for a term within a collection of allowed strings.
 
     Args:
         term: The input term to match.
-        allowed_list: The list of valid strings to match against.
+        allowed_list: The strings to match against. Pass the same set
+            or list each time, so its index is reused.
         limit: The maximum number of suggestions to return.
 
     Returns:
@@ -19,8 +43,4 @@ def find_closest_matches(
     if not allowed_list or not term:
         return []
 
-    # extractBests returns tuples of (match, score)
-    matches = fuzzy_process.extractBests(term, allowed_list, limit=limit)
-
-    # Return only the matched strings (the first element of each tuple)
-    return [match[0] for match in matches]
+    return get_fuzzy_index(allowed_list).closest(term, limit=limit)
@@ -5,11 +5,13 @@
 import shutil
 import idzip
 import os
+import pickle
+import tempfile
 
 from pathlib import Path
 from pyglossary import Glossary
 from subprocess import Popen
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 from zipfile import ZipFile, ZIP_DEFLATED
 
 from tools.date_and_time import make_timestamp
@@ -27,6 +29,70 @@ class DictEntry:
         self.synonyms: list[str] = synonyms
 
 
+class DictEntrySpool:
+    """An append-only store of DictEntry in a temporary file,
+    so a whole dictionary can pass from the renderers to the
+    GoldenDict and MDict writers without being held in memory.
+
+    Entries are pickled in batches, and read back one batch at a time
+    every time the spool is iterated over.
+
+    Usage:
+    with DictEntrySpool(pth.temp_dir) as dict_data:
+        dict_data.extend(entries)
+        export_to_goldendict_with_pyglossary(dict_info, dict_var, dict_data)
+        export_to_mdict(dict_info, dict_var, dict_data)
+    """
+
+    def __init__(self, temp_dir: Optional[Path] = None, batch_size: int = 1000) -> None:
+        if temp_dir is not None:
+            temp_dir.mkdir(parents=True, exist_ok=True)
+        self._file = tempfile.TemporaryFile(dir=temp_dir)
+        self._batch: list[DictEntry] = []
+        self._batch_size = batch_size
+        self._len = 0
+
+    def __enter__(self) -> "DictEntrySpool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, entry: DictEntry) -> None:
+        self._batch.append(entry)
+        self._len += 1
+        if len(self._batch) >= self._batch_size:
+            self._flush()
+
+    def extend(self, entries: Iterable[DictEntry]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def _flush(self) -> None:
+        if self._batch:
+            self._file.seek(0, os.SEEK_END)
+            pickle.dump(self._batch, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._batch = []
+
+    def __iter__(self) -> Iterator[DictEntry]:
+        self._flush()
+        end = self._file.seek(0, os.SEEK_END)
+        position = 0
+        # the position is kept here, so the spool can be appended to
+        # or iterated over again in between
+        while position < end:
+            self._file.seek(position)
+            batch = pickle.load(self._file)
+            position = self._file.tell()
+            yield from batch
+
+    def close(self) -> None:
+        self._file.close()
+
+
 class DictInfo:
     """Dictionary Information"""
 
@@ -120,7 +186,7 @@ class DictVariables:
 def export_to_goldendict_with_pyglossary(
     dict_info: DictInfo,
     dict_var: DictVariables,
-    dict_data: list[DictEntry],
+    dict_data: list[DictEntry] | DictEntrySpool,
     include_slob=False,
 ) -> None:
     """Usage:
@@ -222,16 +288,60 @@ def add_fonts(glos: Glossary, dict_var: DictVariables) -> Glossary:
     return glos
 
 
-def add_data(glos: Glossary, dict_data: list[DictEntry]) -> Glossary:
-    """Add dictionary data to glossary."""
+class GlossaryStream:
+    """A pyglossary direct mode reader of a DictEntrySpool,
+    so each entry is converted while the glossary is being written,
+    instead of all of them being added to the glossary first."""
 
-    pr.white("compiling data")
-    for d in dict_data:
-        glos.addEntry(
-            glos.newEntry(
+    def __init__(
+        self, glos: Glossary, data_entries: list, dict_data: DictEntrySpool
+    ) -> None:
+        self._glos = glos
+        self._data_entries = data_entries
+        self._dict_data = dict_data
+
+    def __len__(self) -> int:
+        return len(self._data_entries) + len(self._dict_data)
+
+    def __iter__(self) -> Iterator:
+        yield from self._data_entries
+        for d in self._dict_data:
+            yield self._glos.newEntry(
                 word=[d.word] + d.synonyms, defi=d.definition_html, defiFormat="h"
             )  # type:ignore
-        )
+
+    def close(self) -> None:
+        pass
+
+
+def can_stream(glos: Glossary) -> bool:
+    """GlossaryStream uses pyglossary internals, checked with 4.7.1.
+    Without them, entries are added one by one."""
+
+    return isinstance(getattr(glos, "_readers", None), list) and hasattr(
+        getattr(glos, "_data", None), "clear"
+    )
+
+
+def add_data(
+    glos: Glossary, dict_data: list[DictEntry] | DictEntrySpool
+) -> Glossary:
+    """Add dictionary data to glossary."""
+
+    pr.white("compiling data")
+    if isinstance(dict_data, DictEntrySpool) and can_stream(glos):
+        # in direct mode only the readers are written,
+        # so the css, js and fonts added so far go first
+        data_entries = list(glos._data)  # type:ignore
+        glos._data.clear()  # type:ignore
+        glos._readers.append(GlossaryStream(glos, data_entries, dict_data))  # type:ignore
+    else:
+        for d in dict_data:
+            glos.addEntry(
+                glos.newEntry(
+                    word=[d.word] + d.synonyms, defi=d.definition_html, defiFormat="h"
+                )  # type:ignore
+            )
 
     pr.yes("ok")
     return glos
@@ -0,0 +1,123 @@
+"""Stream DpdHeadword rows from the db in chunks, instead of LIMIT/OFFSET
+paging or loading the whole table with .all().
+
+Usage:
+for chunk in headword_chunks(db_session):
+    for i in chunk:
+        ...
+
+for i in iter_headwords(db_session, pali_order=True):
+    ...
+"""
+
+from typing import Iterator, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+
+from db.models import DpdHeadword
+from tools.pali_sort_key import pali_sort_key
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def keyset_chunks(
+    query: Query,
+    key_column: InstrumentedAttribute,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int = 0,
+) -> Iterator[list]:
+    """Yield the results of a query in chunks, ordered by a unique key column.
+
+    Each chunk continues from the last key of the one before
+    (WHERE key > last ORDER BY key LIMIT n), so every page is an index seek
+    rather than a rescan from the start as with OFFSET.
+
+    key_column must be unique and belong to the first entity of the query.
+    limit caps the total number of rows, 0 means no limit."""
+
+    last_key = None
+    total = 0
+
+    while True:
+        if limit:
+            chunk_size = min(chunk_size, limit - total)
+            if chunk_size <= 0:
+                return
+
+        page = query
+        if last_key is not None:
+            page = page.filter(key_column > last_key)
+        rows = page.order_by(key_column).limit(chunk_size).all()
+        if not rows:
+            return
+
+        last_row = rows[-1]
+        if isinstance(last_row, Row):
+            last_row = last_row[0]
+        last_key = getattr(last_row, key_column.key)
+
+        total += len(rows)
+        yield rows
+
+        if len(rows) < chunk_size:
+            return
+
+
+def _pali_order_chunks(
+    db_session: Session,
+    chunk_size: int,
+    limit: int,
+    options: Sequence,
+) -> Iterator[list[DpdHeadword]]:
+    """Sort only (id, lemma_1) in Pāḷi alphabetical order,
+    then fetch the full rows one chunk of ids at a time."""
+
+    ids_lemmas = db_session.query(DpdHeadword.id, DpdHeadword.lemma_1).all()
+    ids = [i.id for i in sorted(ids_lemmas, key=lambda x: pali_sort_key(x.lemma_1))]
+    if limit:
+        ids = ids[:limit]
+
+    for start in range(0, len(ids), chunk_size):
+        chunk_ids = ids[start : start + chunk_size]
+        rows = (
+            db_session.query(DpdHeadword)
+            .options(*options)
+            .filter(DpdHeadword.id.in_(chunk_ids))
+            .all()
+        )
+        rows_dict = {i.id: i for i in rows}
+        yield [rows_dict[id] for id in chunk_ids if id in rows_dict]
+
+
+def headword_chunks(
+    db_session: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int = 0,
+    pali_order: bool = False,
+    options: Sequence = (),
+) -> Iterator[list[DpdHeadword]]:
+    """Yield DpdHeadword in chunks, ordered by lemma_1,
+    or in Pāḷi alphabetical order if pali_order is True.
+    options are passed to query.options(), e.g. joinedload(DpdHeadword.rt).
+    limit caps the total number of headwords, 0 means no limit."""
+
+    if pali_order:
+        yield from _pali_order_chunks(db_session, chunk_size, limit, options)
+    else:
+        query = db_session.query(DpdHeadword).options(*options)
+        yield from keyset_chunks(query, DpdHeadword.lemma_1, chunk_size, limit)
+
+
+def iter_headwords(
+    db_session: Session,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int = 0,
+    pali_order: bool = False,
+    options: Sequence = (),
+) -> Iterator[DpdHeadword]:
+    """Yield DpdHeadword one at a time, fetched from the db in chunks."""
+
+    for chunk in headword_chunks(db_session, chunk_size, limit, pali_order, options):
+        yield from chunk
@@ -1,10 +1,10 @@
 """Returns a set of headwords without numbers from the DpdHeadword table."""
 
-from typing import List
+from typing import Iterable
 from db.models import DpdHeadword
 
 
-def make_clean_headwords_set(dpd_db: List[DpdHeadword]) -> set:
+def make_clean_headwords_set(dpd_db: Iterable[DpdHeadword]) -> set:
     """A set of clean headwords in the dictionary."""
     all_headwords_clean: set = set()
     for i in dpd_db:
@@ -1,7 +1,10 @@
 """Convert Pāḷi text to IPA"""
 
+from functools import lru_cache
 from pathlib import Path
 import re
+from types import MappingProxyType
+from typing import Iterable, Mapping
 from rich import print
 
 from tools.tsv_read_write import read_tsv_dot_dict
@@ -126,40 +129,56 @@ def a_at_the_end(text: str):
     )
 
 
+class ConversionTable:
+    """An immutable unicode to ipa or tts table, with a longest match regex.
+    Only keys of up to 3 letters are used, like the original lookup loop."""
+
+    def __init__(self, uni_to_ipa_dict: dict) -> None:
+        self.table: Mapping[str, str] = MappingProxyType(
+            {key: value for key, value in uni_to_ipa_dict.items() if 1 <= len(key) <= 3}
+        )
+        self.pattern = re.compile(
+            "|".join(re.escape(key) for key in sorted(self.table, key=len, reverse=True))
+        )
+
+    def convert(self, text: str) -> str:
+        return self.pattern.sub(lambda match: self.table[match.group(0)], text)
+
+
+@lru_cache(maxsize=None)
+def get_conversion_tables() -> Mapping[str, ConversionTable]:
+    """Read tools/ipa.tsv once, the first time it's needed."""
+
+    g = ProgData()
+    return MappingProxyType(
+        {
+            "ipa": ConversionTable(g.uni_to_ipa_dict),
+            "tts": ConversionTable(g.uni_to_tts_dict),
+        }
+    )
+
+
+@lru_cache(maxsize=2**17)
 def convert_uni_to_ipa(text: str, ipa_or_tts: str):
     """Use the "ipa" option to return academic IPA
     or the "tts" option to return IPA for text-to-speech-engines."""
 
-    g = ProgData()
-
-    if ipa_or_tts == "ipa":
-        dict = g.uni_to_ipa_dict
-    elif ipa_or_tts == "tts":
-        dict = g.uni_to_tts_dict
+    conversion_table = get_conversion_tables()[ipa_or_tts]
     text = clean_text(text)
     text = long_e_o(text)
     text = a_at_the_end(text)
 
-    ipa_text = ""
-    i = 0
-    while i < len(text):
-        if i < len(text) - 2 and text[i : i + 3] in dict:
-            ipa_text += dict[text[i : i + 3]]
-            i += 3
-        elif i < len(text) - 1 and text[i : i + 2] in dict:
-            ipa_text += dict[text[i : i + 2]]
-            i += 2
-        elif text[i] in dict:
-            ipa_text += dict[text[i]]
-            i += 1
-        else:
-            ipa_text += text[i]
-            i += 1
-
+    ipa_text = conversion_table.convert(text)
     ipa_text = ipa_text.strip().replace("  ", " ")
     return ipa_text
 
 
+def convert_many(words: Iterable[str], ipa_or_tts: str) -> list[str]:
+    """Convert a batch of words, e.g. every lemma_clean in the db."""
+
+    return [convert_uni_to_ipa(word, ipa_or_tts) for word in words]
+
+
 if __name__ == "__main__":
     update_tsv()
     text = "vipassī, bhikkhave, bhagavā arahaṃ sammāsambuddho khattiyo jātiyā ahosi, khattiyakule udapādi. sikhī, bhikkhave, bhagavā arahaṃ sammāsambuddho khattiyo jātiyā ahosi, khattiyakule udapādi. vessabhū, bhikkhave, bhagavā arahaṃ sammāsambuddho khattiyo jātiyā ahosi, khattiyakule udapādi. kakusandho, bhikkhave, bhagavā arahaṃ sammāsambuddho brāhmaṇo jātiyā ahosi, brāhmaṇakule udapādi."
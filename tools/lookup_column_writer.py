@@ -0,0 +1,138 @@
+"""Write one column of the Lookup table in a few set-based SQL statements.
+
+Replaces loading the whole Lookup table as ORM objects,
+update_test_add and a per-row is_another_value test.
+
+1. stage {lookup_key: packed_value} in a temp table,
+2. clear the column in every row which isn't staged,
+3. INSERT ... ON CONFLICT DO UPDATE the staged values,
+4. delete the rows whose columns are now all empty.
+
+Usage:
+writer = LookupColumnWriter(db_session, "grammar")
+writer.write(grammar_dict)
+db_session.commit()
+"""
+
+from typing import Callable, Iterable, NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from db.models import Lookup
+from tools.lookup_key_fold import fold_lookup_key
+
+# the pack method of every column which has a different name
+PACK_METHODS: dict[str, str] = {"variant": "variants_pack"}
+
+# key columns, ignored when testing if a row is empty
+KEY_COLUMNS = ["lookup_key", "lookup_key_folded"]
+
+STAGING_TABLE = "lookup_column_staging"
+
+
+class LookupColumnResult(NamedTuple):
+    upserted: int
+    cleared: int
+    deleted: int
+
+
+class LookupColumnWriter:
+    def __init__(self, db_session: Session, column: str) -> None:
+        self.db_session = db_session
+        self.column = column
+
+        # actual columns, an older db may not have lookup_key_folded yet
+        self.table_columns: list[str] = [
+            row[1] for row in db_session.execute(text("PRAGMA table_info(lookup)"))
+        ]
+        if column not in self.table_columns or column in KEY_COLUMNS:
+            raise ValueError(f"{column} is not a value column of the Lookup table.")
+
+        # a single transient Lookup, so values are packed exactly as the model does
+        self._packer = Lookup()
+        self._pack_method: Callable = getattr(
+            self._packer, PACK_METHODS.get(column, f"{column}_pack")
+        )
+
+    def pack(self, value) -> str:
+        self._pack_method(value)
+        return getattr(self._packer, self.column)
+
+    def write(self, data: dict, packed: bool = False) -> LookupColumnResult:
+        """Make the column contain exactly the values in data.
+        Values are packed with the model's pack method, unless packed is True.
+        Doesn't commit."""
+
+        values: Iterable[dict[str, str]] = (
+            {"lookup_key": key, "value": value if packed else self.pack(value)}
+            for key, value in data.items()
+        )
+
+        dbapi_connection = self.db_session.connection().connection.driver_connection
+        dbapi_connection.create_function(  # type: ignore
+            "fold_lookup_key", 1, fold_lookup_key, deterministic=True
+        )
+
+        self.db_session.execute(text(f"DROP TABLE IF EXISTS temp.{STAGING_TABLE}"))
+        self.db_session.execute(
+            text(
+                f"CREATE TEMP TABLE {STAGING_TABLE} "
+                "(lookup_key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+        )
+        if data:
+            self.db_session.execute(
+                text(
+                    f"INSERT INTO temp.{STAGING_TABLE} (lookup_key, value) "
+                    "VALUES (:lookup_key, :value)"
+                ),
+                list(values),
+            )
+
+        cleared = self.db_session.execute(
+            text(
+                f"""
+                UPDATE lookup SET {self.column} = ''
+                WHERE {self.column} != ''
+                AND lookup_key NOT IN (SELECT lookup_key FROM temp.{STAGING_TABLE})
+                """
+            )
+        ).rowcount  # type: ignore
+
+        # new rows get "" in every other column, like the model's defaults
+        select_columns = []
+        for column in self.table_columns:
+            if column == "lookup_key":
+                select_columns.append("lookup_key")
+            elif column == "lookup_key_folded":
+                select_columns.append("fold_lookup_key(lookup_key)")
+            elif column == self.column:
+                select_columns.append("value")
+            else:
+                select_columns.append("''")
+
+        upserted = self.db_session.execute(
+            text(
+                f"""
+                INSERT INTO lookup ({", ".join(self.table_columns)})
+                SELECT {", ".join(select_columns)} FROM temp.{STAGING_TABLE} WHERE true
+                ON CONFLICT (lookup_key) DO UPDATE
+                SET {self.column} = excluded.{self.column}
+                WHERE lookup.{self.column} IS NOT excluded.{self.column}
+                """
+            )
+        ).rowcount  # type: ignore
+
+        empty_tests = " AND ".join(
+            f"COALESCE({column}, '') = ''"
+            for column in self.table_columns
+            if column not in KEY_COLUMNS
+        )
+        deleted = self.db_session.execute(
+            text(f"DELETE FROM lookup WHERE {empty_tests}")
+        ).rowcount  # type: ignore
+
+        self.db_session.execute(text(f"DROP TABLE temp.{STAGING_TABLE}"))
+
+        return LookupColumnResult(upserted, cleared, deleted)
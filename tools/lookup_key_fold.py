@@ -0,0 +1,9 @@
+"""Normalize a lookup_key for case-insensitive, indexed searches."""
+
+
+def fold_lookup_key(key: str) -> str:
+    """Lowercase, replace ṁ with ṃ, remove apostrophes and strip whitespace.
+    Applied once to every key when it is written to the Lookup table,
+    and once to the search query, so a search is an indexed equality test."""
+
+    return key.lower().replace("ṁ", "ṃ").replace("'", "").strip()
@@ -2,13 +2,28 @@
 
 """Generic MDict exporter."""
 
-from functools import reduce
+import tempfile
+from functools import partial, reduce
+from typing import IO, Iterable, Iterator
 from zipfile import ZIP_DEFLATED, ZipFile
 from tools.goldendict_exporter import DictEntry
+from tools.goldendict_exporter import DictEntrySpool
 from tools.goldendict_exporter import DictInfo
 from tools.goldendict_exporter import DictVariables
+from tools.paths import ProjectPaths
 from tools.printer import printer as pr
-from tools.writemdict.writemdict import MDictWriter
+from tools.writemdict.writemdict import MDictWriter, StoredRecord
+
+# the mdx encoding, which the stored records are encoded with too
+MDX_ENCODING = "utf8"
+
+
+def make_records_file() -> IO[bytes]:
+    """A temporary file in temp/, like DictEntrySpool's."""
+
+    temp_dir = ProjectPaths().temp_dir
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    return tempfile.TemporaryFile(dir=temp_dir)
 
 
 class ProgData:
@@ -16,13 +31,14 @@ class ProgData:
         self,
         dict_info: DictInfo,
         dict_var: DictVariables,
-        dict_data: list[DictEntry],
+        dict_data: list[DictEntry] | DictEntrySpool,
         h3_header: bool,
     ) -> None:
         self.dict_info: DictInfo = dict_info
         self.dict_var: DictVariables = dict_var
-        self.dict_data: list[DictEntry] = dict_data
+        self.dict_data: list[DictEntry] | DictEntrySpool = dict_data
         self.reduced_data: list
+        self.records_file: IO[bytes] = make_records_file()
         self.needs_h3_header: bool = h3_header
         self.assets: list
 
@@ -30,7 +46,7 @@ class ProgData:
 def export_to_mdict(
     dict_info: DictInfo,
     dict_var: DictVariables,
-    dict_data: list[DictEntry],
+    dict_data: list[DictEntry] | DictEntrySpool,
     h3_header=True,
 ) -> None:
     """Export to MDict"""
@@ -38,11 +54,6 @@ def export_to_mdict(
     pr.green_title("exporting to mdict")
     g = ProgData(dict_info, dict_var, dict_data, h3_header)
 
-    replace_goldendict(g)
-
-    if h3_header:
-        add_h3_header(g)
-
     reduce_synonyms(g)
     write_mdx_file(g)
     compile_css_js_assets(g)
@@ -55,35 +66,54 @@ def export_to_mdict(
         delete_original(g)
 
 
-def replace_goldendict(g: ProgData) -> None:
-    pr.white("adding 'mdict'")
-    for i in g.dict_data:
+def replace_goldendict(dict_data: Iterable[DictEntry]) -> Iterator[DictEntry]:
+    for i in dict_data:
         i.definition_html = i.definition_html.replace("GoldenDict", "MDict")
-    pr.yes("ok")
+        yield i
 
 
-def add_h3_header(g: ProgData) -> None:
-    pr.white("adding h3 tag")
-    for i in g.dict_data:
+def add_h3_header(dict_data: Iterable[DictEntry]) -> Iterator[DictEntry]:
+    for i in dict_data:
         i.definition_html = f"<h3>{i.word}</h3>{i.definition_html}"
-    pr.yes("ok")
+        yield i
 
 
 def reduce_synonyms(g: ProgData) -> None:
+    """Add 'mdict', the h3 tag and the synonyms in one pass over the data.
+    Each definition is written to g.records_file, so a DictEntrySpool
+    is streamed and only the keys and their records' places are kept."""
+
     pr.white("reducing synonyms")
     try:
-        g.reduced_data = reduce(make_synonyms, g.dict_data, [])
+        dict_data = replace_goldendict(g.dict_data)
+        if g.needs_h3_header:
+            dict_data = add_h3_header(dict_data)
+        g.reduced_data = reduce(partial(make_synonyms, g.records_file), dict_data, [])
         pr.yes("ok")
     except Exception as e:
         pr.no("error")
         pr.red(e)
 
 
-def make_synonyms(all_items, item: DictEntry):
-    all_items.append((item.word, item.definition_html))
+def store_record(records_file: IO[bytes], record: str) -> StoredRecord:
+    encoded = record.encode(MDX_ENCODING)
+    is_link = record[:8].lower().startswith("@@@link=")
+    stored = StoredRecord(
+        records_file, records_file.tell(), len(encoded), MDX_ENCODING, is_link
+    )
+    records_file.write(encoded)
+    return stored
+
+
+def make_synonyms(records_file: IO[bytes], all_items, item: DictEntry):
+    all_items.append((item.word, store_record(records_file, item.definition_html)))
+    # all the synonyms share one stored link
+    link: StoredRecord | None = None
     for word in item.synonyms:
         if word != item.word:
-            all_items.append((word, f"""@@@LINK={item.word}"""))
+            if link is None:
+                link = store_record(records_file, f"""@@@LINK={item.word}""")
+            all_items.append((word, link))
     return all_items
 
 
@@ -94,6 +124,8 @@ def write_mdx_file(g: ProgData) -> None:
             g.reduced_data,
             title=g.dict_info.bookname,
             description=g.dict_info.description,
+            encoding=MDX_ENCODING,
+            fast=True,
         )
         with open(g.dict_var.mdict_mdx_path, "wb") as outfile:
             writer.write(outfile)
@@ -101,6 +133,8 @@ def write_mdx_file(g: ProgData) -> None:
     except Exception as e:
         pr.no("error")
         pr.red(e)
+    finally:
+        g.records_file.close()
 
 
 def compile_css_js_assets(g: ProgData) -> None:
@@ -145,6 +179,7 @@ def write_mdd_file(g: ProgData) -> None:
             title=g.dict_info.bookname,
             description=g.dict_info.description,
             is_mdd=True,
+            fast=True,
         )
         with open(g.dict_var.mdict_mdd_path, "wb") as f:
             writer.write(f)
@@ -0,0 +1,211 @@
+"""Transliterate Pāḷi from Roman into Sinhala, Devanagari and Thai.
+
+A Python port of the conversions which db/lookup/pali-script.mjs
+and db/inflections/pali-script.mjs are used for:
+Roman -> Sinhala with TextProcessor.basicConvertFrom,
+Sinhala -> Devanagari and Thai with TextProcessor.basicConvert.
+
+The mapping tables are the Sinhala, Devanagari, Roman and Thai columns
+of the tables in pali-script.mjs:
+Copyright Path Nirvana 2018
+The code and character mapping defined in this file can not be used for any commercial purposes.
+Permission from the auther is required for all other purposes.
+Edit 2021 - added (non pali) sanskrit consonents and vowels
+
+Usage:
+sinhala, devanagari, thai = transliterate_batch(words)
+"""
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+SI = 0
+HI = 1
+RO = 2
+THAI = 3
+
+# (sinhala, devanagari, roman, thai), None where the script has no letter
+
+CONSOS: tuple[tuple[str, str, str, Optional[str]], ...] = (
+    # velar stops
+    ("ක", "क", "k", "ก"),
+    ("ඛ", "ख", "kh", "ข"),
+    ("ග", "ग", "g", "ค"),
+    ("ඝ", "घ", "gh", "ฆ"),
+    ("ඞ", "ङ", "ṅ", "ง"),
+    # palatal stops
+    ("ච", "च", "c", "จ"),
+    ("ඡ", "छ", "ch", "ฉ"),
+    ("ජ", "ज", "j", "ช"),
+    ("ඣ", "झ", "jh", "ฌ"),
+    ("ඤ", "ञ", "ñ", "ญ"),
+    # retroflex stops
+    ("ට", "ट", "ṭ", "ฏ"),
+    ("ඨ", "ठ", "ṭh", "ฐ"),
+    ("ඩ", "ड", "ḍ", "ฑ"),
+    ("ඪ", "ढ", "ḍh", "ฒ"),
+    ("ණ", "ण", "ṇ", "ณ"),
+    # dental stops
+    ("ත", "त", "t", "ต"),
+    ("ථ", "थ", "th", "ถ"),
+    ("ද", "द", "d", "ท"),
+    ("ධ", "ध", "dh", "ธ"),
+    ("න", "न", "n", "น"),
+    # labial stops
+    ("ප", "प", "p", "ป"),
+    ("ඵ", "फ", "ph", "ผ"),
+    ("බ", "ब", "b", "พ"),
+    ("භ", "भ", "bh", "ภ"),
+    ("ම", "म", "m", "ม"),
+    # liquids, fricatives, etc.
+    ("ය", "य", "y", "ย"),
+    ("ර", "र", "r", "ร"),
+    ("ල", "ल", "l", "ล"),
+    ("ළ", "ळ", "ḷ", "ฬ"),
+    ("ව", "व", "v", "ว"),
+    ("ස", "स", "s", "ส"),
+    ("හ", "ह", "h", "ห"),
+    # sanskrit consonants
+    ("ශ", "श", "ś", None),
+    ("ෂ", "ष", "ş", None),
+)
+
+SPECIALS: tuple[tuple[str, str, str, Optional[str]], ...] = (
+    # independent vowels
+    ("අ", "अ", "a", "อ"),
+    ("ආ", "आ", "ā", "อา"),
+    ("ඉ", "इ", "i", "อ\u0e34"),
+    ("ඊ", "ई", "ī", "อ\u0e35"),
+    ("උ", "उ", "u", "อ\u0e38"),
+    ("ඌ", "ऊ", "ū", "อ\u0e39"),
+    ("එ", "ए", "e", "อเ"),
+    ("ඔ", "ओ", "o", "อโ"),
+    # niggahita - anusawara
+    ("\u0d82", "\u0902", "ṃ", "\u0e4d"),
+    # visarga
+    ("\u0d83", "\u0903", "ḥ", "ะ"),
+    # virama, roman needs special handling
+    ("\u0dca", "\u094d", "", "\u0e3a"),
+    # digits
+    ("0", "०", "0", "๐"),
+    ("1", "१", "1", "๑"),
+    ("2", "२", "2", "๒"),
+    ("3", "३", "3", "๓"),
+    ("4", "४", "4", "๔"),
+    ("5", "५", "5", "๕"),
+    ("6", "६", "6", "๖"),
+    ("7", "७", "7", "๗"),
+    ("8", "८", "8", "๘"),
+    ("9", "९", "9", "๙"),
+    # sanskrit independent vowels
+    ("ඓ", "ऐ", "ai", None),
+    ("ඖ", "औ", "au", None),
+    ("ඍ", "ऋ", "ṛ", None),
+    ("ඎ", "ॠ", "ṝ", None),
+    ("ඏ", "ऌ", "l\u0325", None),
+    ("ඐ", "ॡ", "ḹ", None),
+)
+
+VOWELS: tuple[tuple[str, str, str, Optional[str]], ...] = (
+    ("\u0dcf", "\u093e", "ā", "า"),
+    ("\u0dd2", "\u093f", "i", "\u0e34"),
+    ("\u0dd3", "\u0940", "ī", "\u0e35"),
+    ("\u0dd4", "\u0941", "u", "\u0e38"),
+    ("\u0dd6", "\u0942", "ū", "\u0e39"),
+    ("\u0dd9", "\u0947", "e", "เ"),
+    ("\u0ddc", "\u094b", "o", "โ"),
+    # sanskrit dependant vowels
+    ("\u0ddb", "\u0948", "ai", None),
+    ("\u0dde", "\u094c", "au", None),
+    ("\u0dd8", "\u0943", "ṛ", None),
+    ("\u0df2", "\u0944", "ṝ", None),
+    ("\u0ddf", "\u0962", "l\u0325", None),
+    ("\u0df3", "\u0963", "ḹ", None),
+)
+
+
+class ScriptMap:
+    """An immutable from -> to table, matched longest first,
+    like prepareHashMaps and replaceByMaps in pali-script.mjs."""
+
+    def __init__(self, from_index: int, to_index: int, use_vowels: bool = True) -> None:
+        rows = CONSOS + SPECIALS + (VOWELS if use_vowels else ())
+        table: dict[str, str] = {}
+        for row in rows:
+            if row[from_index]:  # empty mapping, e.g. the roman virama
+                table[row[from_index]] = row[to_index] or ""
+        self.table: Mapping[str, str] = MappingProxyType(table)
+        self.pattern = re.compile(
+            "|".join(re.escape(key) for key in sorted(table, key=len, reverse=True))
+        )
+        # from sinhala every key is one letter, so str.translate is enough
+        self.translation: Optional[dict[int, str]] = None
+        if all(len(key) == 1 for key in table):
+            self.translation = str.maketrans(table)
+
+    def convert(self, text: str) -> str:
+        if self.translation is not None:
+            return text.translate(self.translation)
+        return self.pattern.sub(lambda match: self.table[match.group(0)], text)
+
+
+RO_TO_SI = ScriptMap(RO, SI, use_vowels=False)
+SI_TO_HI = ScriptMap(SI, HI)
+SI_TO_THAI = ScriptMap(SI, THAI)
+
+# consonant followed by anything but an independent vowel or virama
+MISSING_VIRAMA = re.compile("([ක-ෆ])([^අආඉඊඋඌඑඔ\u0dca])")
+FINAL_CONSONANT = re.compile(r"([ක-ෆ])\Z")
+CONSONANT_VOWEL = re.compile("([ක-ෆ])([අආඉඊඋඌඑඔ])")
+IV_TO_DV = {
+    "අ": "",
+    "ආ": "\u0dcf",
+    "ඉ": "\u0dd2",
+    "ඊ": "\u0dd3",
+    "උ": "\u0dd4",
+    "ඌ": "\u0dd6",
+    "එ": "\u0dd9",
+    "ඔ": "\u0ddc",
+}
+
+
+def remove_a(text: str) -> str:
+    """Add a virama to every consonant not followed by a vowel,
+    and turn independent vowels after a consonant into dependent ones."""
+
+    # done twice to match successive consonants
+    text = MISSING_VIRAMA.sub("\\1\u0dca\\2", text)
+    text = MISSING_VIRAMA.sub("\\1\u0dca\\2", text)
+    text = FINAL_CONSONANT.sub("\\1\u0dca", text)
+    return CONSONANT_VOWEL.sub(
+        lambda match: match.group(1) + IV_TO_DV[match.group(2)], text
+    )
+
+
+@lru_cache(maxsize=2**20)
+def roman_to_sinhala(text: str) -> str:
+    text = RO_TO_SI.convert(text)
+    text = text.replace("ṁ", "\u0d82")
+    return remove_a(text)
+
+
+@lru_cache(maxsize=2**20)
+def sinhala_to_devanagari(text: str) -> str:
+    return SI_TO_HI.convert(text)
+
+
+@lru_cache(maxsize=2**20)
+def sinhala_to_thai(text: str) -> str:
+    return SI_TO_THAI.convert(text)
+
+
+def transliterate_batch(words: list[str]) -> tuple[list[str], list[str], list[str]]:
+    """Transliterate a list of Roman Pāḷi words.
+    Return lists of the Sinhala, Devanagari and Thai, in the same order."""
+
+    sinhala = [roman_to_sinhala(word) for word in words]
+    devanagari = [sinhala_to_devanagari(word) for word in sinhala]
+    thai = [sinhala_to_thai(word) for word in sinhala]
+    return sinhala, devanagari, thai
@@ -372,6 +372,7 @@ class ProjectPaths:
         self.typst_lite_data_path = base_dir / "exporter/pdf/typst_data_lite.typ"
         self.typst_lite_pdf_path = base_dir / "exporter/share/dpd.pdf"
         self.typst_lite_zip_path = base_dir / "exporter/share/dpd-pdf.zip"
+        self.typst_sections_dir = base_dir / "exporter/pdf/sections/"
         self.typst_lite_abbreviations_path = (
             base_dir / "exporter/share/abbreviations.pdf"
         )
@@ -609,21 +610,38 @@ class ProjectPaths:
         self.cst_file_freq = base_dir / "shared_data/frequency/cst_file_freq.json"
         self.cst_freq_json = base_dir / "shared_data/frequency/cst_freq.json"
         self.cst_wordlist = base_dir / "shared_data/frequency/cst_wordlist.json"
+        self.cst_file_freq_matrix_dir = (
+            base_dir / "shared_data/frequency/cst_file_freq_matrix"
+        )
 
         self.bjt_file_freq = base_dir / "shared_data/frequency/bjt_file_freq.json"
         self.bjt_freq_json = base_dir / "shared_data/frequency/bjt_freq.json"
         self.bjt_wordlist = base_dir / "shared_data/frequency/bjt_wordlist.json"
+        self.bjt_file_freq_matrix_dir = (
+            base_dir / "shared_data/frequency/bjt_file_freq_matrix"
+        )
 
         self.sya_file_freq = base_dir / "shared_data/frequency/sya_file_freq.json"
         self.sya_freq_json = base_dir / "shared_data/frequency/sya_freq.json"
         self.sya_wordlist = base_dir / "shared_data/frequency/sya_wordlist.json"
+        self.sya_file_freq_matrix_dir = (
+            base_dir / "shared_data/frequency/sya_file_freq_matrix"
+        )
 
         self.sc_file_freq = base_dir / "shared_data/frequency/sc_file_freq.json"
         self.sc_freq_json = base_dir / "shared_data/frequency/sc_freq.json"
         self.sc_wordlist = base_dir / "shared_data/frequency/sc_wordlist.json"
+        self.sc_file_freq_matrix_dir = (
+            base_dir / "shared_data/frequency/sc_file_freq_matrix"
+        )
+
+        # shared_data/cst_sentence_store.db
+        self.cst_sentence_store_path = base_dir / "shared_data/cst_sentence_store.db"
 
         # temp
         self.temp_dir = base_dir / "temp/"
+        self.dpd_export_cache_path = base_dir / "temp/dpd_export_cache"
+        self.template_cache_dir = base_dir / "temp/template_cache"
 
         # tools
         self.sandhi_contractions_simple_path = (
@@ -714,6 +732,7 @@ class ProjectPaths:
             self.stash_dir,
             self.temp_dir,
             self.tpr_output_dir,
+            self.typst_sections_dir,
             self.word_count_dir,
         ]:
             d.mkdir(parents=True, exist_ok=True)
@@ -67,10 +67,19 @@ class Printer:
             self.logger.setLevel(logging.INFO)
 
             # File handler with TSV formatting
-            handler = logging.FileHandler(log_file)
+            # delay opening the file until the first record
+            handler = logging.FileHandler(log_file, delay=True)
             handler.setFormatter(TSVFormatter())
             self.logger.addHandler(handler)
 
+    def stop_logging(self) -> None:
+        """Print only, without logging, eg for benchmarks."""
+        if self.logger:
+            for handler in self.logger.handlers[:]:
+                self.logger.removeHandler(handler)
+                handler.close()
+            self.logger = None
+
     def _log(self, level: int, operation: str, msg: str, **kwargs) -> None:
         """Log with additional context if logging is enabled."""
         if self.logger:
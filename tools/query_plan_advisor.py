@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+"""Replay the project's common queries under EXPLAIN QUERY PLAN
+and flag the ones which scan a whole table instead of using an index.
+
+The queries are built the same way as in the code they come from,
+with sample values from the db, and explained with bound parameters,
+as SQLAlchemy sends them.
+
+Usage:
+uv run python tools/query_plan_advisor.py [db_path]
+
+Exits with 1 if any query which should use an index scans a table.
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Callable, NamedTuple
+
+from sqlalchemy import Select, desc
+from sqlalchemy.orm import Session, joinedload, with_parent
+
+from db.db_helpers import get_db_session
+from db.models import DpdHeadword, DpdRoot, FamilyRoot, FamilyWord, Lookup
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+class Samples(NamedTuple):
+    """Real values to fill in the queries."""
+
+    headword: DpdHeadword
+    root: DpdRoot
+    lookup_key: str
+
+
+class AdvisedQuery(NamedTuple):
+    name: str
+    source: str
+    statement: Callable[[Session, Samples], Select]
+    full_scan_ok: bool = False
+
+
+def get_samples(db_session: Session) -> Samples:
+    headword = (
+        db_session.query(DpdHeadword)
+        .filter(DpdHeadword.root_key != "")
+        .filter(DpdHeadword.family_root != "")
+        .filter(DpdHeadword.family_word != "")
+        .first()
+    ) or db_session.query(DpdHeadword).first()
+    if headword is None:
+        raise ValueError("the db has no headwords")
+
+    root = headword.rt or db_session.query(DpdRoot).first()
+    if root is None:
+        raise ValueError("the db has no roots")
+
+    lookup_key = db_session.query(Lookup.lookup_key).first()
+    return Samples(
+        headword,
+        root,
+        lookup_key[0] if lookup_key else headword.lemma_clean,
+    )
+
+
+QUERIES: list[AdvisedQuery] = [
+    AdvisedQuery(
+        "related headwords by root family",
+        "gui2/database_manager.py get_related_headwords",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.root_key == s.headword.root_key)
+        .filter(DpdHeadword.family_root == s.headword.family_root)
+        .filter(DpdHeadword.meaning_1 != "")
+        .order_by(desc(DpdHeadword.example_1 != ""))
+        .limit(20)
+        .statement,
+    ),
+    AdvisedQuery(
+        "related headwords by root",
+        "gui2/database_manager.py get_related_headwords",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.root_key == s.headword.root_key)
+        .filter(DpdHeadword.meaning_1 != "")
+        .order_by(desc(DpdHeadword.example_1 != ""))
+        .limit(20)
+        .statement,
+    ),
+    AdvisedQuery(
+        "related headwords by word family",
+        "gui2/database_manager.py get_related_headwords",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.family_word == s.headword.family_word)
+        .filter(DpdHeadword.meaning_1 != "")
+        .statement,
+    ),
+    AdvisedQuery(
+        "root count",
+        "db/models.py DpdRoot.root_count, DpdHeadword.root_count",
+        lambda db_session, s: db_session.query(DpdHeadword.id)
+        .filter(DpdHeadword.root_key == s.root.root)
+        .statement,
+    ),
+    AdvisedQuery(
+        "root family list",
+        "db/models.py DpdRoot.root_family_list",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.root_key == s.root.root)
+        .group_by(DpdHeadword.family_root)
+        .statement,
+    ),
+    AdvisedQuery(
+        "headwords of a root",
+        "db/models.py DpdRoot.pw",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(with_parent(s.root, DpdRoot.pw))
+        .statement,
+    ),
+    AdvisedQuery(
+        "root family of a headword",
+        "db/models.py DpdHeadword.fr",
+        lambda db_session, s: db_session.query(FamilyRoot)
+        .filter(with_parent(s.headword, DpdHeadword.fr))
+        .statement,
+    ),
+    AdvisedQuery(
+        "headwords of a word family",
+        "db/models.py FamilyWord.dpd_headwords",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.family_word == s.headword.family_word)
+        .statement,
+    ),
+    AdvisedQuery(
+        "headwords of an inflection pattern",
+        "db/inflections, gui2 inflection templates",
+        lambda db_session, s: db_session.query(DpdHeadword.id)
+        .filter(DpdHeadword.pattern == s.headword.pattern)
+        .statement,
+    ),
+    AdvisedQuery(
+        "headword by lemma_1",
+        "exporter/webapp/toolkit.py, exporter/mcp_server",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.lemma_1 == s.headword.lemma_1)
+        .statement,
+    ),
+    AdvisedQuery(
+        "headwords by id",
+        "exporter/webapp/toolkit.py, tools/headword_iterator.py",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.id.in_([s.headword.id, s.headword.id + 1]))
+        .statement,
+    ),
+    AdvisedQuery(
+        "lookup by key",
+        "exporter/webapp/toolkit.py",
+        lambda db_session, s: db_session.query(Lookup)
+        .filter(Lookup.lookup_key == s.lookup_key)
+        .statement,
+    ),
+    AdvisedQuery(
+        "lookup by folded key",
+        "exporter/webapp/toolkit.py",
+        lambda db_session, s: db_session.query(Lookup)
+        .filter(Lookup.lookup_key_folded == s.lookup_key)
+        .statement,
+    ),
+    AdvisedQuery(
+        "goldendict export page",
+        "exporter/goldendict/export_dpd.py generate_dpd_html",
+        lambda db_session, s: db_session.query(DpdHeadword, FamilyRoot, FamilyWord)
+        .outerjoin(
+            FamilyRoot, DpdHeadword.root_family_key == FamilyRoot.root_family_key
+        )
+        .outerjoin(FamilyWord, DpdHeadword.family_word == FamilyWord.word_family)
+        .options(joinedload(DpdHeadword.rt))
+        .filter(DpdHeadword.lemma_1 > s.headword.lemma_1)
+        .order_by(DpdHeadword.lemma_1)
+        .limit(2000)
+        .statement,
+    ),
+    AdvisedQuery(
+        "headwords with a root family",
+        "db/families/family_root.py",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.family_root != "")
+        .statement,
+        full_scan_ok=True,
+    ),
+    AdvisedQuery(
+        "headwords with a word family",
+        "db/families/family_word.py",
+        lambda db_session, s: db_session.query(DpdHeadword)
+        .filter(DpdHeadword.family_word != "")
+        .statement,
+        full_scan_ok=True,
+    ),
+]
+
+
+def explain(db_session: Session, statement: Select) -> list[str]:
+    """The query plan, with the statement's parameters bound
+    rather than rendered as literals, as SQLAlchemy runs it."""
+
+    compiled = statement.compile(
+        dialect=db_session.get_bind().dialect,
+        compile_kwargs={"render_postcompile": True},
+    )
+    params: Any = tuple(
+        compiled.params[name] for name in compiled.positiontup or []
+    )
+    rows = db_session.connection().exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}", params
+    )
+    return [row[3] for row in rows]
+
+
+def is_full_scan(detail: str) -> bool:
+    """SCAN is a whole table or index, SEARCH is an index lookup."""
+
+    return detail.startswith("SCAN ")
+
+
+def main():
+    pr.tic()
+    pr.title("query plan advisor")
+
+    pth = ProjectPaths()
+    db_path = Path(sys.argv[1]) if len(sys.argv) > 1 else pth.dpd_db_path
+    db_session = get_db_session(db_path)
+    samples = get_samples(db_session)
+
+    flagged: list[AdvisedQuery] = []
+    for query in QUERIES:
+        plan = explain(db_session, query.statement(db_session, samples))
+        scans = [detail for detail in plan if is_full_scan(detail)]
+
+        pr.green(query.name)
+        if not scans:
+            pr.yes("ok")
+        elif query.full_scan_ok:
+            pr.yes("scan ok")
+        else:
+            pr.no("full scan")
+            flagged.append(query)
+
+        for detail in plan:
+            pr.white(f"    {detail}")
+            print()
+
+    db_session.close()
+
+    for query in flagged:
+        pr.red(f"{query.name}: {query.source}")
+
+    pr.summary("queries", len(QUERIES))
+    pr.summary("full scans", len(flagged))
+    pr.toc()
+
+    if flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
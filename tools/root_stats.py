@@ -0,0 +1,102 @@
+"""Per-root headword counts, root families of each root and the list of parts
+of speech.
+
+load_root_stats counts them once for each version of the db file,
+so templates and exporters don't count headwords on every access,
+and the GUIs still see families and parts of speech added since the last build."""
+
+import os
+import threading
+from typing import NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from db.models import DpdHeadword
+from tools.pali_sort_key import pali_sort_key
+
+class RootStats(NamedTuple):
+    root_count: dict[str, int]
+    root_families: dict[str, list[str]]
+    pos_list: list[str]
+
+
+_cache: dict[str, tuple[Optional[tuple[float, ...]], RootStats]] = {}
+_lock = threading.Lock()
+
+
+def make_root_stats(db_session: Session) -> RootStats:
+    """Count the headwords of every root and list its root families,
+    with one GROUP BY each."""
+
+    root_count: dict[str, int] = {
+        root_key: count
+        for root_key, count in db_session.query(
+            DpdHeadword.root_key, func.count(DpdHeadword.id)
+        ).group_by(DpdHeadword.root_key)
+        if root_key is not None
+    }
+
+    root_families: dict[str, list[str]] = {}
+    for root_key, family_root in db_session.query(
+        DpdHeadword.root_key, DpdHeadword.family_root
+    ).group_by(DpdHeadword.root_key, DpdHeadword.family_root):
+        if root_key is not None and family_root is not None:
+            root_families.setdefault(root_key, []).append(family_root)
+    for family_list in root_families.values():
+        family_list.sort(key=pali_sort_key)
+
+    pos_list = sorted(
+        pos for (pos,) in db_session.query(DpdHeadword.pos).group_by(DpdHeadword.pos)
+    )
+
+    return RootStats(root_count, root_families, pos_list)
+
+
+def db_version(database: str) -> Optional[tuple[float, ...]]:
+    """The modified times of the db file and its write-ahead log,
+    which change with every commit."""
+
+    try:
+        version = [os.stat(database).st_mtime]
+    except OSError:
+        return None
+    try:
+        version.append(os.stat(f"{database}-wal").st_mtime)
+    except OSError:
+        pass
+    return tuple(version)
+
+
+def has_uncommitted_changes(db_session: Session) -> bool:
+    """Changes not flushed yet, or flushed but not committed.
+    sqlite3 only begins a transaction before a write."""
+
+    if db_session.new or db_session.dirty or db_session.deleted:
+        return True
+    if not db_session.in_transaction():
+        return False
+    dbapi_connection = db_session.connection().connection.dbapi_connection
+    return bool(getattr(dbapi_connection, "in_transaction", False))
+
+
+def load_root_stats(db_session: Session) -> RootStats:
+    """The root stats, made from the headwords once for each version
+    of the db file. The db file only changes on commit, so while the
+    session has uncommitted changes they're made every time."""
+
+    if has_uncommitted_changes(db_session):
+        return make_root_stats(db_session)
+
+    database = db_session.get_bind().url.database or ""
+    version = db_version(database)
+
+    cached = _cache.get(database)
+    if cached is not None and version is not None and cached[0] == version:
+        return cached[1]
+
+    root_stats = make_root_stats(db_session)
+
+    with _lock:
+        _cache[database] = (version, root_stats)
+    return root_stats
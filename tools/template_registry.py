@@ -0,0 +1,143 @@
+"""Compile each Mako and Jinja template once per process, and share it
+between all the exporters.
+
+Mako's compiled modules and Jinja's bytecode are also cached on disk
+in temp/template_cache, so the next run only compiles changed templates.
+
+Usage:
+from tools.template_registry import jinja_template, mako_template
+
+header_templ = mako_template(pth.dpd_header_templ_path)
+lookup_templ = jinja_template("exporter/kobo/templates", "lookup.html", autoescape=True)
+
+get_template_registry().stats() returns the hits, compiles and compile time.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+from jinja2 import Template as JinjaTemplate
+from mako.template import Template
+
+from tools.paths import ProjectPaths
+from tools.printer import printer as pr
+
+
+class TemplateStats(NamedTuple):
+    templates: int
+    hits: int
+    compiles: int
+    compile_seconds: float
+
+
+class TemplateRegistry:
+    def __init__(self, cache_dir: Optional[Path] = None) -> None:
+        """cache_dir None is ProjectPaths().template_cache_dir."""
+
+        self.cache_dir = cache_dir or ProjectPaths().template_cache_dir
+        self.hits = 0
+        self.compiles = 0
+        self.compile_seconds = 0.0
+        self._mako: dict[Path, Template] = {}
+        self._jinja: dict[tuple, Environment] = {}
+        self._jinja_templates: dict[tuple, JinjaTemplate] = {}
+        self._lock = threading.Lock()
+
+    def mako(self, path: Path | str) -> Template:
+        """The compiled Mako template of a file."""
+
+        path = Path(path).resolve()
+        with self._lock:
+            template = self._mako.get(path)
+            if template is not None:
+                self.hits += 1
+                return template
+
+            start = time.perf_counter()
+            template = Template(
+                filename=str(path),
+                module_directory=str(self.cache_dir / "mako"),
+            )
+            self.compile_seconds += time.perf_counter() - start
+            self.compiles += 1
+            self._mako[path] = template
+            return template
+
+    def jinja(self, directory: Path | str, **options: Any) -> Environment:
+        """A Jinja Environment loading templates from directory.
+        Environments with the same directory and options are shared."""
+
+        key = self._jinja_key(directory, options)
+        with self._lock:
+            env = self._jinja.get(key)
+            if env is None:
+                bytecode_dir = self.cache_dir / "jinja"
+                bytecode_dir.mkdir(parents=True, exist_ok=True)
+                env = Environment(
+                    loader=FileSystemLoader(str(directory)),
+                    bytecode_cache=FileSystemBytecodeCache(str(bytecode_dir)),
+                    **options,
+                )
+                self._jinja[key] = env
+            return env
+
+    def jinja_template(
+        self, directory: Path | str, name: str, **options: Any
+    ) -> JinjaTemplate:
+        """The compiled Jinja template name in directory."""
+
+        env = self.jinja(directory, **options)
+        key = (*self._jinja_key(directory, options), name)
+        with self._lock:
+            template = self._jinja_templates.get(key)
+            if template is not None:
+                self.hits += 1
+                return template
+
+            start = time.perf_counter()
+            template = env.get_template(name)
+            self.compile_seconds += time.perf_counter() - start
+            self.compiles += 1
+            self._jinja_templates[key] = template
+            return template
+
+    @staticmethod
+    def _jinja_key(directory: Path | str, options: dict[str, Any]) -> tuple:
+        return (str(Path(directory).resolve()), tuple(sorted(options.items())))
+
+    def stats(self) -> TemplateStats:
+        return TemplateStats(
+            len(self._mako) + len(self._jinja_templates),
+            self.hits,
+            self.compiles,
+            self.compile_seconds,
+        )
+
+    def print_stats(self) -> None:
+        stats = self.stats()
+        pr.summary("template hits", stats.hits)
+        pr.summary("template compiles", stats.compiles)
+        pr.summary("compile time", f"{stats.compile_seconds:.2f} s")
+
+
+_registry: Optional[TemplateRegistry] = None
+
+
+def get_template_registry() -> TemplateRegistry:
+    """The registry of this process."""
+
+    global _registry
+    if _registry is None:
+        _registry = TemplateRegistry()
+    return _registry
+
+
+def mako_template(path: Path | str) -> Template:
+    return get_template_registry().mako(path)
+
+
+def jinja_template(directory: Path | str, name: str, **options: Any) -> JinjaTemplate:
+    return get_template_registry().jinja_template(directory, name, **options)
@@ -0,0 +1,82 @@
+"""Transliterate lists of Pāḷi words into Sinhala, Devanagari and Thai,
+in a process pool, with both aksharamukha and the Path Nirvana orthography.
+
+Used by db/inflections/transliterate_inflections.py
+and db/lookup/transliterate_lookup_table.py.
+
+Usage:
+translit_dict = transliterate_entries({key: [word, word, ...]})
+"""
+
+from multiprocessing import Pool
+from typing import TypedDict
+
+import psutil
+from aksharamukha import transliterate
+
+from tools.pali_script import transliterate_batch
+from tools.sinhala_tools import translit_ro_to_si
+from tools.utils import list_into_batches
+
+
+class WordInflections(TypedDict):
+    sinhala: set
+    devanagari: set
+    thai: set
+
+
+def _aksharamukha_lines(text: str, script: str) -> list[str]:
+    if script == "Sinhala":
+        return translit_ro_to_si(text).split("\n")
+    return transliterate.process("IASTPali", script, text).split("\n")  # type:ignore
+
+
+def _transliterate_batch(
+    batch: list[tuple[str, list[str]]],
+) -> dict[str, WordInflections]:
+    # aksharamukha works much faster with large text than with single words,
+    # so each entry is one comma separated line
+    text = "".join(f"{','.join(words)}\n" for __key__, words in batch)
+
+    translit_dict: dict[str, WordInflections] = {}
+    for script, script_key in [
+        ("Sinhala", "sinhala"),
+        ("Devanagari", "devanagari"),
+        ("Thai", "thai"),
+    ]:
+        lines = _aksharamukha_lines(text, script)
+        for (key, __words__), line in zip(batch, lines):
+            words = set(line.split(","))
+            words.discard("")
+            translit_dict.setdefault(
+                key, WordInflections(sinhala=set(), devanagari=set(), thai=set())
+            )[script_key] = words
+
+    # path nirvana produces different orthography from aksharamukha
+    for key, words in batch:
+        sinhala, devanagari, thai = transliterate_batch(words)
+        translit_dict[key]["sinhala"].update(sinhala)
+        translit_dict[key]["devanagari"].update(devanagari)
+        translit_dict[key]["thai"].update(thai)
+
+    return translit_dict
+
+
+def transliterate_entries(
+    entries: dict[str, list[str]], processes: int | None = None
+) -> dict[str, WordInflections]:
+    """Transliterate the words of each entry.
+    Entries without any words are left out."""
+
+    items = [(key, words) for key, words in entries.items() if words]
+    if not items:
+        return {}
+
+    processes = processes or psutil.cpu_count() or 1
+    translit_dict: dict[str, WordInflections] = {}
+    with Pool(processes) as pool:
+        for batch_dict in pool.imap(
+            _transliterate_batch, list_into_batches(items, processes)
+        ):
+            translit_dict.update(batch_dict)
+    return translit_dict
@@ -27,6 +27,8 @@ Simple usage example:
 """
 
 from __future__ import unicode_literals
+import codecs
+import os
 import re
 import string
 import struct
@@ -36,6 +38,9 @@ import locale
 import zlib
 import datetime
 
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from html import escape
 from tools.writemdict.ripemd128 import ripemd128
 from tools.writemdict.pureSalsa20 import Salsa20
@@ -154,12 +159,40 @@ class _OffsetTableEntry(object):
     # In addition to the values themselves, it contains information about
     # the offset at which this entry will be placed (i.e. the total length
     # of records before it) which is required by the MDX format.
-    def __init__(self, key, key_null, key_len, offset, record_null):
+    #
+    # A record kept in a StoredRecord has record_null None and is read back
+    # from its file by MDictWriter._load_records.
+    def __init__(self, key, key_null, key_len, offset, record_null,
+                 record_len=None, stored=None):
         self.key = key
         self.key_null = key_null
         self.key_len = key_len
         self.offset = offset
         self.record_null = record_null
+        self.record_len = len(record_null) if record_len is None else record_len
+        self.stored = stored
+
+
+class StoredRecord(object):
+    # A record of an mdx file kept in a file instead of in memory, for the
+    # fast path, so only the keys of a big dictionary are held in memory.
+    #
+    # file is a binary file object, with the record at offset, length bytes
+    # long, encoded with encoding and without a null terminator. encoding must
+    # be the writer's encoding.
+    # is_link is True if the record is an @@@LINK= to another key, which the
+    # sort order needs to know without reading it.
+    #
+    # Records are read back just before their block is compressed.
+
+    __slots__ = ("file", "offset", "length", "encoding", "is_link")
+
+    def __init__(self, file, offset, length, encoding, is_link=False):
+        self.file = file
+        self.offset = offset
+        self.length = length
+        self.encoding = encoding
+        self.is_link = is_link
 
 
 class MDictWriter(object):
@@ -174,7 +207,9 @@ class MDictWriter(object):
                  register_by=None,
                  user_email=None,
                  user_device_id=None,
-                 is_mdd=False):
+                 is_mdd=False,
+                 fast=False,
+                 workers=None):
         """
         Prepares the records. A subsequent call to write() writes
         the mdx or mdd file.
@@ -185,6 +220,8 @@ class MDictWriter(object):
           file (the parameter is_mdd is True), then the values should be binary
           strings (bytes objects), containing the raw data for the corresponding
           file object.
+          With the fast path, an mdx value can also be a StoredRecord, a record
+          kept in a file, which is only read when its block is compressed.
 
         title is a (unicode) string, with the title of the dictionary
           description is a (unicode) string, with a short description of the
@@ -232,6 +269,15 @@ class MDictWriter(object):
         is_mdd is a boolean specifying whether the file written will be an mdx file
           or an mdd file. By default this is False, meaning that an mdd file will
           be written.
+
+        fast is a boolean specifying whether to use the fast path, which writes
+          exactly the same file: entries are sorted by one precomputed key each
+          instead of a comparison function, blocks are compressed in a pool of
+          threads, and record blocks are streamed to outfile as they are
+          compressed, instead of all being held in memory first.
+
+        workers is the number of compression threads of the fast path. By default
+          this is the number of CPUs.
         """
 
         self._num_entries = len(d)
@@ -248,6 +294,8 @@ class MDictWriter(object):
         self._user_device_id = user_device_id
         self._compression_type = compression_type
         self._is_mdd = is_mdd
+        self._fast = fast
+        self._workers = workers or os.cpu_count() or 1
 
         # encoding is set to the string used in the mdx header.
         # python_encoding is passed on to the python .encode()
@@ -283,8 +331,12 @@ class MDictWriter(object):
         self._build_offset_table(d)
         self._build_key_blocks()
         self._build_keyb_index()
-        self._build_record_blocks()
-        self._build_recordb_index()
+        if fast:
+            # record blocks are compressed while writing
+            self._record_ranges = self._split_ranges(_MdxRecordBlock)
+        else:
+            self._build_record_blocks()
+            self._build_recordb_index()
 
     def _build_offset_table(self, d):
         # Sets self._offset_table to a table of entries _OffsetTableEntry objects e.
@@ -361,6 +413,22 @@ class MDictWriter(object):
                         return -1
             return 0
 
+        def mdict_key(item):
+            # the same order as mdict_cmp with its defaults, from one key per item.
+            #
+            # equal locale keys are equal strings, so the length and punctuation
+            # comparisons never decide, and then a link sorts after a definition.
+            # the first 8 characters lowered start the same as the whole value lowered.
+            key = item[0].lower()
+            if not self._is_mdd:
+                key = regex_strip.sub('', key)
+            value = item[1]
+            if isinstance(value, StoredRecord):
+                is_link = value.is_link
+            else:
+                is_link = isinstance(value, str) and value[:8].lower().startswith("@@@link=")
+            return (locale.strxfrm(key), is_link)
+
         pattern = '[%s ]+' % string.punctuation
         regex_strip = re.compile(pattern)
 
@@ -368,10 +436,22 @@ class MDictWriter(object):
             items = list(d.items())
         else:
             items = list(d)
-        items.sort(key=functools.cmp_to_key(mdict_cmp))
+        stored_encodings = set(
+            record.encoding for __, record in items if isinstance(record, StoredRecord))
+        if stored_encodings:
+            if not self._fast or self._is_mdd:
+                raise ParameterError("StoredRecord needs the fast path of an mdx file")
+            python_encoding = codecs.lookup(self._python_encoding).name
+            if any(codecs.lookup(e).name != python_encoding for e in stored_encodings):
+                raise ParameterError("StoredRecord encoding differs from the writer's")
+        if self._fast:
+            items.sort(key=mdict_key)
+        else:
+            items.sort(key=functools.cmp_to_key(mdict_cmp))
 
         self._offset_table = []
         offset = 0
+        null_len = len("\0".encode(self._python_encoding))
         for key, record in items:
             key_enc = key.encode(self._python_encoding)
             key_null = (key+"\0").encode(self._python_encoding)
@@ -379,31 +459,44 @@ class MDictWriter(object):
 
             # set record_null to a the the value of the record. If it's
             # an MDX file, append an extra null character.
-            if self._is_mdd:
-                record_null = record
+            # a StoredRecord is only read when its block is compressed.
+            if isinstance(record, StoredRecord):
+                entry = _OffsetTableEntry(
+                    key=key_enc,
+                    key_null=key_null,
+                    key_len=key_len,
+                    record_null=None,
+                    offset=offset,
+                    record_len=record.length + null_len,
+                    stored=record)
             else:
-                record_null = (record+"\0").encode(self._python_encoding)
-            self._offset_table.append(_OffsetTableEntry(
-                key=key_enc,
-                key_null=key_null,
-                key_len=key_len,
-                record_null=record_null,
-                offset=offset))
-            offset += len(record_null)
+                if self._is_mdd:
+                    record_null = record
+                else:
+                    record_null = (record+"\0").encode(self._python_encoding)
+                entry = _OffsetTableEntry(
+                    key=key_enc,
+                    key_null=key_null,
+                    key_len=key_len,
+                    record_null=record_null,
+                    offset=offset)
+            self._offset_table.append(entry)
+            offset += entry.record_len
         self._total_record_len = offset
 
-    def _split_blocks(self, block_type):
+    def _split_ranges(self, block_type):
         # Split either the records or the keys into blocks for compression.
         #
-        # Returns a list of _MdxBlock, where the decompressed size of each block is (as
-        # far as practicable) less than self._block_size.
+        # Returns a list of (start, end) slices of self._offset_table, where the
+        # decompressed size of each block is (as far as practicable) less than
+        # self._block_size.
         #
         # block_type should be a subclass of _MdxBlock, i.e. either _MdxRecordBlock or
         # _MdxKeyBlock.
 
         this_block_start = 0
         cur_size = 0
-        blocks = []
+        ranges = []
         for ind in range(len(self._offset_table)+1):
             if ind != len(self._offset_table):
                 t = self._offset_table[ind]
@@ -423,17 +516,68 @@ class MDictWriter(object):
             else:
                 flush = False
             if flush:
-                blocks.append(block_type(
-                    self._offset_table[this_block_start:ind], self._compression_type, self._version))
+                ranges.append((this_block_start, ind))
                 cur_size = 0
                 this_block_start = ind
             if t is not None:  # mentally add this entry to list of things
                 cur_size += block_type._len_block_entry(t)
-        return blocks
+        return ranges
+
+    def _split_blocks(self, block_type):
+        # Returns a list of block_type, one for each slice of _split_ranges().
+
+        return [
+            block_type(self._offset_table[start:end], self._compression_type, self._version)
+            for start, end in self._split_ranges(block_type)]
+
+    def _compress_blocks(self, block_type, ranges):
+        # The fast path of _split_blocks: yields a block_type for each slice in ranges,
+        # in order, compressed in a pool of threads. zlib releases the GIL, so the
+        # threads compress in parallel.
+        #
+        # Only a few blocks per thread are compressed ahead of the one being
+        # yielded, so a caller which writes them out never holds them all.
+
+        with ThreadPoolExecutor(self._workers) as executor:
+            pending = deque()
+            for start, end in ranges:
+                entries = self._offset_table[start:end]
+                if block_type is _MdxRecordBlock:
+                    entries = self._load_records(entries)
+                pending.append(executor.submit(
+                    block_type, entries,
+                    self._compression_type, self._version))
+                if len(pending) >= 2 * self._workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _load_records(self, entries):
+        # Returns entries, with the records of StoredRecords read from their file.
+        # They are read here, in one thread, as the threads would share the file.
+
+        null = "\0".encode(self._python_encoding)
+        loaded = []
+        for t in entries:
+            if t.stored is not None:
+                t.stored.file.seek(t.stored.offset)
+                record_null = t.stored.file.read(t.stored.length) + null
+                t = _OffsetTableEntry(
+                    key=t.key,
+                    key_null=t.key_null,
+                    key_len=t.key_len,
+                    record_null=record_null,
+                    offset=t.offset)
+            loaded.append(t)
+        return loaded
 
     def _build_key_blocks(self):
         # Sets self._key_blocks to a list of _MdxKeyBlocks.
-        self._key_blocks = self._split_blocks(_MdxKeyBlock)
+        if self._fast:
+            self._key_blocks = list(self._compress_blocks(
+                _MdxKeyBlock, self._split_ranges(_MdxKeyBlock)))
+        else:
+            self._key_blocks = self._split_blocks(_MdxKeyBlock)
 
     def _build_record_blocks(self):
         self._record_blocks = self._split_blocks(_MdxRecordBlock)
@@ -505,6 +649,17 @@ class MDictWriter(object):
         #
         # outfile: a file-like object, opened in binary mode.
 
+        if self._fast:
+            seekable = getattr(outfile, "seekable", None)
+            if seekable is not None and seekable():
+                self._stream_record_sect(outfile)
+                return
+            # the header and index can't be filled in afterwards,
+            # so all the blocks are compressed first.
+            self._record_blocks = list(self._compress_blocks(
+                _MdxRecordBlock, self._record_ranges))
+            self._build_recordb_index()
+
         recordblocks_total_size = sum(
             (len(b.get_block()) for b in self._record_blocks))
         if self._version == "2.0":
@@ -520,6 +675,41 @@ class MDictWriter(object):
         for b in self._record_blocks:
             outfile.write(b.get_block())
 
+    def _stream_record_sect(self, outfile):
+        # The fast path of _write_record_sect, for a seekable outfile.
+        #
+        # The section header and the record block index have a fixed size, so
+        # space is left for them, each block is written as soon as it is
+        # compressed, and then the header and index are filled in.
+
+        if self._version == "2.0":
+            format = b">QQQQ"
+            index_entry_size = 16
+        else:
+            format = b">LLLL"
+            index_entry_size = 8
+        recordb_index_size = len(self._record_ranges) * index_entry_size
+
+        sect_start = outfile.tell()
+        outfile.write(b"\0" * (struct.calcsize(format) + recordb_index_size))
+
+        recordb_index = []
+        recordblocks_total_size = 0
+        for b in self._compress_blocks(_MdxRecordBlock, self._record_ranges):
+            outfile.write(b.get_block())
+            recordb_index.append(b.get_index_entry())
+            recordblocks_total_size += len(b.get_block())
+        sect_end = outfile.tell()
+
+        outfile.seek(sect_start)
+        outfile.write(struct.pack(format,
+                            len(self._record_ranges),
+                            self._num_entries,
+                            recordb_index_size,
+                            recordblocks_total_size))
+        outfile.write(b"".join(recordb_index))
+        outfile.seek(sect_end)
+
     def write(self, outfile):
         """ 
         Write the mdx file to outfile.
@@ -701,7 +891,7 @@ class _MdxRecordBlock(_MdxBlock):
 
     @staticmethod
     def _len_block_entry(t):
-        return len(t.record_null)
+        return t.record_len
 
 
 class _MdxKeyBlock(_MdxBlock):